@@ -0,0 +1,197 @@
+"""
+Стоимость построения pb2.Activity из документа MongoDB: прежний путь
+через модели Beanie и pydantic-схемы *GRPC, модели с transform_*,
+проекции *ActivityView и быстрый путь transform_raw_* по dict курсора.
+
+Каждый путь начинается с BSON документа, как он приходит от сервера,
+подключение к MongoDB не требуется.
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python research/src/activity_transform/bench_transformers.py
+"""
+import logging
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+import bson
+from beanie.odm.settings.document import DocumentSettings
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import grpc_server.generated.activities_pb2 as pb2
+from grpc_server.utils.transformators import (
+    transform_film_bookmark,
+    transform_film_review,
+    transform_film_score,
+    transform_raw_film_bookmark,
+    transform_raw_film_review,
+    transform_raw_film_score,
+)
+from models.mongo_models import (
+    FilmBookmarkModel,
+    FilmReviewModel,
+    FilmScoreModel,
+)
+from models.projections import (
+    BookmarkActivityView,
+    ReviewActivityView,
+    ScoreActivityView,
+)
+from schemas.bookmarks import FilmBookmarkGRPC
+from schemas.reviews import FilmReviewGRPC
+from schemas.scores import ScoreGRPC
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+ITERATIONS = 20000
+CODEC_OPTIONS: "bson.CodecOptions[dict]" = bson.CodecOptions(
+    uuid_representation=bson.binary.UuidRepresentation.STANDARD
+)
+
+
+def init_models() -> None:
+    """
+    Модели Beanie без init_beanie: конструктору документа нужна только
+    коллекция, клиент Motor не подключается к серверу до запроса.
+    """
+    client: "AsyncIOMotorClient[dict]" = AsyncIOMotorClient(
+        "mongodb://localhost:27017", uuidRepresentation="standard"
+    )
+    for model in (FilmScoreModel, FilmBookmarkModel, FilmReviewModel):
+        model._document_settings = DocumentSettings(
+            motor_collection=client["bench"][model.__name__]
+        )
+
+
+def generate_document(**fields) -> bytes:
+    doc = {
+        "_id": uuid.uuid4(),
+        "user_id": uuid.uuid4(),
+        "film_id": uuid.uuid4(),
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        "monotonic_seq": 123456,
+        **fields,
+    }
+    return bson.encode(doc, codec_options=CODEC_OPTIONS)
+
+
+def decode(payload: bytes) -> dict:
+    return bson.decode(payload, codec_options=CODEC_OPTIONS)
+
+
+def legacy_score(payload: bytes) -> pb2.Activity:
+    """GetActivities до потоковой выдачи: модель -> ScoreGRPC -> Activity"""
+    fs = FilmScoreModel.model_validate(decode(payload))
+    score = ScoreGRPC(
+        id=str(fs.id),
+        film_id=str(fs.film_id),
+        film_score=fs.film_score,
+        created_at=fs.created_at,
+    )
+    return pb2.Activity(
+        id=score.id,
+        user_id=str(fs.user_id),
+        activity_type=pb2.ActivityType.ACTIVITY_TYPE_RATING,
+        created_at=score.created_at,
+        rating=pb2.Rating(film_id=score.film_id, rating=score.film_score),
+    )
+
+
+def legacy_bookmark(payload: bytes) -> pb2.Activity:
+    bookmark = FilmBookmarkModel.model_validate(decode(payload))
+    schema = FilmBookmarkGRPC(
+        id=str(bookmark.id),
+        film_id=str(bookmark.film_id),
+        created_at=bookmark.created_at,
+    )
+    return pb2.Activity(
+        id=schema.id,
+        user_id=str(bookmark.user_id),
+        activity_type=pb2.ActivityType.ACTIVITY_TYPE_BOOKMARK,
+        created_at=schema.created_at,
+        bookmark=pb2.Bookmark(film_id=schema.film_id),
+    )
+
+
+def legacy_review(payload: bytes) -> pb2.Activity:
+    review = FilmReviewModel.model_validate(decode(payload))
+    schema = FilmReviewGRPC(
+        id=str(review.id),
+        film_id=str(review.film_id),
+        review_text=review.review_text,
+        created_at=review.created_at,
+    )
+    return pb2.Activity(
+        id=schema.id,
+        user_id=str(review.user_id),
+        activity_type=pb2.ActivityType.ACTIVITY_TYPE_REVIEW,
+        created_at=schema.created_at,
+        review=pb2.Review(
+            film_id=schema.film_id, review_text=schema.review_text
+        ),
+    )
+
+
+def paths(model, view, legacy, transformer, raw_transformer) -> dict:
+    return {
+        "bson decode": decode,
+        "model + *GRPC": legacy,
+        "model": lambda payload: transformer(
+            model.model_validate(decode(payload))
+        ),
+        "projection": lambda payload: transformer(
+            view.model_validate(decode(payload))
+        ),
+        "raw": lambda payload: raw_transformer(decode(payload)),
+    }
+
+
+if __name__ == "__main__":
+    init_models()
+    cases = {
+        "score": (
+            generate_document(film_score=8),
+            paths(
+                FilmScoreModel,
+                ScoreActivityView,
+                legacy_score,
+                transform_film_score,
+                transform_raw_film_score,
+            ),
+        ),
+        "bookmark": (
+            generate_document(),
+            paths(
+                FilmBookmarkModel,
+                BookmarkActivityView,
+                legacy_bookmark,
+                transform_film_bookmark,
+                transform_raw_film_bookmark,
+            ),
+        ),
+        "review": (
+            generate_document(
+                film_score=8,
+                likes_count=3,
+                review_text=f"review text {uuid.uuid4()} " * 8,
+            ),
+            paths(
+                FilmReviewModel,
+                ReviewActivityView,
+                legacy_review,
+                transform_film_review,
+                transform_raw_film_review,
+            ),
+        ),
+    }
+    for case_name, (payload, funcs) in cases.items():
+        logging.info("----- %s -----", case_name)
+        for name, func in funcs.items():
+            total = timeit.timeit(
+                "func(payload)",
+                globals={"func": func, "payload": payload},
+                number=ITERATIONS,
+            )
+            logging.info(
+                "%-16s %8.2f us/doc", name, total / ITERATIONS * 1e6
+            )
@@ -0,0 +1,92 @@
+"""
+Сравнение кодеков значений кэша RedisCache: время кодирования,
+декодирования и размер записи для типичных значений сервиса.
+
+Запуск из корня репозитория:
+    PYTHONPATH=src python research/src/cache_codecs/bench_codecs.py
+"""
+import logging
+import pickle
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+from db.codecs import MsgpackCodec, OrjsonCodec, VersionedSerializer
+from schemas.reviews import FilmReviewGRPC
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+ITERATIONS = 2000
+
+
+class LegacyPickle:
+    """Прежний путь RedisCache: pickle без заголовка"""
+
+    def dumps(self, value):
+        return pickle.dumps(value)
+
+    def loads(self, payload):
+        return pickle.loads(payload)
+
+
+def generate_payloads() -> dict:
+    now = datetime.now(timezone.utc)
+    reviews = [
+        {
+            "id": uuid.uuid4(),
+            "film_id": uuid.uuid4(),
+            "user_id": uuid.uuid4(),
+            "review_text": f"review text {uuid.uuid4()} " * 8,
+            "film_score": 8,
+            "created_at": now,
+            "likes": 12,
+        }
+        for _ in range(50)
+    ]
+    models = [
+        FilmReviewGRPC(
+            id=str(uuid.uuid4()),
+            film_id=str(uuid.uuid4()),
+            review_text=f"review text {uuid.uuid4()} " * 8,
+            created_at=now,
+        )
+        for _ in range(50)
+    ]
+    return {
+        "token flag": True,
+        "average score": 7.25,
+        "50 review dicts": reviews,
+        "50 pydantic models": models,
+    }
+
+
+def bench(serializer, value) -> tuple[float, float, int]:
+    payload = serializer.dumps(value)
+    encode = timeit.timeit(lambda: serializer.dumps(value), number=ITERATIONS)
+    decode = timeit.timeit(
+        lambda: serializer.loads(payload), number=ITERATIONS
+    )
+    return (
+        encode / ITERATIONS * 1e6,
+        decode / ITERATIONS * 1e6,
+        len(payload),
+    )
+
+
+if __name__ == "__main__":
+    serializers = {
+        "pickle (legacy)": LegacyPickle(),
+        "orjson": VersionedSerializer(OrjsonCodec()),
+        "msgpack": VersionedSerializer(MsgpackCodec()),
+    }
+    for payload_name, value in generate_payloads().items():
+        logging.info("----- %s -----", payload_name)
+        for name, serializer in serializers.items():
+            encode_us, decode_us, size = bench(serializer, value)
+            logging.info(
+                "%-16s encode %8.2f us  decode %8.2f us  size %7d B",
+                name,
+                encode_us,
+                decode_us,
+                size,
+            )
@@ -3,6 +3,8 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, Path, status
 
+from schemas.bookmarks import FilmBookmarkBatch
+from schemas.bulk import BulkResult
 from services.bookmark_service import BookmarksService, get_bookmark_service
 from utils.token_helpers import get_user_id_from_access_token
 
@@ -33,6 +35,29 @@ async def get_film_bookmarks(
     return films_ids
 
 
+@router.post(
+    "/batch",
+    response_model=BulkResult,
+    summary="Add bookmarks batch",
+    description="Добавляет несколько фильмов в закладки",
+)
+async def add_films_to_bookmarks(
+    data: FilmBookmarkBatch,
+    user_id: str = Depends(get_user_id_from_access_token),
+    bookmark_service: BookmarksService = Depends(get_bookmark_service),
+) -> BulkResult:
+    """
+    Добавляет фильмы в закладки одним пакетом
+    Параметры:
+        film_ids: list[str] - ID фильмов, результат возвращается
+            для каждого фильма в порядке запроса
+    """
+    results = await bookmark_service.add_films_to_bookmarks(
+        data.film_ids, user_id
+    )
+    return BulkResult(results=results)
+
+
 @router.post(
     "/{film_id}",
     status_code=status.HTTP_201_CREATED,
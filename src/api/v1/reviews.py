@@ -1,9 +1,18 @@
 import logging
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Path,
+    Response,
+    status,
+)
 from pydantic import ValidationError
 
-from schemas.reviews import FilmReview, FilmReviewPost
+from schemas.bulk import BulkResult
+from schemas.reviews import FilmReview, FilmReviewPost, ReviewLikeBatch
 from services.review_service import ReviewsService, get_review_service
 from utils.paginator import PaginateQueryParams
 from utils.token_helpers import get_user_id_from_access_token
@@ -24,6 +33,7 @@ router = APIRouter(
     description="Список рецензий фильма",
 )
 async def get_film_reviews(
+    response: Response,
     film_id: str = Path(
         title="UUID фильма", examples=["3fa85f64-5717-4562-b3fc-2c963f66afa6"]
     ),
@@ -32,6 +42,7 @@ async def get_film_reviews(
 ) -> list[FilmReview]:
     """
     Получает отзывы о фильме по его id.
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
     Параметры:
         film_id: str - ID фильма
         sort_field: str - имя поля для сортировки
@@ -41,7 +52,14 @@ async def get_film_reviews(
         sort_field="likes",
         page_number=paginate_params.page_number,
         page_size=paginate_params.page_size,
+        after=paginate_params.after,
+    )
+
+    next_cursor = review_service.next_reviews_cursor(
+        film_reviews, paginate_params.page_size
     )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
 
     try:
         film_review_list = [FilmReview(**review) for review in film_reviews]
@@ -101,6 +119,27 @@ async def delete_film_review(
     return None
 
 
+@router.post(
+    "/likes/batch",
+    response_model=BulkResult,
+    summary="Like reviews batch",
+    description="Лайкнуть несколько отзывов о фильмах",
+)
+async def like_film_reviews(
+    data: ReviewLikeBatch,
+    user_id: str = Depends(get_user_id_from_access_token),
+    review_service: ReviewsService = Depends(get_review_service),
+) -> BulkResult:
+    """
+    Добавляет лайки к отзывам одним пакетом.
+    Параметры:
+        review_ids: list[str] - ID отзывов, результат возвращается
+            для каждого отзыва в порядке запроса
+    """
+    results = await review_service.like_reviews(data.review_ids, user_id)
+    return BulkResult(results=results)
+
+
 @router.post(
     "/{review_id}/like",
     status_code=status.HTTP_200_OK,
@@ -119,3 +158,23 @@ async def like_film_review(
     """
     await review_service.like_review(user_id=user_id, review_id=review_id)
     return status.HTTP_200_OK
+
+
+@router.delete(
+    "/{review_id}/like",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Unlike review",
+    description="Убрать лайк с отзыва о фильме",
+)
+async def unlike_film_review(
+    review_id: str,
+    user_id: str = Depends(get_user_id_from_access_token),
+    review_service: ReviewsService = Depends(get_review_service),
+) -> None:
+    """
+    Удаляет лайк пользователя с отзыва о фильме по id отзыва.
+    Параметры:
+        review_id: str - ID отзыва
+    """
+    await review_service.unlike_review(user_id=user_id, review_id=review_id)
+    return None
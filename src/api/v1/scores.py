@@ -2,7 +2,8 @@ import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 
-from schemas.scores import AddScore, AverageScore
+from schemas.bulk import BulkResult
+from schemas.scores import AddScore, AddScoreBatch, AverageScore
 from services.score_service import FilmScoreService, get_film_score_service
 from utils.token_helpers import get_user_id_from_access_token
 
@@ -35,6 +36,27 @@ async def add_film_score(
     return status.HTTP_201_CREATED
 
 
+@router.post(
+    "/batch",
+    response_model=BulkResult,
+    summary="Add scores batch",
+    description="Добавляет или обновляет несколько оценок фильмов",
+)
+async def add_film_scores(
+    data: AddScoreBatch,
+    user_id: str = Depends(get_user_id_from_access_token),
+    score_service: FilmScoreService = Depends(get_film_score_service),
+) -> BulkResult:
+    """
+    Добавляет или обновляет оценки фильмов одним пакетом.
+    Параметры:
+        items: list - оценки (film_id, film_score), результат
+            возвращается для каждой оценки в порядке запроса
+    """
+    results = await score_service.add_scores(data.items, user_id)
+    return BulkResult(results=results)
+
+
 @router.delete(
     "/{film_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -17,6 +17,24 @@ class EnvMode(StrEnum):
     TEST = auto()
 
 
+class AuthVerifyMode(StrEnum):
+    REMOTE = auto()
+    LOCAL = auto()
+
+
+class ActivitySourceMode(StrEnum):
+    POLL = auto()
+    STREAM = auto()
+    CHANGE_STREAM = auto()
+
+
+class SlowConsumerPolicy(StrEnum):
+    CATCH_UP = auto()
+    DROP_OLDEST = auto()
+    BLOCK = auto()
+    DISCONNECT = auto()
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env", env_ignore_empty=True, extra="ignore"
@@ -26,10 +44,94 @@ class Settings(BaseSettings):
     ENV: str = EnvMode.PROD
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
+    # кодек значений кэша: orjson | msgpack | pickle
+    CACHE_CODEC: str = "orjson"
+    # читать записи pickle, сохраненные старыми версиями; только на время
+    # выкатки: pickle.loads выполняет код из значения кэша
+    CACHE_ACCEPT_LEGACY_PICKLE: bool = False
+    # in-process кэш перед Redis
+    LOCAL_CACHE_ENABLED: bool = True
+    LOCAL_CACHE_SIZE: int = 10000
+    LOCAL_CACHE_TTL: float = 5
+    LOCAL_CACHE_NEGATIVE_TTL: float = 1
+    LOCAL_CACHE_INVALIDATION_CHANNEL: str = "UGC_service:cache:invalidate"
     MONGO_HOST: str = "mongos1"
     MONGO_PORT: int = 27019
     MONGO_DB: str = "ugc2_movies"
     AUTH_SERVICE_URL: str = ""
+    # REMOTE - проверка токена запросом в Auth сервис,
+    # LOCAL - проверка подписи по публичным ключам Auth сервиса (JWKS)
+    AUTH_VERIFY_MODE: AuthVerifyMode = AuthVerifyMode.REMOTE
+    AUTH_JWKS_URL: str = ""
+    AUTH_JWKS_REFRESH_INTERVAL: int = 300
+    AUTH_JWT_ALGORITHMS: list[str] = ["RS256"]
+    AUTH_JWT_AUDIENCE: str = ""
+    AUTH_JWT_ISSUER: str = ""
+    # пул HTTP-соединений с Auth сервисом
+    AUTH_HTTP_POOL_SIZE: int = 100
+    AUTH_HTTP_POOL_SIZE_PER_HOST: int = 50
+    AUTH_HTTP_KEEPALIVE_TIMEOUT: float = 30.0
+    AUTH_HTTP_CONNECT_TIMEOUT: float = 1.0
+    AUTH_HTTP_TIMEOUT: float = 5.0
+    AUTH_HTTP_RETRIES: int = 2
+    AUTH_HTTP_RETRY_BACKOFF: float = 0.1
+    # доля повторных запросов от общего числа запросов к Auth сервису
+    AUTH_HTTP_RETRY_BUDGET_RATIO: float = 0.2
+    # время блокировки в Redis на проверку одного токена между воркерами
+    # (0 - объединять проверки только внутри процесса)
+    AUTH_VERIFY_LOCK_TIMEOUT: float = 0
+    # период опроса MongoDB и размер буфера одного подписчика
+    # в потоке активностей gRPC сервера
+    ACTIVITY_POLL_INTERVAL: int = 5
+    ACTIVITY_BUFFER_SIZE: int = 10000
+    # поведение при переполнении буфера подписчика:
+    # CATCH_UP - вытесненное догружается из MongoDB,
+    # DROP_OLDEST - вытесненное пропускается, клиент получает маркер gap,
+    # BLOCK - источник ждет самого медленного подписчика,
+    # DISCONNECT - поток завершается с подсказкой для возобновления
+    ACTIVITY_SLOW_CONSUMER_POLICY: SlowConsumerPolicy = (
+        SlowConsumerPolicy.CATCH_UP
+    )
+    # период записи в лог глубины очередей и отставания потоков
+    # (0 - не записывать)
+    ACTIVITY_METRICS_INTERVAL: float = 30
+    # позиция потребителя сохраняется каждые N доставленных событий
+    # или каждые INTERVAL секунд
+    ACTIVITY_CHECKPOINT_BATCH: int = 100
+    ACTIVITY_CHECKPOINT_INTERVAL: float = 1.0
+    # размер пачки методов *Batched и максимальная задержка (сек.)
+    # первой активности пачки; пачка должна помещаться в лимит
+    # размера сообщения gRPC (4 МБ по умолчанию)
+    ACTIVITY_BATCH_SIZE: int = 500
+    ACTIVITY_BATCH_LINGER: float = 0.05
+    # GetActivities читает активности по USERS_CHUNK пользователей
+    # одним курсором $in на коллекцию, документы курсора читаются
+    # пачками по CURSOR_BATCH_SIZE, следующие QUERY_CONCURRENCY групп
+    # открываются заранее
+    ACTIVITY_USERS_CHUNK: int = 500
+    ACTIVITY_QUERY_CONCURRENCY: int = 8
+    ACTIVITY_CURSOR_BATCH_SIZE: int = 500
+    # активности gRPC сервера строятся из документов MongoDB напрямую,
+    # без валидации моделей Beanie/pydantic
+    ACTIVITY_RAW_DOCUMENTS: bool = True
+    # POLL - новые активности ищутся опросом MongoDB,
+    # STREAM - API пишет вставки в Redis Streams, gRPC сервер читает их,
+    # CHANGE_STREAM - gRPC сервер читает потоки изменений MongoDB
+    # (без replica set используется опрос)
+    ACTIVITY_SOURCE: ActivitySourceMode = ActivitySourceMode.POLL
+    ACTIVITY_STREAM_MAXLEN: int = 100000
+    ACTIVITY_STREAM_BLOCK_MS: int = 5000
+    # monotonic_seq выдается блоками по BLOCK_SIZE номеров на процесс
+    # (1 - INCR в Redis на каждую вставку); нижняя граница незавершенных
+    # вставок процесса публикуется раз в REPORT_INTERVAL сек. и
+    # перестает учитываться через LEASE_TTL сек. без обновления;
+    # блоки выдаются только с ACTIVITY_SOURCE=POLL (см.
+    # init_services.sequence_blocks_enabled)
+    SEQUENCE_BLOCK_SIZE: int = 100
+    SEQUENCE_REPORT_INTERVAL: float = 0.5
+    SEQUENCE_LEASE_TTL: float = 10.0
+    # максимальное количество элементов пакетных запросов API
+    BULK_MAX_ITEMS: int = 500
     SENTRY_DSN: str = ""
 
 
@@ -0,0 +1,234 @@
+import asyncio
+import inspect
+import logging
+import math
+import random
+import time
+from functools import partial, wraps
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Sequence
+
+from db.casher import AbstractCache, CacheLock
+from db.redis import form_key
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# period of polling the store while another worker computes the value
+LOCK_POLL_INTERVAL = 0.05
+
+# in-flight computations of cached values within the process
+_cache_flight = SingleFlight()
+
+# strong references to background refresh tasks
+_background_refreshes: set[asyncio.Task] = set()
+
+# recomputation of a cached call and the tags of its entry
+Recompute = tuple[Callable[[], Awaitable[Any]], list[str]]
+
+
+class CacheEntry(NamedTuple):
+    """Cached value with the metadata XFetch needs."""
+
+    value: Any
+    # time spent computing the value, seconds
+    delta: float
+    # unix time after which the value is stale
+    expires_at: float
+
+    @classmethod
+    def load(cls, raw: Any) -> Optional["CacheEntry"]:
+        if isinstance(raw, (list, tuple)) and len(raw) == len(cls._fields):
+            return cls(*raw)
+        # value stored in another format is treated as a miss
+        return None
+
+    def needs_refresh(self, beta: float) -> bool:
+        """
+        The entry is stale, or XFetch decides to refresh it early: the
+        closer the entry is to expiry and the more expensive it is to
+        compute, the more likely a caller refreshes it early.
+        """
+        now = time.time()
+        if now >= self.expires_at:
+            return True
+        if beta <= 0:
+            return False
+        jitter = -self.delta * beta * math.log(1 - random.random())
+        return now + jitter >= self.expires_at
+
+
+class CachePolicy(NamedTuple):
+    """Expiration and refresh settings of a cached method."""
+
+    expire: int
+    stale_ttl: int
+    beta: float
+    lock_timeout: float
+    tags: Sequence[str]
+
+
+class CachedMethod:
+    """
+    Cache lookup, early and stale-while-revalidate refresh and
+    coalesced recomputation of one method decorated by cache_method.
+    """
+
+    def __init__(
+        self, func: Callable, cache_attr: str, policy: CachePolicy
+    ) -> None:
+        self.func = func
+        self.cache_attr = cache_attr
+        self.policy = policy
+        self.signature = inspect.signature(func)
+
+    async def call(self, instance: Any, args: tuple, kwargs: dict) -> Any:
+        cache = getattr(instance, self.cache_attr, None)
+        if cache is None:
+            raise ValueError("Cache instance is not set")
+
+        key = form_key(self.func.__name__, args, kwargs)
+
+        entry = CacheEntry.load(await cache.get(key))
+        if entry is None:
+            recompute = self._recompute(instance, args, kwargs)
+            return await _cache_flight.do(
+                key, lambda: self._compute(cache, key, recompute, wait=True)
+            )
+
+        logger.debug("Response from cache")
+        if entry.needs_refresh(self.policy.beta):
+            self._refresh_in_background(
+                cache, key, self._recompute(instance, args, kwargs)
+            )
+        return entry.value
+
+    def _recompute(
+        self, instance: Any, args: tuple, kwargs: dict
+    ) -> Recompute:
+        tags: list[str] = []
+        if self.policy.tags:
+            bound = self.signature.bind(instance, *args, **kwargs)
+            bound.apply_defaults()
+            tags = [tag.format(**bound.arguments) for tag in self.policy.tags]
+        return partial(self.func, instance, *args, **kwargs), tags
+
+    async def _compute(
+        self,
+        cache: AbstractCache,
+        key: str,
+        recompute: Recompute,
+        wait: bool,
+    ) -> Any:
+        lock = CacheLock(cache, key, self.policy.lock_timeout)
+        async with lock as lock_token:
+            if lock_token is not None:
+                return await self._store(cache, key, recompute)
+            if not wait:
+                # another worker is already refreshing the value
+                return None
+
+        entry = await self._wait_for_entry(cache, key)
+        if entry is not None:
+            return entry.value
+        return await self._store(cache, key, recompute)
+
+    async def _store(
+        self, cache: AbstractCache, key: str, recompute: Recompute
+    ) -> Any:
+        load, tags = recompute
+        # versions read before loading: if a tag is invalidated while the
+        # value is computed, the store refuses the now stale value
+        tag_versions = await cache.tag_versions(*tags) if tags else None
+        started = time.monotonic()
+        value = await load()
+        delta = time.monotonic() - started
+        entry = CacheEntry(value, delta, time.time() + self.policy.expire)
+        await cache.set(
+            key,
+            list(entry),
+            self.policy.expire + self.policy.stale_ttl,
+            tags=tags,
+            tag_versions=tag_versions,
+        )
+        return value
+
+    async def _wait_for_entry(
+        self, cache: AbstractCache, key: str
+    ) -> Optional[CacheEntry]:
+        deadline = time.monotonic() + self.policy.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            entry = CacheEntry.load(await cache.get(key))
+            if entry is not None:
+                return entry
+        return None
+
+    def _refresh_in_background(
+        self, cache: AbstractCache, key: str, recompute: Recompute
+    ) -> None:
+        refresh_key = ("refresh", key)
+        if refresh_key in _cache_flight:
+            return
+        task = asyncio.create_task(
+            _cache_flight.do(
+                refresh_key,
+                lambda: self._compute(cache, key, recompute, wait=False),
+            )
+        )
+        _background_refreshes.add(task)
+        task.add_done_callback(_on_refresh_done)
+
+
+def cache_method(  # noqa: WPS211
+    cache_attr: str,
+    expire: int = 1800,
+    stale_ttl: int = 60,
+    beta: float = 1.0,
+    lock_timeout: float = 5,
+    tags: Sequence[str] = (),
+):
+    """
+    cache_method is a decorator that caches the result
+    of an asynchronous method in a store.
+
+    Concurrent misses of the same key are coalesced: within a process
+    through single-flight, across processes through a lock in the store,
+    so only one caller recomputes the value. Entries are refreshed
+    early with XFetch probability and, once expired, are still served
+    for stale_ttl seconds while one background task refreshes them.
+
+    Parameters:
+    - cache_attr (str): The attribute name for the instance
+                        of store in the class.
+    - expire (int): The cache expiration time in seconds.
+                    Defaults to 1800 seconds (30 minutes).
+    - stale_ttl (int): How long an expired value may be served
+                       while it is being refreshed in the background.
+    - beta (float): XFetch early refresh aggressiveness (0 disables).
+    - lock_timeout (float): Lifetime of the recompute lock and the
+                            longest time to wait for another worker.
+    - tags (Sequence[str]): Domain tags of the entry, formatted with
+                            the method arguments, e.g. "film:{film_id}".
+                            The store's invalidate_tags() drops them.
+
+    Raises:
+    - ValueError: If the cacher instance is not set.
+    """
+    policy = CachePolicy(expire, stale_ttl, beta, lock_timeout, tuple(tags))
+
+    def decorator(func: Callable) -> Callable:
+        cached = CachedMethod(func, cache_attr, policy)
+
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            return await cached.call(self, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _on_refresh_done(task: asyncio.Task) -> None:
+    _background_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Error refreshing cache: %s", task.exception())
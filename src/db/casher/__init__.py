@@ -1,15 +1,17 @@
-from typing import Any, Optional, Protocol
+from typing import Any, Mapping, Optional, Protocol, Sequence
 
 
-class AbstractCache(Protocol):
+class AbstractCache(Protocol):  # noqa: WPS214
     """Абстрактый класс для кэша"""
 
-    async def set(
+    async def set(  # noqa: WPS211
             self,
             key: str,
             value: Any,
             expire: Optional[int] = None,
-            raise_exc: bool = False
+            raise_exc: bool = False,
+            tags: Sequence[str] = (),
+            tag_versions: Optional[Sequence[int]] = None
     ) -> None:
         pass
 
@@ -23,6 +25,71 @@ class AbstractCache(Protocol):
     ) -> int:
         pass
 
+    async def get_many(  # noqa: WPS463, WPS615
+            self,
+            keys: Sequence[str],
+            raise_exc: bool = False
+    ) -> list[Optional[Any]]:
+        pass
+
+    async def set_many(  # noqa: WPS615
+            self,
+            mapping: Mapping[str, Any],
+            expire: Optional[int] = None,
+            raise_exc: bool = False
+    ) -> None:
+        pass
+
+    async def delete_many(
+            self,
+            keys: Sequence[str],
+            raise_exc: bool = False
+    ) -> int:
+        pass
+
+    async def incr_many(self, amounts: Mapping[str, int]) -> list[int]:
+        pass
+
+    async def acquire_lock(self, key: str, expire: float) -> Optional[str]:
+        pass
+
+    async def release_lock(self, key: str, token: str) -> None:
+        pass
+
+    async def invalidate_tags(self, *tags: str) -> list[str]:
+        pass
+
+    async def tag_versions(self, *tags: str) -> Optional[list[int]]:
+        pass
+
+
+class CacheLock:
+    """
+    Блокировка ключа в кэше на timeout секунд.
+
+    Возвращает токен владельца или None, если блокировка занята;
+    захваченная блокировка снимается при выходе.
+    """
+
+    def __init__(
+            self,
+            cache: AbstractCache,
+            key: str,
+            timeout: float
+    ) -> None:
+        self.cache = cache
+        self.key = f"lock: {key}"
+        self.timeout = timeout
+        self.token: Optional[str] = None
+
+    async def __aenter__(self) -> Optional[str]:
+        self.token = await self.cache.acquire_lock(self.key, self.timeout)
+        return self.token
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self.token is not None:
+            await self.cache.release_lock(self.key, self.token)
+
 
 # cacher = Optional[AbstractCache]
 cacher: Optional[AbstractCache] = None
@@ -30,3 +97,11 @@ cacher: Optional[AbstractCache] = None
 
 async def get_cacher() -> AbstractCache | None:
     return cacher
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """
+    Удаляет из кэша все записи, помеченные любым из тегов.
+    """
+    if cacher is not None and tags:
+        await cacher.invalidate_tags(*tags)
@@ -0,0 +1,144 @@
+import pickle
+from types import MappingProxyType
+from typing import Any, Mapping, Protocol
+
+import msgpack
+import orjson
+
+from db.model_tags import (
+    MODEL_TAG_BYTES,
+    msgpack_default,
+    orjson_default,
+    revive_models,
+)
+
+# версия формата заголовка значений в кэше
+FORMAT_VERSION = 1
+
+# первый байт pickle протокола 2+, которым начинаются старые записи
+PICKLE_PROTO = 0x80
+
+
+class Codec(Protocol):
+    """Абстрактный класс для кодека значений кэша"""
+
+    codec_id: int
+    name: str
+
+    def encode(self, value: Any) -> bytes:
+        pass
+
+    def decode(self, payload: bytes) -> Any:
+        pass
+
+
+class PickleCodec:
+    """Кодек pickle - только для совместимости со старыми записями"""
+
+    codec_id = 1
+    name = "pickle"
+
+    def encode(self, value: Any) -> bytes:
+        return pickle.dumps(value)
+
+    def decode(self, payload: bytes) -> Any:
+        return pickle.loads(payload)  # noqa: S301
+
+
+class OrjsonCodec:
+    """JSON-кодек на orjson с поддержкой pydantic-моделей"""
+
+    codec_id = 2
+    name = "orjson"
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(
+            value,
+            default=orjson_default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+    def decode(self, payload: bytes) -> Any:
+        value = orjson.loads(payload)
+        if MODEL_TAG_BYTES in payload:
+            return revive_models(value)
+        return value
+
+
+class MsgpackCodec:
+    """Компактный бинарный кодек на msgpack с поддержкой pydantic-моделей"""
+
+    codec_id = 3
+    name = "msgpack"
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=msgpack_default)
+
+    def decode(self, payload: bytes) -> Any:
+        value = msgpack.unpackb(payload, strict_map_key=False)
+        if MODEL_TAG_BYTES in payload:
+            return revive_models(value)
+        return value
+
+
+CODECS: Mapping[str, type[Codec]] = MappingProxyType({
+    PickleCodec.name: PickleCodec,
+    OrjsonCodec.name: OrjsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+})
+
+
+class VersionedSerializer:
+    """
+    Сериализатор значений кэша с заголовком [версия формата, id кодека].
+
+    Пишет выбранным кодеком, а читает любым известным, поэтому
+    записи остаются читаемыми при смене кодека во время выкатки.
+
+    Attributes:
+        codec (Codec): Кодек для записи.
+        accept_legacy_pickle (bool): Читать ли записи pickle, сохраненные
+            старой версией или кодеком pickle. По умолчанию выключено:
+            pickle.loads выполняет код из значения кэша.
+    """
+
+    def __init__(
+        self, codec: Codec, accept_legacy_pickle: bool = False
+    ) -> None:
+        self.codec = codec
+        self.accept_legacy_pickle = accept_legacy_pickle
+        self._header = bytes((FORMAT_VERSION, codec.codec_id))
+        self._decoders: dict[int, Codec] = {
+            factory.codec_id: factory() for factory in CODECS.values()
+        }
+        if not accept_legacy_pickle and codec.codec_id != PickleCodec.codec_id:
+            del self._decoders[PickleCodec.codec_id]
+
+    def dumps(self, value: Any) -> bytes:
+        return self._header + self.codec.encode(value)
+
+    def loads(self, payload: bytes) -> Any:
+        """
+        Raises:
+            ValueError: Если формат или кодек записи неизвестны.
+        """
+        if payload[0] == PICKLE_PROTO and self.accept_legacy_pickle:
+            return pickle.loads(payload)  # noqa: S301
+
+        if len(payload) < 2 or payload[0] != FORMAT_VERSION:
+            raise ValueError("Unknown cache value format")
+
+        decoder = self._decoders.get(payload[1])
+        if decoder is None:
+            raise ValueError(f"Unknown cache codec id: {payload[1]}")
+        return decoder.decode(payload[2:])
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Возвращает кодек по имени из настроек.
+    """
+    try:
+        return CODECS[name]()
+    except KeyError as ex:
+        raise ValueError(f"Unknown cache codec: {name}") from ex
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Mapping, Optional, Sequence
+
+from redis.asyncio import Redis
+
+from db.casher import AbstractCache
+
+logger = logging.getLogger(__name__)
+
+# маркер отсутствия ключа в локальном кэше (None - закэшированный промах)
+MISSING = object()
+
+
+class LRUTTLStore:
+    """
+    Ограниченное по размеру in-process хранилище с вытеснением LRU
+    и временем жизни для каждой записи.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """
+        Возвращает значение или MISSING, если ключа нет или он истек.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return MISSING
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class TwoTierCache(AbstractCache):  # noqa: WPS214, WPS230
+    """
+    Двухуровневый кэш: in-process LRU с TTL перед общим кэшем в Redis.
+
+    Горячие ключи читаются из памяти процесса. Время жизни локальной
+    записи ограничено local_ttl, поэтому устаревание без инвалидации
+    не превышает его. Записи через set/incr других процессов рассылают
+    инвалидацию через Redis pub/sub, если задан канал.
+
+    Attributes:
+        remote (AbstractCache): Общий кэш (RedisCache).
+        local (LRUTTLStore): Локальное хранилище процесса.
+        local_ttl (float): Время жизни локальной записи в секундах.
+        negative_ttl (float): Время жизни закэшированного промаха
+            (0 - промахи не кэшируются).
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        remote: AbstractCache,
+        maxsize: int = 10000,
+        local_ttl: float = 5,
+        negative_ttl: float = 0,
+        redis: Optional[Redis] = None,
+        channel: str = "",
+    ) -> None:
+        self.remote = remote
+        self.local = LRUTTLStore(maxsize)
+        self.local_ttl = local_ttl
+        self.negative_ttl = negative_ttl
+        self.redis = redis
+        self.channel = channel
+
+        self.instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    async def set(  # noqa: WPS211
+            self,
+            key: str,
+            value: Any,
+            expire: Optional[int] = None,
+            raise_exc: bool = False,
+            tags: Sequence[str] = (),
+            tag_versions: Optional[Sequence[int]] = None
+    ) -> None:
+        await self.remote.set(
+            key, value, expire, raise_exc, tags=tags, tag_versions=tag_versions
+        )
+        if tag_versions is None:
+            ttl = min(self.local_ttl, expire) if expire else self.local_ttl
+            self.local.set(key, value, ttl)
+        else:
+            # удаленный кэш мог отказаться от записи устаревшего значения,
+            # поэтому оно попадет в локальный кэш только при чтении
+            self.local.delete(key)
+        await self._publish_invalidation(key)
+
+    async def get(self, key: str, raise_exc: bool = False) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+
+        value = await self.remote.get(key, raise_exc)
+        if value is not None:
+            self.local.set(key, value, self.local_ttl)
+        elif self.negative_ttl > 0:
+            self.local.set(key, None, self.negative_ttl)
+        return value
+
+    async def incr(
+            self,
+            key: str,
+            amount: int = 1
+    ) -> int:
+        self.local.delete(key)
+        return await self.remote.incr(key, amount)
+
+    async def get_many(  # noqa: WPS615
+            self,
+            keys: Sequence[str],
+            raise_exc: bool = False
+    ) -> list[Optional[Any]]:
+        values = [self.local.get(key) for key in keys]
+        missed = [
+            index for index, value in enumerate(values) if value is MISSING
+        ]
+        if not missed:
+            return values
+
+        remote_values = await self.remote.get_many(
+            [keys[index] for index in missed], raise_exc
+        )
+        for index, value in zip(missed, remote_values):
+            values[index] = value
+            if value is not None:
+                self.local.set(keys[index], value, self.local_ttl)
+            elif self.negative_ttl > 0:
+                self.local.set(keys[index], None, self.negative_ttl)
+        return values
+
+    async def set_many(  # noqa: WPS615
+            self,
+            mapping: Mapping[str, Any],
+            expire: Optional[int] = None,
+            raise_exc: bool = False
+    ) -> None:
+        await self.remote.set_many(mapping, expire, raise_exc)
+        ttl = min(self.local_ttl, expire) if expire else self.local_ttl
+        for key, value in mapping.items():
+            self.local.set(key, value, ttl)
+        await self._publish_invalidation(*mapping)
+
+    async def delete_many(
+            self,
+            keys: Sequence[str],
+            raise_exc: bool = False
+    ) -> int:
+        for key in keys:
+            self.local.delete(key)
+        deleted = await self.remote.delete_many(keys, raise_exc)
+        await self._publish_invalidation(*keys)
+        return deleted
+
+    async def incr_many(self, amounts: Mapping[str, int]) -> list[int]:
+        for key in amounts:
+            self.local.delete(key)
+        return await self.remote.incr_many(amounts)
+
+    async def acquire_lock(self, key: str, expire: float) -> Optional[str]:
+        return await self.remote.acquire_lock(key, expire)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.remote.release_lock(key, token)
+
+    async def invalidate_tags(self, *tags: str) -> list[str]:
+        keys = await self.remote.invalidate_tags(*tags)
+        for key in keys:
+            self.local.delete(key)
+        await self._publish_invalidation(*keys)
+        return keys
+
+    async def tag_versions(self, *tags: str) -> Optional[list[int]]:
+        return await self.remote.tag_versions(*tags)
+
+    def start(self) -> None:
+        """
+        Запускает прослушивание канала инвалидации.
+        """
+        if self.redis is not None and self.channel and not self._listener:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """
+        Останавливает прослушивание канала инвалидации.
+        """
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    def handle_invalidation(self, message: bytes | str) -> None:
+        """
+        Удаляет из локального кэша ключи из сообщения другого процесса.
+        """
+        if isinstance(message, bytes):
+            message = message.decode()
+        instance_id, _, keys = message.partition(":")
+        if instance_id != self.instance_id:
+            for key in keys.split("\n"):
+                self.local.delete(key)
+
+    async def _publish_invalidation(self, *keys: str) -> None:
+        if self.redis is None or not self.channel or not keys:
+            return
+        message = f"{self.instance_id}:" + "\n".join(keys)
+        try:
+            await self.redis.publish(self.channel, message)
+        except Exception as ex:
+            logger.error("Error publishing cache invalidation: %s", ex)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                await self._subscribe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.error("Cache invalidation listener error: %s", ex)
+                self.local.clear()
+                await asyncio.sleep(1)
+
+    async def _subscribe(self) -> None:
+        async with self.redis.pubsub() as pubsub:  # type: ignore
+            await pubsub.subscribe(self.channel)
+            # сообщения могли быть пропущены до подписки
+            self.local.clear()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    self.handle_invalidation(message["data"])
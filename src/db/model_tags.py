@@ -0,0 +1,80 @@
+import sys
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+
+import orjson
+from pydantic import BaseModel
+
+# ключ, которым помечаются сериализованные pydantic-модели
+MODEL_TAG = "__pydantic__"
+MODEL_TAG_BYTES = MODEL_TAG.encode()
+
+
+def encode_default(obj: Any) -> Any:
+    """
+    Приводит к сериализуемому виду типы, которые кодек не знает.
+
+    Pydantic-модели сохраняются с путем к классу, чтобы при чтении
+    вернуть экземпляр модели, а не словарь.
+    """
+    if isinstance(obj, BaseModel):
+        model_class = type(obj)
+        return {
+            MODEL_TAG: f"{model_class.__module__}:{model_class.__qualname__}",
+            "data": obj.model_dump(mode="json"),
+        }
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Type is not serializable: {type(obj)}")
+
+
+def msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    return encode_default(obj)
+
+
+def orjson_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        model_class = type(obj)
+        # model_dump_json работает в pydantic-core без промежуточного dict
+        return {
+            MODEL_TAG: f"{model_class.__module__}:{model_class.__qualname__}",
+            "data": orjson.Fragment(obj.model_dump_json()),
+        }
+    return encode_default(obj)
+
+
+def _load_model(path: str) -> Optional[type[BaseModel]]:
+    # берем только уже загруженные модули, чтобы данные из кэша
+    # не могли инициировать импорт произвольного кода
+    module_name, _, qualname = path.partition(":")
+    target: Any = sys.modules.get(module_name)
+    for attr in qualname.split("."):
+        target = getattr(target, attr, None)
+    if isinstance(target, type) and issubclass(target, BaseModel):
+        return target
+    return None
+
+
+def revive_models(value: Any) -> Any:
+    """
+    Восстанавливает pydantic-модели, помеченные encode_default.
+    """
+    if isinstance(value, list):
+        return [revive_models(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    path = value.get(MODEL_TAG)
+    if path is not None:
+        model = _load_model(path)
+        if model is not None:
+            return model.model_validate(value["data"])
+        return value["data"]
+    return {key: revive_models(item) for key, item in value.items()}
@@ -0,0 +1,88 @@
+import logging
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = "UGC_service:activity_stream:"
+
+
+def stream_key(model_name: str) -> str:
+    return f"{STREAM_PREFIX}{model_name}"
+
+
+class ActivityOutbox:
+    """
+    Журнал вставок документов в Redis Streams (поток на модель).
+
+    Событие содержит monotonic_seq и JSON документа, поэтому читатель
+    строит активность без запроса в MongoDB. Запись в поток
+    выполняется после подтверждения вставки: MongoDB остается
+    источником истины, а пропущенные при сбое Redis события
+    читатели догружают из нее.
+
+    Attributes:
+        redis (Redis): Клиент Redis.
+        maxlen (int): Примерная максимальная длина потока.
+    """
+
+    def __init__(self, redis: Redis, maxlen: int = 100000) -> None:
+        self.redis = redis
+        self.maxlen = maxlen
+
+    async def publish(self, doc: BaseModel, seq: int) -> None:
+        try:
+            await self.redis.xadd(
+                stream_key(type(doc).__name__),
+                {"seq": seq, "doc": doc.model_dump_json()},
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+        except Exception as ex:
+            logger.error("Error publishing activity to stream: %s", ex)
+
+    async def publish_many(self, docs: list[Any]) -> None:
+        """
+        Публикует документы пакетной вставки одним конвейером команд.
+        """
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for doc in docs:
+                    pipe.xadd(
+                        stream_key(type(doc).__name__),
+                        {
+                            "seq": doc.monotonic_seq,
+                            "doc": doc.model_dump_json(),
+                        },
+                        maxlen=self.maxlen,
+                        approximate=True,
+                    )
+                await pipe.execute()
+        except Exception as ex:
+            logger.error("Error publishing activities to stream: %s", ex)
+
+
+outbox: Optional[ActivityOutbox] = None
+
+
+async def get_outbox() -> ActivityOutbox | None:
+    return outbox
+
+
+async def publish_activity(doc: Any) -> None:
+    """
+    Публикует вставленный документ, если журнал включен.
+    """
+    if outbox is not None and doc.monotonic_seq is not None:
+        await outbox.publish(doc, doc.monotonic_seq)
+
+
+async def publish_activities(docs: list[Any]) -> None:
+    """
+    Публикует документы пакетной вставки, если журнал включен.
+    """
+    docs = [doc for doc in docs if doc.monotonic_seq is not None]
+    if outbox is not None and docs:
+        await outbox.publish_many(docs)
@@ -1,31 +1,120 @@
 import logging
-import pickle
-from functools import wraps
+import uuid
 from hashlib import sha256
-from typing import Any, Callable, Optional
+from typing import Any, Mapping, Optional, Sequence
 
+import orjson
 from redis.asyncio import Redis
 
 from db.casher import AbstractCache
+from db.codecs import OrjsonCodec, VersionedSerializer
+from db.model_tags import encode_default
 
 logger = logging.getLogger(__name__)
 
+# удаляет ключ блокировки, только если он не был перехвачен другим
+# владельцем после истечения срока блокировки
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
 
-class RedisCache(AbstractCache):
+# удаляет записи всех тегов и сами множества тегов одной операцией,
+# чтобы запись, добавленная в тег во время инвалидации, не потерялась,
+# и увеличивает версии тегов;
+# KEYS: множества тегов, затем версии тегов в том же порядке
+INVALIDATE_TAGS_SCRIPT = """
+local deleted = {}
+local count = #KEYS / 2
+for i = 1, count do
+    local members = redis.call("SMEMBERS", KEYS[i])
+    for _, key in ipairs(members) do
+        if redis.call("DEL", key) == 1 then
+            table.insert(deleted, key)
+        end
+    end
+    redis.call("DEL", KEYS[i])
+    redis.call("INCR", KEYS[count + i])
+end
+return deleted
+"""
+
+# записывает значение и добавляет ключ в множества тегов; если
+# переданы версии тегов, прочитанные до вычисления значения, и тег
+# с тех пор сброшен, значение устарело и не записывается;
+# KEYS: ключ, множества тегов, версии тегов;
+# ARGV: значение, TTL (0 - без TTL), ожидаемые версии тегов
+SET_TAGGED_SCRIPT = """
+local count = (#KEYS - 1) / 2
+for i = 1, #ARGV - 2 do
+    local version = redis.call("GET", KEYS[1 + count + i]) or "0"
+    if tonumber(version) ~= tonumber(ARGV[2 + i]) then
+        return 0
+    end
+end
+local ttl = tonumber(ARGV[2])
+if ttl > 0 then
+    redis.call("SET", KEYS[1], ARGV[1], "EX", ttl)
+else
+    redis.call("SET", KEYS[1], ARGV[1])
+end
+for i = 1, count do
+    local tag = KEYS[1 + i]
+    redis.call("SADD", tag, KEYS[1])
+    if ttl > 0 then
+        -- множество тега живет не меньше своих записей
+        redis.call("EXPIRE", tag, ttl, "NX")
+        redis.call("EXPIRE", tag, ttl, "GT")
+    else
+        redis.call("PERSIST", tag)
+    end
+end
+return 1
+"""
+
+
+class RedisCache(AbstractCache):  # noqa: WPS214
     """Реализация кэша с помощью Redis"""
 
-    def __init__(self, cache_type: Redis) -> None:
+    def __init__(
+            self,
+            cache_type: Redis,
+            serializer: Optional[VersionedSerializer] = None
+    ) -> None:
         self.cacher = cache_type
+        self.serializer = serializer or VersionedSerializer(OrjsonCodec())
+        self._release_lock = cache_type.register_script(RELEASE_LOCK_SCRIPT)
+        self._invalidate_tags = cache_type.register_script(
+            INVALIDATE_TAGS_SCRIPT
+        )
+        self._set_tagged_script = cache_type.register_script(
+            SET_TAGGED_SCRIPT
+        )
 
-    async def set(
+    async def set(  # noqa: WPS211
             self,
             key: str,
             value: Any,
             expire: Optional[int] = None,
-            raise_exc: bool = False
+            raise_exc: bool = False,
+            tags: Sequence[str] = (),
+            tag_versions: Optional[Sequence[int]] = None
     ) -> None:
+        """
+        Записывает значение. Если переданы tag_versions (версии tags,
+        прочитанные tag_versions до вычисления значения), значение не
+        записывается, когда какой-то из тегов с тех пор сброшен.
+        """
         try:
-            await self.cacher.set(key, pickle.dumps(value), ex=expire)
+            payload = self.serializer.dumps(value)
+            if tags:
+                await self._set_tagged(
+                    key, payload, expire, tags, tag_versions
+                )
+            else:
+                await self.cacher.set(key, payload, ex=expire)
             logger.debug("Result stored in cache")
         except Exception as ex:
             logger.error("Error storing to cache: %s", ex)
@@ -35,7 +124,9 @@ class RedisCache(AbstractCache):
     async def get(self, key: str, raise_exc: bool = False) -> Optional[Any]:
         try:
             cache_value = await self.cacher.get(key)
-            return pickle.loads(cache_value) if cache_value else None
+            if not cache_value:
+                return None
+            return self.serializer.loads(cache_value)
         except Exception as ex:
             logger.error("Error retrieving from cache: %s", ex)
             if raise_exc is True:
@@ -48,59 +139,250 @@ class RedisCache(AbstractCache):
             amount: int = 1
     ) -> int:
         try:
-            v = await self.cacher.incr(key, amount)
+            value = await self.cacher.incr(key, amount)
             logger.debug("Result stored in cache")
-            return v
+            return value
         except Exception as ex:
             logger.error("Error storing to cache: %s", ex)
             raise ex
 
+    async def get_many(  # noqa: WPS615
+            self,
+            keys: Sequence[str],
+            raise_exc: bool = False
+    ) -> list[Optional[Any]]:
+        """
+        Читает несколько ключей одним MGET.
 
-redis: Optional[Redis] = None
+        Returns:
+            list: Значения в порядке keys, None для отсутствующих.
+        """
+        if not keys:
+            return []
+        try:
+            cache_values = await self.cacher.mget(keys)
+        except Exception as ex:
+            logger.error("Error retrieving from cache: %s", ex)
+            if raise_exc is True:
+                raise ex
+            return [None for _ in keys]
+        # значение, которое не удалось прочитать, - промах только своего ключа
+        return [
+            self._loads(key, value, raise_exc)
+            for key, value in zip(keys, cache_values)
+        ]
 
+    async def set_many(  # noqa: WPS615
+            self,
+            mapping: Mapping[str, Any],
+            expire: Optional[int] = None,
+            raise_exc: bool = False
+    ) -> None:
+        """
+        Записывает несколько ключей за один проход по сети.
+        """
+        if not mapping:
+            return
+        try:
+            payloads = {
+                key: self.serializer.dumps(value)
+                for key, value in mapping.items()
+            }
+            if expire is None:
+                await self.cacher.mset(payloads)
+            else:
+                await self._set_many_expiring(payloads, expire)
+            logger.debug("Result stored in cache")
+        except Exception as ex:
+            logger.error("Error storing to cache: %s", ex)
+            if raise_exc is True:
+                raise ex
 
-async def get_redis() -> Redis | None:
-    return redis
+    async def delete_many(
+            self,
+            keys: Sequence[str],
+            raise_exc: bool = False
+    ) -> int:
+        """
+        Удаляет несколько ключей одной командой.
 
+        Returns:
+            int: Количество удаленных ключей.
+        """
+        if not keys:
+            return 0
+        try:
+            return await self.cacher.delete(*keys)
+        except Exception as ex:
+            logger.error("Error deleting from cache: %s", ex)
+            if raise_exc is True:
+                raise ex
+            return 0
 
-def form_key(*args, **kwargs) -> str:
-    return sha256(pickle.dumps((args, kwargs))).hexdigest()
+    async def incr_many(self, amounts: Mapping[str, int]) -> list[int]:
+        """
+        Увеличивает несколько счетчиков за один проход по сети.
 
+        Returns:
+            list[int]: Новые значения в порядке amounts.
+        """
+        if not amounts:
+            return []
+        try:
+            async with self.cacher.pipeline(transaction=False) as pipe:
+                for key, amount in amounts.items():
+                    pipe.incr(key, amount)
+                values = await pipe.execute()
+            logger.debug("Result stored in cache")
+            return values
+        except Exception as ex:
+            logger.error("Error storing to cache: %s", ex)
+            raise ex
 
-def cache_method(cache_attr: str, expire: int = 1800):
-    """
-    cache_method is a decorator that caches the result
-    of an asynchronous method in a store.
+    async def acquire_lock(self, key: str, expire: float) -> Optional[str]:
+        """
+        Захватывает распределенную блокировку на expire секунд.
 
-    Parameters:
-    - cache_attr (str): The attribute name for the instance
-                        of store in the class.
-    - expire (int): The cache expiration time in seconds.
-                    Defaults to 1800 seconds (30 minutes).
+        Returns:
+            str | None: Токен владельца для release_lock или None,
+            если блокировка занята. При недоступности Redis блокировка
+            считается захваченной, чтобы не останавливать работу.
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.cacher.set(
+                key, token, px=max(int(expire * 1000), 1), nx=True
+            )
+            return token if acquired else None
+        except Exception as ex:
+            logger.error("Error acquiring cache lock: %s", ex)
+            return token
+
+    async def release_lock(self, key: str, token: str) -> None:
+        """
+        Снимает блокировку, только если ею владеет token.
+        """
+        try:
+            await self._release_lock(keys=[key], args=[token])
+        except Exception as ex:
+            logger.error("Error releasing cache lock: %s", ex)
+
+    async def invalidate_tags(self, *tags: str) -> list[str]:
+        """
+        Атомарно удаляет все записи, помеченные любым из тегов.
+
+        Returns:
+            list[str]: Удаленные ключи.
+        """
+        if not tags:
+            return []
+        try:
+            keys = await self._invalidate_tags(
+                keys=[
+                    *map(form_tag_key, tags),
+                    *map(form_tag_version_key, tags),
+                ]
+            )
+            logger.debug("Cache tags invalidated: %s", tags)
+            return [
+                key.decode() if isinstance(key, bytes) else key
+                for key in keys
+            ]
+        except Exception as ex:
+            logger.error("Error invalidating cache tags: %s", ex)
+            return []
+
+    async def tag_versions(self, *tags: str) -> Optional[list[int]]:
+        """
+        Текущие версии тегов: invalidate_tags увеличивает версию
+        каждого сброшенного тега.
+
+        Returns:
+            list[int] | None: Версии в порядке tags, None при ошибке.
+        """
+        try:
+            versions = await self.cacher.mget(
+                [form_tag_version_key(tag) for tag in tags]
+            )
+        except Exception as ex:
+            logger.error("Error reading cache tag versions: %s", ex)
+            return None
+        return [int(version or 0) for version in versions]
+
+    def _loads(
+            self,
+            key: str,
+            cache_value: Optional[bytes],
+            raise_exc: bool
+    ) -> Optional[Any]:
+        if not cache_value:
+            return None
+        try:
+            return self.serializer.loads(cache_value)
+        except Exception as ex:
+            logger.error("Error decoding cache value of %s: %s", key, ex)
+            if raise_exc is True:
+                raise ex
+            return None
 
-    Raises:
-    - ValueError: If the cacher instance is not set.
-    """
+    async def _set_many_expiring(
+            self,
+            payloads: Mapping[str, bytes],
+            expire: int
+    ) -> None:
+        # MSET не задает TTL, поэтому ключи пишутся конвейером SET EX
+        async with self.cacher.pipeline(transaction=False) as pipe:
+            for key, payload in payloads.items():
+                pipe.set(key, payload, ex=expire)
+            await pipe.execute()
 
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(self, *args, **kwargs):
-            cache = getattr(self, cache_attr, None)
+    async def _set_tagged(
+            self,
+            key: str,
+            payload: bytes,
+            expire: Optional[int],
+            tags: Sequence[str],
+            tag_versions: Optional[Sequence[int]]
+    ) -> None:
+        stored = await self._set_tagged_script(
+            keys=[
+                key,
+                *map(form_tag_key, tags),
+                *map(form_tag_version_key, tags),
+            ],
+            args=[payload, expire or 0, *(tag_versions or ())],
+        )
+        if not stored:
+            logger.debug("Cache tags of %s were invalidated, skipped", key)
 
-            if cache is None:
-                raise ValueError("Cache instance is not set")
 
-            key = form_key(func.__name__, args, kwargs)
+redis: Optional[Redis] = None
 
-            cache_result = await cache.get(key)
-            if cache_result is not None:
-                logger.debug("Response from cache")
-                return cache_result
 
-            result = await func(self, *args, **kwargs)
-            await cache.set(key, result, expire)
-            return result
+async def get_redis() -> Redis | None:
+    return redis
+
+
+def form_tag_key(tag: str) -> str:
+    return f"UGC_service:cache:tag:{tag.lower()}"
+
 
-        return wrapper
+def form_tag_version_key(tag: str) -> str:
+    return f"UGC_service:cache:tag_version:{tag.lower()}"
 
-    return decorator
+
+def _key_default(obj: Any) -> Any:
+    try:
+        return encode_default(obj)
+    except TypeError:
+        return repr(obj)
+
+
+def form_key(*args, **kwargs) -> str:
+    return sha256(
+        orjson.dumps(
+            (args, kwargs),
+            default=_key_default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+    ).hexdigest()
@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# резервирует блок номеров и регистрирует нижнюю границу процесса;
+# KEYS: счетчик, нижние границы, аренды; ARGV: размер блока,
+# процесс, нижняя граница незавершенных вставок (или ""), TTL аренды
+ALLOCATE_SCRIPT = """
+local hi = redis.call('INCRBY', KEYS[1], ARGV[1])
+local low = hi - tonumber(ARGV[1]) + 1
+if ARGV[3] ~= '' then
+    low = math.min(low, tonumber(ARGV[3]))
+end
+local now = redis.call('TIME')
+local deadline = now[1] * 1000 + math.floor(now[2] / 1000) + ARGV[4]
+redis.call('ZADD', KEYS[2], low, ARGV[2])
+redis.call('ZADD', KEYS[3], deadline, ARGV[2])
+return hi
+"""
+
+# обновляет нижнюю границу процесса и продлевает аренду;
+# KEYS: нижние границы, аренды; ARGV: процесс, граница, TTL аренды
+REPORT_SCRIPT = """
+local now = redis.call('TIME')
+local deadline = now[1] * 1000 + math.floor(now[2] / 1000) + ARGV[3]
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('ZADD', KEYS[2], deadline, ARGV[1])
+return 1
+"""
+
+# наибольший номер, ниже которого не осталось незавершенных вставок;
+# KEYS: счетчик, нижние границы, аренды
+WATERMARK_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = now[1] * 1000 + math.floor(now[2] / 1000)
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now_ms)
+for _, member in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], member)
+    redis.call('ZREM', KEYS[3], member)
+end
+local counter = tonumber(redis.call('GET', KEYS[1]) or '0')
+local low = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+if low[2] then
+    return math.min(counter, tonumber(low[2]) - 1)
+end
+return counter
+"""
+
+
+def low_marks_key(key: str) -> str:
+    return f"{key}:low"
+
+
+def leases_key(key: str) -> str:
+    return f"{key}:lease"
+
+
+class _Block:
+    """
+    Состояние последовательности в процессе: текущий блок номеров
+    и выданные, но еще не записанные диапазоны.
+    """
+
+    def __init__(self) -> None:
+        self.next = 1
+        self.hi = 0
+        self.registered = False
+        self.used_at: float = 0
+        self.lock = asyncio.Lock()
+        # начало диапазона -> (конец диапазона, время выдачи)
+        self.inflight: dict[int, tuple[int, float]] = {}
+
+    @property
+    def remaining(self) -> int:
+        return self.hi - self.next + 1
+
+    @property
+    def low_mark(self) -> int:
+        """
+        Наименьший номер, который процесс еще может записать.
+        """
+        return min(self.inflight, default=self.next)
+
+
+class SequenceAllocator:  # noqa: WPS214
+    """
+    Выдача номеров monotonic_seq блоками (hi/lo).
+
+    Процесс резервирует в Redis блок из block_size номеров одной
+    командой INCRBY и раздает их локально, поэтому вставка обходится
+    без запроса в Redis. Диапазон для пакетной вставки выдается
+    целиком одним вызовом allocate.
+
+    Номера разных процессов больше не совпадают с порядком записи:
+    вставка из старого блока может завершиться после вставки из
+    нового. Поэтому каждый процесс публикует нижнюю границу номеров,
+    которые он еще может записать (наименьший незавершенный диапазон
+    или следующий номер блока), а читатели продвигаются только до
+    read_watermark - номера, ниже которого записей больше не будет.
+
+    Граница публикуется при резервировании блока и затем раз в
+    report_interval секунд; так как она со временем только растет,
+    устаревшее значение лишь задерживает читателей. Процесс без
+    незавершенных вставок, простоявший report_interval, отказывается
+    от остатка блока, чтобы не держать границу. Граница процесса,
+    который не продлевал ее lease_ttl секунд, не учитывается, как
+    и незавершенные диапазоны старше lease_ttl (вставка не удалась).
+
+    Attributes:
+        redis (Redis): Клиент Redis.
+        block_size (int): Количество номеров в одном блоке.
+        report_interval (float): Период публикации нижних границ.
+        lease_ttl (float): Время жизни опубликованной границы.
+        process_id (str): Идентификатор процесса в Redis.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        block_size: int = 100,
+        report_interval: float = 0.5,
+        lease_ttl: float = 10.0,
+        process_id: Optional[str] = None,
+    ) -> None:
+        self.redis = redis
+        self.block_size = block_size
+        self.report_interval = report_interval
+        self.lease_ttl = lease_ttl
+        self.process_id = process_id or ":".join(
+            (socket.gethostname(), str(os.getpid()), uuid.uuid4().hex[:8])
+        )
+
+        self._blocks: dict[str, _Block] = {}
+        self._allocate = redis.register_script(ALLOCATE_SCRIPT)
+        self._report = redis.register_script(REPORT_SCRIPT)
+        self._task: Optional[asyncio.Task] = None
+
+    async def allocate(self, key: str, count: int = 1) -> range:
+        """
+        Выдает count последовательных номеров счетчика key.
+
+        Выданный диапазон считается незавершенным, пока не передан
+        в release.
+        """
+        block = self._block(key)
+        async with block.lock:
+            if count > block.remaining:
+                size = max(count, self.block_size)
+                pending = min(block.inflight, default="")
+                hi = await self._allocate(
+                    keys=[key, low_marks_key(key), leases_key(key)],
+                    args=[
+                        size,
+                        self.process_id,
+                        pending,
+                        int(self.lease_ttl * 1000),
+                    ],
+                )
+                # остаток прежнего блока пропускается
+                block.next = hi - size + 1
+                block.hi = hi
+                block.registered = True
+
+            seqs = range(block.next, block.next + count)
+            block.next += count
+            block.used_at = time.monotonic()
+            block.inflight[seqs.start] = (seqs.stop, block.used_at)
+            return seqs
+
+    def release(self, key: str, seqs: range) -> None:
+        """
+        Отмечает диапазон записанным (или не записанным вовсе).
+        """
+        block = self._blocks.get(key)
+        if block is not None:
+            block.inflight.pop(seqs.start, None)
+
+    async def report(self) -> None:
+        """
+        Публикует нижние границы всех последовательностей процесса.
+        """
+        for key, block in list(self._blocks.items()):
+            async with block.lock:
+                if not block.registered:
+                    continue
+                self._expire_inflight(key, block)
+                idle = time.monotonic() - block.used_at
+                if not block.inflight and idle >= self.report_interval:
+                    await self._unregister(key)
+                    block.next = block.hi + 1
+                    block.registered = False
+                    continue
+                await self._report(
+                    keys=[low_marks_key(key), leases_key(key)],
+                    args=[
+                        self.process_id,
+                        block.low_mark,
+                        int(self.lease_ttl * 1000),
+                    ],
+                )
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            try:
+                await self.report()
+            except Exception as ex:
+                logger.error("Error reporting sequence low marks: %s", ex)
+
+    def start(self) -> None:
+        """
+        Запускает фоновую публикацию нижних границ.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает публикацию и снимает границы процесса.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for key, block in list(self._blocks.items()):
+            if block.registered:
+                try:
+                    await self._unregister(key)
+                except Exception as ex:
+                    logger.error("Error releasing sequence block: %s", ex)
+                block.registered = False
+
+    def _block(self, key: str) -> _Block:
+        block = self._blocks.get(key)
+        if block is None:
+            block = _Block()
+            self._blocks[key] = block
+        return block
+
+    def _expire_inflight(self, key: str, block: _Block) -> None:
+        deadline = time.monotonic() - self.lease_ttl
+        for start, (stop, issued_at) in list(block.inflight.items()):
+            if issued_at < deadline:
+                logger.warning(
+                    "Sequence range %s-%s of %s was never released",
+                    start,
+                    stop - 1,
+                    key,
+                )
+                del block.inflight[start]
+
+    async def _unregister(self, key: str) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(low_marks_key(key), self.process_id)
+            pipe.zrem(leases_key(key), self.process_id)
+            await pipe.execute()
+
+
+class SequenceWatermark:
+    """
+    Чтение границы записанных номеров счетчика key: все номера
+    не больше нее либо уже записаны, либо не будут записаны никогда.
+    """
+
+    def __init__(self, redis: Redis, key: str) -> None:
+        self.key = key
+        self._script = redis.register_script(WATERMARK_SCRIPT)
+
+    async def __call__(self) -> int:
+        return await self._script(
+            keys=[self.key, low_marks_key(self.key), leases_key(self.key)]
+        )
+
+
+allocator: Optional[SequenceAllocator] = None
+
+
+async def get_sequence_allocator() -> SequenceAllocator | None:
+    return allocator
@@ -19,13 +19,13 @@ _runtime_version.ValidateProtobufRuntimeVersion(
 _sym_db = _symbol_database.Default()
 
 
-from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 from google.protobuf import (
     timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2,
 )
 
+
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\x10\x61\x63tivities.proto\x12\nactivities\x1a\x1fgoogle/protobuf/timestamp.proto\x1a\x1bgoogle/protobuf/empty.proto"\x1d\n\tUsersList\x12\x10\n\x08user_ids\x18\x01 \x03(\t"\x8c\x02\n\x08\x41\x63tivity\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\t\x12/\n\ractivity_type\x18\x03 \x01(\x0e\x32\x18.activities.ActivityType\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12$\n\x06rating\x18\x05 \x01(\x0b\x32\x12.activities.RatingH\x00\x12$\n\x06review\x18\x06 \x01(\x0b\x32\x12.activities.ReviewH\x00\x12(\n\x08\x62ookmark\x18\x07 \x01(\x0b\x32\x14.activities.BookmarkH\x00\x42\x0c\n\nevent_data")\n\x06Rating\x12\x0f\n\x07\x66ilm_id\x18\x01 \x01(\t\x12\x0e\n\x06rating\x18\x02 \x01(\x05".\n\x06Review\x12\x0f\n\x07\x66ilm_id\x18\x01 \x01(\t\x12\x13\n\x0breview_text\x18\x02 \x01(\t"\x1b\n\x08\x42ookmark\x12\x0f\n\x07\x66ilm_id\x18\x01 \x01(\t*^\n\x0c\x41\x63tivityType\x12\x18\n\x14\x41\x43TIVITY_TYPE_RATING\x10\x00\x12\x1a\n\x16\x41\x43TIVITY_TYPE_BOOKMARK\x10\x01\x12\x18\n\x14\x41\x43TIVITY_TYPE_REVIEW\x10\x02\x32\x9d\x01\n\x11\x41\x63tivitiesService\x12>\n\rGetActivities\x12\x15.activities.UsersList\x1a\x14.activities.Activity0\x01\x12H\n\x16ReceiveActivityUpdates\x12\x16.google.protobuf.Empty\x1a\x14.activities.Activity0\x01\x62\x06proto3'
+    b'\n\x10\x61\x63tivities.proto\x12\nactivities\x1a\x1fgoogle/protobuf/timestamp.proto"\x1d\n\tUsersList\x12\x10\n\x08user_ids\x18\x01 \x03(\t"N\n\x0eStreamPosition\x12/\n\ractivity_type\x18\x01 \x01(\x0e\x32\x18.activities.ActivityType\x12\x0b\n\x03seq\x18\x02 \x01(\x03"\x8a\x01\n\x16\x41\x63tivityUpdatesRequest\x12\x13\n\x0b\x63onsumer_id\x18\x01 \x01(\t\x12/\n\x0bresume_from\x18\x02 \x03(\x0b\x32\x1a.activities.StreamPosition\x12*\n\x06\x66ilter\x18\x03 \x01(\x0b\x32\x1a.activities.ActivityFilter"\x91\x01\n\x0e\x41\x63tivityFilter\x12\x30\n\x0e\x61\x63tivity_types\x18\x01 \x03(\x0e\x32\x18.activities.ActivityType\x12\x10\n\x08user_ids\x18\x02 \x03(\t\x12\x10\n\x08\x66ilm_ids\x18\x03 \x03(\t\x12)\n\x05since\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp"\xb9\x02\n\x08\x41\x63tivity\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\t\x12/\n\ractivity_type\x18\x03 \x01(\x0e\x32\x18.activities.ActivityType\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12$\n\x06rating\x18\x05 \x01(\x0b\x32\x12.activities.RatingH\x00\x12$\n\x06review\x18\x06 \x01(\x0b\x32\x12.activities.ReviewH\x00\x12(\n\x08\x62ookmark\x18\x07 \x01(\x0b\x32\x14.activities.BookmarkH\x00\x12\x1e\n\x03gap\x18\t \x01(\x0b\x32\x0f.activities.GapH\x00\x12\x0b\n\x03seq\x18\x08 \x01(\x03\x42\x0c\n\nevent_data"9\n\rActivityBatch\x12(\n\nactivities\x18\x01 \x03(\x0b\x32\x14.activities.Activity")\n\x06Rating\x12\x0f\n\x07\x66ilm_id\x18\x01 \x01(\t\x12\x0e\n\x06rating\x18\x02 \x01(\x05".\n\x06Review\x12\x0f\n\x07\x66ilm_id\x18\x01 \x01(\t\x12\x13\n\x0breview_text\x18\x02 \x01(\t"\x16\n\x03Gap\x12\x0f\n\x07\x64ropped\x18\x01 \x01(\x03"\x1b\n\x08\x42ookmark\x12\x0f\n\x07\x66ilm_id\x18\x01 \x01(\t*^\n\x0c\x41\x63tivityType\x12\x18\n\x14\x41\x43TIVITY_TYPE_RATING\x10\x00\x12\x1a\n\x16\x41\x43TIVITY_TYPE_BOOKMARK\x10\x01\x12\x18\n\x14\x41\x43TIVITY_TYPE_REVIEW\x10\x02\x32\xd7\x02\n\x11\x41\x63tivitiesService\x12>\n\rGetActivities\x12\x15.activities.UsersList\x1a\x14.activities.Activity0\x01\x12T\n\x16ReceiveActivityUpdates\x12".activities.ActivityUpdatesRequest\x1a\x14.activities.Activity0\x01\x12J\n\x14GetActivitiesBatched\x12\x15.activities.UsersList\x1a\x19.activities.ActivityBatch0\x01\x12`\n\x1dReceiveActivityUpdatesBatched\x12".activities.ActivityUpdatesRequest\x1a\x19.activities.ActivityBatch0\x01\x62\x06proto3'
 )
 
 _globals = globals()
@@ -33,18 +33,28 @@ _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, "activities_pb2", _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
     DESCRIPTOR._loaded_options = None
-    _globals["_ACTIVITYTYPE"]._serialized_start = 516
-    _globals["_ACTIVITYTYPE"]._serialized_end = 610
-    _globals["_USERSLIST"]._serialized_start = 94
-    _globals["_USERSLIST"]._serialized_end = 123
-    _globals["_ACTIVITY"]._serialized_start = 126
-    _globals["_ACTIVITY"]._serialized_end = 394
-    _globals["_RATING"]._serialized_start = 396
-    _globals["_RATING"]._serialized_end = 437
-    _globals["_REVIEW"]._serialized_start = 439
-    _globals["_REVIEW"]._serialized_end = 485
-    _globals["_BOOKMARK"]._serialized_start = 487
-    _globals["_BOOKMARK"]._serialized_end = 514
-    _globals["_ACTIVITIESSERVICE"]._serialized_start = 613
-    _globals["_ACTIVITIESSERVICE"]._serialized_end = 770
+    _globals["_ACTIVITYTYPE"]._serialized_start = 984
+    _globals["_ACTIVITYTYPE"]._serialized_end = 1078
+    _globals["_USERSLIST"]._serialized_start = 65
+    _globals["_USERSLIST"]._serialized_end = 94
+    _globals["_STREAMPOSITION"]._serialized_start = 96
+    _globals["_STREAMPOSITION"]._serialized_end = 174
+    _globals["_ACTIVITYUPDATESREQUEST"]._serialized_start = 177
+    _globals["_ACTIVITYUPDATESREQUEST"]._serialized_end = 315
+    _globals["_ACTIVITYFILTER"]._serialized_start = 318
+    _globals["_ACTIVITYFILTER"]._serialized_end = 463
+    _globals["_ACTIVITY"]._serialized_start = 466
+    _globals["_ACTIVITY"]._serialized_end = 779
+    _globals["_ACTIVITYBATCH"]._serialized_start = 781
+    _globals["_ACTIVITYBATCH"]._serialized_end = 838
+    _globals["_RATING"]._serialized_start = 840
+    _globals["_RATING"]._serialized_end = 881
+    _globals["_REVIEW"]._serialized_start = 883
+    _globals["_REVIEW"]._serialized_end = 929
+    _globals["_GAP"]._serialized_start = 931
+    _globals["_GAP"]._serialized_end = 953
+    _globals["_BOOKMARK"]._serialized_start = 955
+    _globals["_BOOKMARK"]._serialized_end = 982
+    _globals["_ACTIVITIESSERVICE"]._serialized_start = 1081
+    _globals["_ACTIVITIESSERVICE"]._serialized_end = 1424
 # @@protoc_insertion_point(module_scope)
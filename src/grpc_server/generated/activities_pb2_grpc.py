@@ -5,9 +5,8 @@ import warnings
 
 import grpc_server.generated.activities_pb2 as activities__pb2
 import grpc
-from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 
-GRPC_GENERATED_VERSION = "1.70.0"
+GRPC_GENERATED_VERSION = "1.71.0"
 GRPC_VERSION = grpc.__version__
 _version_not_supported = False
 
@@ -49,10 +48,22 @@ class ActivitiesServiceStub(object):
         )
         self.ReceiveActivityUpdates = channel.unary_stream(
             "/activities.ActivitiesService/ReceiveActivityUpdates",
-            request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            request_serializer=activities__pb2.ActivityUpdatesRequest.SerializeToString,
             response_deserializer=activities__pb2.Activity.FromString,
             _registered_method=True,
         )
+        self.GetActivitiesBatched = channel.unary_stream(
+            "/activities.ActivitiesService/GetActivitiesBatched",
+            request_serializer=activities__pb2.UsersList.SerializeToString,
+            response_deserializer=activities__pb2.ActivityBatch.FromString,
+            _registered_method=True,
+        )
+        self.ReceiveActivityUpdatesBatched = channel.unary_stream(
+            "/activities.ActivitiesService/ReceiveActivityUpdatesBatched",
+            request_serializer=activities__pb2.ActivityUpdatesRequest.SerializeToString,
+            response_deserializer=activities__pb2.ActivityBatch.FromString,
+            _registered_method=True,
+        )
 
 
 class ActivitiesServiceServicer(object):
@@ -64,8 +75,23 @@ class ActivitiesServiceServicer(object):
         """
         Метод GetActivities принимает список пользователей и возвращает поток
         активностей каждого пользователя из списка.
-        Метод ReceiveActivityUpdates принимает пустое сообщение и возвращает поток
-        активностей.
+        Метод ReceiveActivityUpdates принимает идентификатор потребителя
+        и позиции возобновления и возвращает поток активностей, начиная
+        с последней доставленной этому потребителю. Запрос совместим
+        по формату с google.protobuf.Empty из прежней версии: пустой запрос
+        соответствует потребителю по умолчанию.
+        Если потребитель не успевает читать поток, в зависимости от настроек
+        сервера он получает Activity с полем gap вместо пропущенных событий
+        или поток завершается со статусом RESOURCE_EXHAUSTED и trailing
+        metadata resume-from ("<activity_type>:<seq>,...") для возобновления.
+        Методы с суффиксом Batched отдают те же активности пачками
+        ActivityBatch: пачка отправляется, когда набран ее максимальный
+        размер или первая активность в ней ожидает дольше настроенной
+        на сервере задержки. Порядок активностей тот же, что у методов
+        без пачек; позиция потребителя сдвигается после отправки пачки.
+        Поле filter запроса ограничивает поток на стороне сервера.
+        Позиция потребителя сдвигается только по отобранным активностям,
+        поэтому один consumer_id следует использовать с одним фильтром.
         """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details("Method not implemented!")
@@ -77,6 +103,18 @@ class ActivitiesServiceServicer(object):
         context.set_details("Method not implemented!")
         raise NotImplementedError("Method not implemented!")
 
+    def GetActivitiesBatched(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def ReceiveActivityUpdatesBatched(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
 
 def add_ActivitiesServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -87,9 +125,19 @@ def add_ActivitiesServiceServicer_to_server(servicer, server):
         ),
         "ReceiveActivityUpdates": grpc.unary_stream_rpc_method_handler(
             servicer.ReceiveActivityUpdates,
-            request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            request_deserializer=activities__pb2.ActivityUpdatesRequest.FromString,
             response_serializer=activities__pb2.Activity.SerializeToString,
         ),
+        "GetActivitiesBatched": grpc.unary_stream_rpc_method_handler(
+            servicer.GetActivitiesBatched,
+            request_deserializer=activities__pb2.UsersList.FromString,
+            response_serializer=activities__pb2.ActivityBatch.SerializeToString,
+        ),
+        "ReceiveActivityUpdatesBatched": grpc.unary_stream_rpc_method_handler(
+            servicer.ReceiveActivityUpdatesBatched,
+            request_deserializer=activities__pb2.ActivityUpdatesRequest.FromString,
+            response_serializer=activities__pb2.ActivityBatch.SerializeToString,
+        ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
         "activities.ActivitiesService", rpc_method_handlers
@@ -153,7 +201,7 @@ class ActivitiesService(object):
             request,
             target,
             "/activities.ActivitiesService/ReceiveActivityUpdates",
-            google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            activities__pb2.ActivityUpdatesRequest.SerializeToString,
             activities__pb2.Activity.FromString,
             options,
             channel_credentials,
@@ -165,3 +213,63 @@ class ActivitiesService(object):
             metadata,
             _registered_method=True,
         )
+
+    @staticmethod
+    def GetActivitiesBatched(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            "/activities.ActivitiesService/GetActivitiesBatched",
+            activities__pb2.UsersList.SerializeToString,
+            activities__pb2.ActivityBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
+
+    @staticmethod
+    def ReceiveActivityUpdatesBatched(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            "/activities.ActivitiesService/ReceiveActivityUpdatesBatched",
+            activities__pb2.ActivityUpdatesRequest.SerializeToString,
+            activities__pb2.ActivityBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
@@ -1,80 +1,155 @@
-# type: ignore
 import asyncio
 import logging
 import os.path
+from contextlib import aclosing
 from datetime import datetime, timedelta
+from operator import itemgetter
 from pathlib import Path
-from typing import List
+from typing import Any, AsyncIterator, Callable, List, Optional
+from uuid import UUID
 
 import grpc
 from google.protobuf.timestamp_pb2 import Timestamp
-from google.protobuf.empty_pb2 import Empty
 from grpc_health.v1 import health_pb2, health_pb2_grpc
 
 import grpc_server.generated.activities_pb2 as pb2
 import grpc_server.generated.activities_pb2_grpc as pb2_grpc
+import services.activity_hub as hub
+from core.config import ActivitySourceMode, settings
+from db import redis
+from db.casher import AbstractCache, get_cacher
+from db.sequence import SequenceWatermark
 from grpc_server.utils.transformators import (
-    transform_film_score,
+    dt_to_pb_timestamp,
     transform_film_bookmark,
-    transform_film_review
+    transform_film_review,
+    transform_film_score,
+    transform_raw_film_bookmark,
+    transform_raw_film_review,
+    transform_raw_film_score,
 )
-from init_services import init_mongo, init_casher
+from init_services import init_casher, init_mongo, sequence_blocks_enabled
 from models.mongo_models import (
-    FilmScoreModel,
     FilmBookmarkModel,
-    FilmReviewModel
+    FilmReviewModel,
+    FilmScoreModel,
 )
+from models.projections import (
+    BookmarkActivityView,
+    ReviewActivityView,
+    ScoreActivityView,
+)
+from services.activity_filter import ActivityFilter
+from services.activity_hub import ActivityHub
+from services.activity_stream import ActivityStream, SlowConsumerError
 from services.bookmark_service import get_bookmark_service
+from services.change_stream_source import ChangeStreamSource
+from services.model_poller import ActivitySource, ModelPoller
 from services.review_service import get_review_service
-from services.model_poller import ModelPoller
 from services.score_service import get_film_score_service
+from services.stream_source import StreamSource
+from utils.batching import batched
+from utils.merge import merge
+from utils.prefetch import Prefetch
 
 logger = logging.getLogger(__name__)
 
 
-async def form_activities(user_id: str) -> List[pb2.Activity]:
-    bookmarks = await get_bookmark_service().get_bookmark_films_schema(user_id)
-    reviews = await get_review_service().get_user_reviews(user_id)
-    scores = await get_film_score_service().get_user_scores(user_id)
-
-    ret = []
-    # Обработка закладок
-    for bookmark in bookmarks:
-        ret.append(pb2.Activity(
-            id=bookmark.id,
-            user_id=user_id,
-            activity_type=pb2.ActivityType.ACTIVITY_TYPE_BOOKMARK,
-            created_at=bookmark.created_at,
-            bookmark=pb2.Bookmark(film_id=bookmark.film_id),
-        ))
-
-    # Обработка рецензий
-    for review in reviews:
-        ret.append(pb2.Activity(
-            id=review.id,
-            user_id=user_id,
-            activity_type=pb2.ActivityType.ACTIVITY_TYPE_REVIEW,
-            created_at=review.created_at,
-            review=pb2.Review(
-                film_id=review.film_id,
-                review_text=review.review_text,
-            )
-        ))
-
-    # Обработка оценок
-    for score in scores:
-        ret.append(pb2.Activity(
-            id=score.id,
-            user_id=user_id,
-            activity_type=pb2.ActivityType.ACTIVITY_TYPE_RATING,
-            created_at=score.created_at,
-            rating=pb2.Rating(
-                film_id=score.film_id,
-                rating=score.film_score,
+async def user_activities(
+    user_ids: List[UUID], batch_size: int
+) -> AsyncIterator[pb2.Activity]:
+    """
+    Активности группы пользователей по мере чтения курсоров MongoDB:
+    по пользователю, внутри пользователя в порядке created_at.
+    """
+
+    raw = settings.ACTIVITY_RAW_DOCUMENTS
+
+    def activities(docs, transformer, raw_transformer):
+        if raw:
+            return (
+                ((doc["user_id"], doc["created_at"]), raw_transformer(doc))
+                async for doc in docs
             )
-        ))
+        return (
+            ((doc.user_id, doc.created_at), transformer(doc))
+            async for doc in docs
+        )
 
-    return ret
+    async with aclosing(merge(
+        activities(
+            get_bookmark_service().iter_users_bookmarks(
+                user_ids, batch_size, raw
+            ),
+            transform_film_bookmark,
+            transform_raw_film_bookmark,
+        ),
+        activities(
+            get_review_service().iter_users_reviews(
+                user_ids, batch_size, raw
+            ),
+            transform_film_review,
+            transform_raw_film_review,
+        ),
+        activities(
+            get_film_score_service().iter_users_scores(
+                user_ids, batch_size, raw
+            ),
+            transform_film_score,
+            transform_raw_film_score,
+        ),
+        key=itemgetter(0),
+    )) as merged:
+        async for _, activ in merged:
+            yield activ
+
+
+def parse_activity_filter(request: pb2.ActivityFilter) -> ActivityFilter:
+    """
+    Фильтр потока из запроса (ValueError при неверных UUID).
+    """
+    since = None
+    if request.HasField("since"):
+        since = request.since.ToDatetime()
+    return ActivityFilter(
+        activity_types=frozenset(request.activity_types),
+        user_ids=frozenset(UUID(user_id) for user_id in request.user_ids),
+        film_ids=frozenset(UUID(film_id) for film_id in request.film_ids),
+        since=since,
+    )
+
+
+def activity_predicate(
+    activity_filter: ActivityFilter
+) -> Optional[Callable[[pb2.Activity], bool]]:
+    """
+    Отбор живых активностей по пользователям, фильмам и времени
+    (типы отбирает хаб).
+    """
+    user_ids = {str(user_id) for user_id in activity_filter.user_ids}
+    film_ids = {str(film_id) for film_id in activity_filter.film_ids}
+    since = (
+        None if activity_filter.since is None
+        else dt_to_pb_timestamp(activity_filter.since).ToNanoseconds()
+    )
+    if not user_ids and not film_ids and since is None:
+        return None
+
+    def matches(activ: pb2.Activity) -> bool:
+        if user_ids and activ.user_id not in user_ids:
+            return False
+        event = getattr(activ, activ.WhichOneof("event_data"))
+        if film_ids and event.film_id not in film_ids:
+            return False
+        return since is None or activ.created_at.ToNanoseconds() >= since
+
+    return matches
+
+
+def format_positions(positions: dict[int, int]) -> str:
+    return ",".join(
+        f"{activity_type}:{seq}" for activity_type, seq in positions.items()
+    )
 
 
 class HealthServicer(health_pb2_grpc.HealthServicer):
@@ -86,36 +161,138 @@ class HealthServicer(health_pb2_grpc.HealthServicer):
 
 
 class ActivitySender(pb2_grpc.ActivitiesServiceServicer):
-    async def ReceiveActivityUpdates(self, request: Empty, context):
-        """Асинхронно стримит активности."""
-        queue: asyncio.Queue = asyncio.Queue()
-
-        pollers = (
-            ModelPoller(FilmBookmarkModel, transform_film_bookmark),
-            ModelPoller(FilmReviewModel, transform_film_review),
-            ModelPoller(FilmScoreModel, transform_film_score),
-        )
+    async def ReceiveActivityUpdates(
+            self, request: pb2.ActivityUpdatesRequest, context
+    ):
+        """
+        Асинхронно стримит активности из общего для процесса хаба,
+        начиная с позиции потребителя request.consumer_id.
+        """
+        async with aclosing(
+            self._relay(request, context, lambda stream: stream.items())
+        ) as activs:
+            async for activ in activs:
+                yield activ
+
+    async def ReceiveActivityUpdatesBatched(
+            self, request: pb2.ActivityUpdatesRequest, context
+    ):
+        """
+        То же, что ReceiveActivityUpdates, но пачками ActivityBatch.
+        """
+        async with aclosing(
+            self._relay(
+                request,
+                context,
+                lambda stream: stream.batches(
+                    settings.ACTIVITY_BATCH_SIZE,
+                    settings.ACTIVITY_BATCH_LINGER,
+                ),
+            )
+        ) as batches:
+            async for batch in batches:
+                yield pb2.ActivityBatch(activities=batch)
 
-        tasks = [asyncio.create_task(poller.run(queue)) for poller in pollers]
+    async def GetActivities(self, request, context):
+        """
+        Стримит активности пользователей в порядке запроса.
 
+        Пользователи читаются группами по ACTIVITY_USERS_CHUNK, внутри
+        группы в порядке id, активности пользователя в порядке
+        created_at. Следующие группы открываются, пока отправляются
+        предыдущие.
+        """
         try:
-            while True:
-                activ = await queue.get()
+            user_ids = [UUID(user_id) for user_id in request.user_ids]
+        except ValueError:
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, "invalid user id"
+            )
+
+        size = settings.ACTIVITY_USERS_CHUNK
+        chunks = [
+            list(dict.fromkeys(user_ids[start:start + size]))
+            for start in range(0, len(user_ids), size)
+        ]
+        prefetch = Prefetch(
+            lambda index: user_activities(
+                chunks[index], settings.ACTIVITY_CURSOR_BATCH_SIZE
+            ),
+            len(chunks),
+            settings.ACTIVITY_QUERY_CONCURRENCY,
+        )
+        async with prefetch, aclosing(prefetch.items()) as activs:
+            async for activ in activs:
                 yield activ
-        except asyncio.CancelledError as e:
+
+    async def GetActivitiesBatched(self, request, context):
+        """
+        То же, что GetActivities, но пачками ActivityBatch.
+        """
+        async with aclosing(
+            batched(
+                self.GetActivities(request, context),
+                settings.ACTIVITY_BATCH_SIZE,
+                settings.ACTIVITY_BATCH_LINGER,
+            )
+        ) as batches:
+            async for batch in batches:
+                yield pb2.ActivityBatch(activities=batch)
+
+    async def _relay(
+            self, request: pb2.ActivityUpdatesRequest, context, open_messages
+    ):
+        try:
+            activity_filter = parse_activity_filter(request.filter)
+        except ValueError:
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, "invalid activity filter"
+            )
+
+        activity_hub = await hub.get_activity_hub()
+        cacher = await get_cacher()
+        if activity_hub is None or cacher is None:
+            raise RuntimeError("Activity hub is not initialized")
+
+        stream = ActivityStream(
+            hub=activity_hub,
+            cacher=cacher,
+            consumer_id=request.consumer_id,
+            resume_from={
+                position.activity_type: position.seq
+                for position in request.resume_from
+            },
+            commit_batch=settings.ACTIVITY_CHECKPOINT_BATCH,
+            commit_interval=settings.ACTIVITY_CHECKPOINT_INTERVAL,
+            gap_factory=lambda dropped: pb2.Activity(
+                gap=pb2.Gap(dropped=dropped)
+            ),
+            activity_filter=activity_filter,
+            predicate=activity_predicate(activity_filter),
+        )
+
+        try:
+            async with aclosing(open_messages(stream)) as messages:
+                async for message in messages:
+                    yield message
+        except SlowConsumerError as ex:
+            logger.warning(
+                "Activity consumer %r is too slow, disconnecting",
+                request.consumer_id,
+            )
+            context.set_trailing_metadata(
+                (("resume-from", format_positions(ex.positions)),)
+            )
+            await context.abort(
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                "consumer is too slow, reconnect with resume_from",
+            )
+        except asyncio.CancelledError as ex:
             logger.info("ReceiveActivityUpdates cancelled")
-            raise e
+            raise ex
         finally:
-            for t in tasks:
-                t.cancel()
-            await asyncio.gather(*tasks, return_exceptions=True)
-            logger.info("All poll tasks stopped.")
-
-    async def GetActivities(self, request, context):
-        for user_id in request.user_ids:
-            activs = await form_activities(user_id)
-            for activ in activs:
-                yield activ
+            await stream.close()
+            logger.info("Activity consumer %r detached.", request.consumer_id)
 
 
 def init_server_creds() -> grpc.ServerCredentials:
@@ -161,9 +338,81 @@ async def serve():
     await server.wait_for_termination()
 
 
+def live_sources(
+    pollers: dict[Any, ModelPoller], cacher: AbstractCache
+) -> dict[Any, ActivitySource]:
+    """
+    Живые источники активностей поверх опросов моделей
+    по настройке ACTIVITY_SOURCE.
+    """
+    if settings.ACTIVITY_SOURCE == ActivitySourceMode.STREAM:
+        redis_client = redis.redis
+        if redis_client is None:
+            raise RuntimeError("Redis is not initialized")
+        return {
+            activity_type: StreamSource(
+                poller, redis_client, settings.ACTIVITY_STREAM_BLOCK_MS
+            )
+            for activity_type, poller in pollers.items()
+        }
+    if settings.ACTIVITY_SOURCE == ActivitySourceMode.CHANGE_STREAM:
+        return {
+            activity_type: ChangeStreamSource(
+                poller, cacher, settings.ACTIVITY_CHECKPOINT_INTERVAL
+            )
+            for activity_type, poller in pollers.items()
+        }
+    return dict(pollers)
+
+
+def create_activity_hub(cacher: AbstractCache) -> ActivityHub:
+    interval = settings.ACTIVITY_POLL_INTERVAL
+
+    def watermark(model_class) -> Optional[SequenceWatermark]:
+        # номера выдаются блоками, опрос не обгоняет незавершенные вставки
+        if redis.redis is None or not sequence_blocks_enabled():
+            return None
+        return SequenceWatermark(redis.redis, model_class.get_redis_key())
+
+    raw = settings.ACTIVITY_RAW_DOCUMENTS
+    pollers = {
+        pb2.ACTIVITY_TYPE_BOOKMARK: ModelPoller(
+            FilmBookmarkModel,
+            transform_film_bookmark,
+            interval,
+            projection_model=BookmarkActivityView,
+            raw_transformer=transform_raw_film_bookmark if raw else None,
+            watermark=watermark(FilmBookmarkModel),
+        ),
+        pb2.ACTIVITY_TYPE_REVIEW: ModelPoller(
+            FilmReviewModel,
+            transform_film_review,
+            interval,
+            projection_model=ReviewActivityView,
+            raw_transformer=transform_raw_film_review if raw else None,
+            watermark=watermark(FilmReviewModel),
+        ),
+        pb2.ACTIVITY_TYPE_RATING: ModelPoller(
+            FilmScoreModel,
+            transform_film_score,
+            interval,
+            projection_model=ScoreActivityView,
+            raw_transformer=transform_raw_film_score if raw else None,
+            watermark=watermark(FilmScoreModel),
+        ),
+    }
+    return ActivityHub(
+        live_sources(pollers, cacher),
+        buffer_size=settings.ACTIVITY_BUFFER_SIZE,
+        policy=settings.ACTIVITY_SLOW_CONSUMER_POLICY,
+        metrics_interval=settings.ACTIVITY_METRICS_INTERVAL,
+    )
+
+
 async def main():
     await init_mongo()
     await init_casher()
+    hub.activity_hub = create_activity_hub(await get_cacher())
     server_task = asyncio.create_task(serve())
     await server_task
 
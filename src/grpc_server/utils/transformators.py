@@ -1,5 +1,5 @@
-# type: ignore
 from datetime import datetime
+from typing import Any, Mapping
 
 from google.protobuf.timestamp_pb2 import Timestamp
 
@@ -11,18 +11,33 @@ from models.mongo_models import (
 )
 
 
+# даты из MongoDB приходят без часового пояса, в UTC
+EPOCH = datetime(1970, 1, 1)
+
+
 def dt_to_pb_timestamp(dt: datetime) -> Timestamp:
     ts = Timestamp()
     ts.FromDatetime(dt)
     return ts
 
 
+def bson_dt_to_pb_timestamp(dt: datetime) -> Timestamp:
+    if dt.tzinfo is not None:
+        return dt_to_pb_timestamp(dt)
+    delta = dt - EPOCH
+    return Timestamp(
+        seconds=delta.days * 86400 + delta.seconds,
+        nanos=delta.microseconds * 1000,
+    )
+
+
 def transform_film_score(doc: FilmScoreModel) -> pb2.Activity:
     return pb2.Activity(
         id=str(doc.id),
         user_id=str(doc.user_id),
         activity_type=pb2.ACTIVITY_TYPE_RATING,
         created_at=dt_to_pb_timestamp(doc.created_at),
+        seq=doc.monotonic_seq or 0,
         rating=pb2.Rating(
             film_id=str(doc.film_id),
             rating=doc.film_score,
@@ -36,6 +51,7 @@ def transform_film_bookmark(doc: FilmBookmarkModel) -> pb2.Activity:
         user_id=str(doc.user_id),
         activity_type=pb2.ACTIVITY_TYPE_BOOKMARK,
         created_at=dt_to_pb_timestamp(doc.created_at),
+        seq=doc.monotonic_seq or 0,
         bookmark=pb2.Bookmark(
             film_id=str(doc.film_id),
         ),
@@ -48,8 +64,56 @@ def transform_film_review(doc: FilmReviewModel) -> pb2.Activity:
         user_id=str(doc.user_id),
         activity_type=pb2.ACTIVITY_TYPE_REVIEW,
         created_at=dt_to_pb_timestamp(doc.created_at),
+        seq=doc.monotonic_seq or 0,
         review=pb2.Review(
             film_id=str(doc.film_id),
             review_text=doc.review_text,
         ),
     )
+
+
+# Быстрый путь: активности из необработанных документов MongoDB
+# (результат курсора Motor с проекцией *ActivityView) без валидации
+# моделей Beanie/pydantic.
+RawDocument = Mapping[str, Any]
+
+
+def transform_raw_film_score(doc: RawDocument) -> pb2.Activity:
+    return pb2.Activity(
+        id=str(doc["_id"]),
+        user_id=str(doc["user_id"]),
+        activity_type=pb2.ACTIVITY_TYPE_RATING,
+        created_at=bson_dt_to_pb_timestamp(doc["created_at"]),
+        seq=doc.get("monotonic_seq") or 0,
+        rating=pb2.Rating(
+            film_id=str(doc["film_id"]),
+            rating=doc["film_score"],
+        ),
+    )
+
+
+def transform_raw_film_bookmark(doc: RawDocument) -> pb2.Activity:
+    return pb2.Activity(
+        id=str(doc["_id"]),
+        user_id=str(doc["user_id"]),
+        activity_type=pb2.ACTIVITY_TYPE_BOOKMARK,
+        created_at=bson_dt_to_pb_timestamp(doc["created_at"]),
+        seq=doc.get("monotonic_seq") or 0,
+        bookmark=pb2.Bookmark(
+            film_id=str(doc["film_id"]),
+        ),
+    )
+
+
+def transform_raw_film_review(doc: RawDocument) -> pb2.Activity:
+    return pb2.Activity(
+        id=str(doc["_id"]),
+        user_id=str(doc["user_id"]),
+        activity_type=pb2.ACTIVITY_TYPE_REVIEW,
+        created_at=bson_dt_to_pb_timestamp(doc["created_at"]),
+        seq=doc.get("monotonic_seq") or 0,
+        review=pb2.Review(
+            film_id=str(doc["film_id"]),
+            review_text=doc["review_text"],
+        ),
+    )
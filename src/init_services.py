@@ -5,12 +5,20 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from redis.asyncio import Redis
 
 import db.casher as cacher
-from core.config import settings
+import db.outbox as outbox
+import db.sequence as sequence
+import services.http_client as http_client
+import services.jwks_service as jwks
+from core.config import ActivitySourceMode, AuthVerifyMode, settings
 from db import redis
+from db.codecs import VersionedSerializer, get_codec
+from db.local_cache import TwoTierCache
+from models.migrations import MigrationModel
 from models.mongo_models import (
     FilmBookmarkModel,
     FilmReviewModel,
     FilmScoreModel,
+    FilmStatsModel,
     ReviewLikeModel,
 )
 
@@ -23,11 +31,105 @@ async def init_casher() -> None:
     """
     try:
         redis.redis = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-        cacher.cacher = redis.RedisCache(redis.redis)
+        serializer = VersionedSerializer(
+            get_codec(settings.CACHE_CODEC),
+            accept_legacy_pickle=settings.CACHE_ACCEPT_LEGACY_PICKLE,
+        )
+        remote_cache = redis.RedisCache(redis.redis, serializer)
+
+        if not settings.LOCAL_CACHE_ENABLED:
+            cacher.cacher = remote_cache
+            return
+
+        local_cache = TwoTierCache(
+            remote_cache,
+            maxsize=settings.LOCAL_CACHE_SIZE,
+            local_ttl=settings.LOCAL_CACHE_TTL,
+            negative_ttl=settings.LOCAL_CACHE_NEGATIVE_TTL,
+            redis=redis.redis,
+            channel=settings.LOCAL_CACHE_INVALIDATION_CHANNEL,
+        )
+        local_cache.start()
+        cacher.cacher = local_cache
     except Exception as ex:
         logger.exception("Error connecting to Redis: %s", ex)
 
 
+async def close_casher() -> None:
+    """
+    Остановка фоновых задач кэша и закрытие соединения с Redis
+    """
+    if isinstance(cacher.cacher, TwoTierCache):
+        await cacher.cacher.stop()
+    if redis.redis is not None:
+        await redis.redis.aclose()
+
+
+async def init_outbox() -> None:
+    """
+    Инициализация журнала вставок в Redis Streams для потока активностей
+    """
+    if settings.ACTIVITY_SOURCE != ActivitySourceMode.STREAM:
+        return
+    if redis.redis is None:
+        logger.error("Activity outbox requires Redis")
+        return
+
+    outbox.outbox = outbox.ActivityOutbox(
+        redis.redis, maxlen=settings.ACTIVITY_STREAM_MAXLEN
+    )
+
+
+def sequence_blocks_enabled() -> bool:
+    """
+    Выдаются ли monotonic_seq блоками.
+
+    Номера из блоков записываются не по порядку, а границу записанных
+    номеров (db.sequence.SequenceWatermark) соблюдает только опрос
+    MongoDB. Источники STREAM и CHANGE_STREAM отдают события по мере
+    записи, и позиция потребителя (максимальный номер) пропустила бы
+    номер, записанный позже большего, поэтому с ними номера
+    выдаются по одному.
+    """
+    return (
+        settings.SEQUENCE_BLOCK_SIZE > 1
+        and settings.ACTIVITY_SOURCE == ActivitySourceMode.POLL
+    )
+
+
+async def init_sequences() -> None:
+    """
+    Инициализация выдачи monotonic_seq блоками
+    """
+    if not sequence_blocks_enabled():
+        if settings.SEQUENCE_BLOCK_SIZE > 1:
+            logger.warning(
+                "SEQUENCE_BLOCK_SIZE is ignored with ACTIVITY_SOURCE=%s",
+                settings.ACTIVITY_SOURCE,
+            )
+        return
+    if redis.redis is None:
+        logger.error("Sequence allocator requires Redis")
+        return
+
+    sequence.allocator = sequence.SequenceAllocator(
+        redis.redis,
+        block_size=settings.SEQUENCE_BLOCK_SIZE,
+        report_interval=settings.SEQUENCE_REPORT_INTERVAL,
+        lease_ttl=settings.SEQUENCE_LEASE_TTL,
+    )
+    sequence.allocator.start()
+
+
+async def close_sequences() -> None:
+    """
+    Остановка публикации границ и возврат блоков номеров
+    """
+    if sequence.allocator is not None:
+        await sequence.allocator.stop()
+        sequence.allocator = None
+
+
 async def init_mongo() -> None:
     """
     Инициализация MongoDB посредством Beanie ODM
@@ -47,6 +149,8 @@ async def init_mongo() -> None:
                 FilmBookmarkModel,
                 FilmReviewModel,
                 ReviewLikeModel,
+                FilmStatsModel,
+                MigrationModel,
             ],
         )
 
@@ -55,3 +159,64 @@ async def init_mongo() -> None:
     except Exception as ex:
 
         logger.exception("Error connecting to MongoDB: %s", ex)
+
+
+async def init_jwks() -> None:
+    """
+    Инициализация хранилища публичных ключей Auth сервиса
+    для локальной проверки токенов
+    """
+    if settings.AUTH_VERIFY_MODE != AuthVerifyMode.LOCAL:
+        return
+
+    jwks.jwks_store = jwks.create_jwks_store(http_client.http_session)
+    try:
+        await jwks.jwks_store.refresh()
+    except Exception as ex:
+        # до загрузки ключей токены проверяются через Auth сервис
+        logger.exception("Error loading JWKS: %s", ex)
+    jwks.jwks_store.start()
+
+
+async def close_jwks() -> None:
+    """
+    Остановка фонового обновления публичных ключей
+    """
+    if jwks.jwks_store is not None:
+        await jwks.jwks_store.stop()
+
+
+async def init_http_client() -> None:
+    """
+    Инициализация общей HTTP-сессии с пулом соединений
+    """
+    http_client.http_session = http_client.create_http_session()
+
+
+async def close_http_client() -> None:
+    """
+    Закрытие общей HTTP-сессии и ее соединений
+    """
+    if http_client.http_session is not None:
+        await http_client.http_session.close()
+        http_client.http_session = None
+
+
+# сервисы в порядке запуска; JWKS использует общую HTTP-сессию,
+# а счетчики последовательностей - Redis
+STARTUP = (
+    init_casher,
+    init_outbox,
+    init_sequences,
+    init_mongo,
+    init_http_client,
+    init_jwks,
+)
+
+# сервисы в порядке остановки
+SHUTDOWN = (
+    close_jwks,
+    close_http_client,
+    close_sequences,
+    close_casher,
+)
@@ -3,7 +3,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from init_services import init_casher, init_mongo
+from init_services import SHUTDOWN, STARTUP
 
 logger = logging.getLogger(__name__)
 
@@ -14,11 +14,13 @@ async def lifespan(app: FastAPI):
     Иницилизирует сервисы перед стартом
     приложения и зыкрывает соединения после
     """
-    await init_casher()
-    await init_mongo()
+    for init in STARTUP:
+        await init()
 
     logger.info("App is ready")
 
     yield
 
     logger.debug("App is closing...")
+    for close in SHUTDOWN:
+        await close()
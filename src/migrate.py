@@ -0,0 +1,95 @@
+import asyncio
+import io
+import logging
+import pickle
+from types import MappingProxyType
+from typing import Awaitable, Callable, Mapping
+
+from dotenv import load_dotenv
+
+from core.log_config import setup_logging
+from db import redis
+from db.casher import get_cacher
+from db.codecs import PICKLE_PROTO
+from init_services import close_casher, init_casher, init_mongo
+from models.migrations import MigrationModel
+from models.mongo_models import (
+    FilmBookmarkModel,
+    FilmReviewModel,
+    FilmScoreModel,
+)
+from services.activity_stream import checkpoint_key
+from services.film_stats_service import get_film_stats_service
+from services.review_service import get_review_service
+
+logger = logging.getLogger(__name__)
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """
+    Unpickler без глобальных имен: читает только встроенные значения,
+    поэтому не выполняет код из значения кэша.
+    """
+
+    def find_class(self, module_name: str, name: str):
+        raise pickle.UnpicklingError(f"forbidden global {module_name}.{name}")
+
+
+async def convert_legacy_checkpoints() -> None:
+    """
+    Переводит позиции потребителя по умолчанию, сохраненные прежними
+    версиями через pickle, в текущий формат кэша, чтобы поток
+    активностей продолжил с них, а не с начала коллекций.
+    """
+    cacher = await get_cacher()
+    if redis.redis is None or cacher is None:
+        raise RuntimeError("Redis is not initialized")
+
+    for model_class in (FilmScoreModel, FilmBookmarkModel, FilmReviewModel):
+        key = checkpoint_key(model_class.__name__)
+        payload = await redis.redis.get(key)
+        if payload and payload[0] == PICKLE_PROTO:
+            seq = int(_PlainUnpickler(io.BytesIO(payload)).load())
+            await cacher.set(key, seq, raise_exc=True)
+            logger.info("Checkpoint %s converted: %s", key, seq)
+
+# имя миграции -> шаг; по имени миграция отмечается примененной,
+# поэтому имена не меняются, а новые шаги добавляются в конец
+MIGRATIONS: Mapping[str, Callable[[], Awaitable[None]]] = MappingProxyType({
+    "0001_film_stats": lambda: get_film_stats_service().rebuild(),
+    "0002_review_likes_count": lambda: (
+        get_review_service().rebuild_likes_count()
+    ),
+    "0003_legacy_checkpoints": convert_legacy_checkpoints,
+})
+
+
+async def migrate() -> None:
+    """
+    Применяет по порядку миграции, еще не отмеченные в коллекции
+    migrations.
+
+    Миграции пересчитывают данные целиком и не согласованы с
+    параллельной записью, поэтому запускаются до старта API и
+    gRPC сервера (сервис migrate-ugc2 в docker-compose).
+    """
+    for name, step in MIGRATIONS.items():
+        if await MigrationModel.get(name) is not None:
+            continue
+        logger.info("Applying migration %s", name)
+        await step()
+        await MigrationModel(id=name).insert()
+    logger.info("Migrations are up to date")
+
+
+async def main() -> None:
+    await init_mongo()
+    await init_casher()
+    await migrate()
+    await close_casher()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    setup_logging()
+    asyncio.run(main())
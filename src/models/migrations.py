@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+
+from beanie import Document
+from pydantic import Field
+
+
+class MigrationModel(Document):
+    """
+    Модель таблицы примененных миграций данных (migrate.py).
+    """
+
+    # id документа - имя миграции
+    id: str  # type: ignore
+    applied_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
+
+    class Settings:
+        name = "migrations"
@@ -1,34 +1,113 @@
+import asyncio
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, ClassVar, Optional
 from uuid import UUID, uuid4
 
-from beanie import Document, before_event, Insert
+from beanie import Document, Insert, after_event, before_event
 from pydantic import Field
-from pymongo import ASCENDING, IndexModel
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 from db.casher import get_cacher
+from db.outbox import publish_activity
+from db.sequence import get_sequence_allocator
 
 
-async def get_next_counter(key: str) -> int:
-    cacher = await get_cacher()
+class MonotonicSeqReservation:
+    """
+    Диапазон номеров модели на время записи в обход хуков Beanie
+    (upsert, пакетная вставка). Номера возвращаются при выходе
+    из блока async with, даже если запись не удалась.
+    """
 
-    if cacher is None:
-        raise ValueError("Cacher not initialized")
+    def __init__(self, model_class: Any, count: int) -> None:
+        self.model_class = model_class
+        self.count = count
+        self.seqs = range(0)
 
-    return await cacher.incr(key)
+    async def __aenter__(self) -> range:
+        self.seqs = await self.model_class.next_monotonic_seqs(self.count)
+        return self.seqs
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.model_class.release_monotonic_seqs(self.seqs)
 
 
 class MonotonicSequenceMixin:
     monotonic_seq: Optional[int] = None
+    # вставки модели попадают в поток активностей
+    activity_stream: ClassVar[bool] = True
 
     @classmethod
     def get_redis_key(cls) -> str:
         return f"UGC_service:src:models:mongo_models:{cls.__name__}:counter"
 
+    @classmethod
+    async def next_monotonic_seqs(cls, count: int) -> range:
+        """
+        Выдает диапазон из count номеров последовательности модели.
+
+        Если включена выдача блоками, номера берутся из блока процесса
+        и после записи возвращаются через release_monotonic_seqs.
+        """
+        allocator = await get_sequence_allocator()
+        if allocator is not None:
+            return await allocator.allocate(cls.get_redis_key(), count)
+
+        cacher = await get_cacher()
+
+        if cacher is None:
+            raise ValueError("Cacher not initialized")
+
+        hi = await cacher.incr(cls.get_redis_key(), count)
+        return range(hi - count + 1, hi + 1)
+
+    @classmethod
+    def reserve_monotonic_seqs(
+        cls, count: int = 1
+    ) -> MonotonicSeqReservation:
+        """
+        Диапазон номеров для записи в обход ODM:
+        async with Model.reserve_monotonic_seqs(n) as seqs.
+        """
+        return MonotonicSeqReservation(cls, count)
+
+    @classmethod
+    async def release_monotonic_seqs(cls, seqs: range | int) -> None:
+        """
+        Отмечает номера записанными, чтобы читатели потока
+        активностей могли продвинуться дальше них.
+        """
+        allocator = await get_sequence_allocator()
+        if allocator is None:
+            return
+        if isinstance(seqs, int):
+            seqs = range(seqs, seqs + 1)
+        allocator.release(cls.get_redis_key(), seqs)
+
+    async def insert(self, **kwargs: Any) -> Any:
+        """
+        Вставка документа. Если вставка не удалась (DuplicateKeyError),
+        after_event не вызывается, и номер, выданный set_monotonic_seq,
+        возвращается здесь, чтобы не задерживать читателей потока.
+        """
+        try:
+            return await super().insert(**kwargs)  # type: ignore[misc]
+        except (Exception, asyncio.CancelledError):
+            if self.monotonic_seq is not None:
+                await self.release_monotonic_seqs(self.monotonic_seq)
+            raise
+
     @before_event(Insert)
     async def set_monotonic_seq(self):
-        key = self.get_redis_key()
-        self.monotonic_seq = await get_next_counter(key)
+        seqs = await self.next_monotonic_seqs(1)
+        self.monotonic_seq = seqs[0]
+
+    @after_event(Insert)
+    async def publish_inserted(self):
+        if self.monotonic_seq is not None:
+            await self.release_monotonic_seqs(self.monotonic_seq)
+        if self.activity_stream:
+            await publish_activity(self)
 
 
 class FilmScoreModel(MonotonicSequenceMixin, Document):
@@ -56,6 +135,26 @@ class FilmScoreModel(MonotonicSequenceMixin, Document):
                 name="film_user_idx",
                 unique=True,
             ),
+            # покрывает запрос опроса с проекцией ScoreActivityView
+            IndexModel(
+                [
+                    ("monotonic_seq", ASCENDING),
+                    ("_id", ASCENDING),
+                    ("user_id", ASCENDING),
+                    ("film_id", ASCENDING),
+                    ("film_score", ASCENDING),
+                    ("created_at", ASCENDING),
+                ],
+                name="monotonic_seq_idx",
+            ),
+            # активности пользователя в порядке создания (GetActivities)
+            IndexModel(
+                [
+                    ("user_id", ASCENDING),
+                    ("created_at", ASCENDING),
+                ],
+                name="user_created_idx",
+            ),
         ]
 
 
@@ -82,6 +181,25 @@ class FilmBookmarkModel(MonotonicSequenceMixin, Document):
                 name="user_film_idx",
                 unique=True,
             ),
+            # покрывает запрос опроса с проекцией BookmarkActivityView
+            IndexModel(
+                [
+                    ("monotonic_seq", ASCENDING),
+                    ("_id", ASCENDING),
+                    ("user_id", ASCENDING),
+                    ("film_id", ASCENDING),
+                    ("created_at", ASCENDING),
+                ],
+                name="monotonic_seq_idx",
+            ),
+            # активности пользователя в порядке создания (GetActivities)
+            IndexModel(
+                [
+                    ("user_id", ASCENDING),
+                    ("created_at", ASCENDING),
+                ],
+                name="user_created_idx",
+            ),
         ]
 
 
@@ -95,6 +213,8 @@ class FilmReviewModel(MonotonicSequenceMixin, Document):
     user_id: UUID
     review_text: str
     film_score: int
+    # денормализованный счетчик лайков, поддерживается $inc
+    likes_count: int = 0
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc)
     )
@@ -110,6 +230,27 @@ class FilmReviewModel(MonotonicSequenceMixin, Document):
                 name="film_user_idx",
                 unique=True,
             ),
+            IndexModel(
+                [
+                    ("film_id", ASCENDING),
+                    ("likes_count", DESCENDING),
+                    ("_id", ASCENDING),
+                ],
+                name="film_likes_idx",
+            ),
+            # опрос новых рецензий (текст в индекс не входит)
+            IndexModel(
+                [("monotonic_seq", ASCENDING)],
+                name="monotonic_seq_idx",
+            ),
+            # активности пользователя в порядке создания (GetActivities)
+            IndexModel(
+                [
+                    ("user_id", ASCENDING),
+                    ("created_at", ASCENDING),
+                ],
+                name="user_created_idx",
+            ),
         ]
 
 
@@ -118,6 +259,8 @@ class ReviewLikeModel(MonotonicSequenceMixin, Document):
     Модель таблицы с лайками на отзывы.
     """
 
+    activity_stream: ClassVar[bool] = False
+
     id: UUID = Field(default_factory=uuid4)  # type: ignore
     review_id: UUID
     user_id: UUID
@@ -137,3 +280,22 @@ class ReviewLikeModel(MonotonicSequenceMixin, Document):
                 unique=True,
             ),
         ]
+
+
+class FilmStatsModel(Document):
+    """
+    Модель таблицы с агрегатами оценок фильмов.
+
+    Поддерживается атомарными $inc при изменении оценок,
+    поэтому средняя оценка читается одним документом.
+    """
+
+    # id документа совпадает с id фильма
+    id: UUID  # type: ignore
+    score_sum: int = 0
+    score_count: int = 0
+    # гистограмма оценок: {"0": кол-во, ..., "10": кол-во}
+    score_hist: dict[str, int] = Field(default_factory=dict)
+
+    class Settings:
+        name = "film_stats"
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class ActivityView(BaseModel):
+    """
+    Общие поля документа, нужные для построения активности.
+    """
+
+    id: UUID = Field(alias="_id")
+    user_id: UUID
+    film_id: UUID
+    created_at: datetime
+    monotonic_seq: Optional[int] = None
+
+
+class ScoreActivityView(ActivityView):
+    """
+    Проекция оценки фильма для потока активностей.
+    """
+
+    film_score: int
+
+
+class BookmarkActivityView(ActivityView):
+    """
+    Проекция закладки для потока активностей.
+    """
+
+
+class ReviewActivityView(ActivityView):
+    """
+    Проекция рецензии для потока активностей.
+    """
+
+    review_text: str
@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
+from core.config import settings
+
 
 class FilmBookmark(BaseModel):
     """Модель для добавления фильма в закладки."""
@@ -13,6 +15,17 @@ class FilmBookmark(BaseModel):
     )
 
 
+class FilmBookmarkBatch(BaseModel):
+    """Модель для пакетного добавления фильмов в закладки."""
+
+    film_ids: list[str] = Field(
+        ...,
+        description="UUID фильмов",
+        min_length=1,
+        max_length=settings.BULK_MAX_ITEMS,
+    )
+
+
 class FilmBookmarkGRPC(FilmBookmark):
     id: str
     created_at: datetime
@@ -0,0 +1,32 @@
+from enum import auto
+from typing import Optional
+
+from pydantic import BaseModel
+
+from core.config import StrEnum
+
+
+class BulkItemStatus(StrEnum):
+    CREATED = auto()
+    UPDATED = auto()
+    EXISTS = auto()
+    SUPERSEDED = auto()
+    ERROR = auto()
+
+
+class BulkItemResult(BaseModel):
+    """
+    Результат обработки одного элемента пакетного запроса.
+    """
+
+    index: int
+    status: BulkItemStatus
+    detail: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    """
+    Результаты пакетного запроса в порядке элементов запроса.
+    """
+
+    results: list[BulkItemResult]
@@ -3,6 +3,8 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+from core.config import settings
+
 
 class FilmReview(BaseModel):
     """
@@ -26,6 +28,19 @@ class FilmReviewPost(BaseModel):
     film_score: int = Field(..., ge=1, le=10)
 
 
+class ReviewLikeBatch(BaseModel):
+    """
+    Модель для пакетного добавления лайков к отзывам.
+    """
+
+    review_ids: list[str] = Field(
+        ...,
+        description="ID отзывов",
+        min_length=1,
+        max_length=settings.BULK_MAX_ITEMS,
+    )
+
+
 class FilmReviewGRPC(BaseModel):
     id: str
     film_id: str
@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
+from core.config import settings
+
 
 class AddScore(BaseModel):
     """
@@ -18,6 +20,16 @@ class AddScore(BaseModel):
     )
 
 
+class AddScoreBatch(BaseModel):
+    """
+    Модель для пакетного добавления и обновления оценок фильмов.
+    """
+
+    items: list[AddScore] = Field(
+        ..., min_length=1, max_length=settings.BULK_MAX_ITEMS
+    )
+
+
 class AverageScore(BaseModel):
     """
     Модель для получения средней оценки фильма.
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from beanie.odm.operators.find import BaseFindOperator
+from beanie.odm.operators.find.comparison import GTE, In
+from pydantic import BaseModel, ConfigDict
+
+
+class ActivityFilter(BaseModel):
+    """
+    Условия отбора активностей потребителя, пустое условие
+    не ограничивает поток.
+
+    Условия передаются в запросы MongoDB при догрузке, а опрос
+    запускается только для запрошенных типов. Живые события общего
+    опроса отбираются для подписки отдельно (см. ActivityHub.subscribe).
+
+    Attributes:
+        activity_types (frozenset): Типы активностей.
+        user_ids (frozenset[UUID]): Пользователи.
+        film_ids (frozenset[UUID]): Фильмы.
+        since (datetime | None): Не раньше этого времени создания (UTC).
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    activity_types: frozenset[Any] = frozenset()
+    user_ids: frozenset[UUID] = frozenset()
+    film_ids: frozenset[UUID] = frozenset()
+    since: Optional[datetime] = None
+
+    def wants(self, activity_type: Any) -> bool:
+        return not self.activity_types or activity_type in self.activity_types
+
+    def query(self) -> list[BaseFindOperator]:
+        """
+        Условия find() по полям user_id, film_id и created_at документа.
+        """
+        query: list[BaseFindOperator] = []
+        if self.user_ids:
+            query.append(In("user_id", list(self.user_ids)))
+        if self.film_ids:
+            query.append(In("film_id", list(self.film_ids)))
+        if self.since is not None:
+            query.append(GTE("created_at", self.since))
+        return query
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+from core.config import SlowConsumerPolicy
+from services.model_poller import ActivitySource
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:  # noqa: WPS214, WPS230
+    """
+    Подписка на поток активностей с ограниченным буфером.
+
+    Поведение при переполнении буфера задает policy:
+    CATCH_UP и DROP_OLDEST вытесняют самые старые элементы и учитывают
+    их в dropped, BLOCK заставляет источник ждать свободного места,
+    DISCONNECT отмечает подписку переполненной (overflowed).
+
+    Attributes:
+        maxsize (int): Размер буфера.
+        policy (SlowConsumerPolicy): Поведение при переполнении.
+        name (str): Имя подписки для логов и метрик.
+        activity_types (frozenset): Типы активностей подписки.
+        predicate (Callable | None): Отбор событий подписки.
+        buffer (deque): Непрочитанные элементы.
+        dropped (int): Количество вытесненных элементов.
+        dropped_total (int): Вытеснено за все время подписки.
+        overflowed (bool): Буфер переполнился при политике DISCONNECT.
+        delivered (dict): Последний доставленный seq по типу активности.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.CATCH_UP,
+        name: str = "",
+        activity_types: Iterable[Any] = (),
+        predicate: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.policy = policy
+        self.name = name
+        self.activity_types = frozenset(activity_types)
+        self.predicate = predicate
+        self.buffer: deque = deque()
+        self.dropped = 0
+        self.dropped_total = 0
+        self.overflowed = False
+        self.delivered: dict[Any, int] = {}
+        self.closed = False
+        self._event = asyncio.Event()
+        self._space = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self.get()
+
+    def accepts(self, item: Any) -> bool:
+        """
+        Нужно ли событие подписке (тип и predicate).
+        """
+        if item.activity_type not in self.activity_types:
+            return False
+        return self.predicate is None or self.predicate(item)
+
+    async def put(self, item: Any) -> None:
+        if self.closed:
+            return
+        if len(self.buffer) >= self.maxsize:
+            if self.policy == SlowConsumerPolicy.BLOCK:
+                await self._wait_for_space()
+                if self.closed:
+                    return
+            elif self.policy == SlowConsumerPolicy.DISCONNECT:
+                self.overflowed = True
+                self._event.set()
+                return
+            else:
+                self.buffer.popleft()
+                self.dropped += 1
+                self.dropped_total += 1
+        self.buffer.append(item)
+        self._event.set()
+
+    def reset(self) -> int:
+        """
+        Очищает буфер и счетчик вытесненных элементов.
+
+        Returns:
+            int: Сколько элементов было вытеснено.
+        """
+        dropped = self.take_dropped()
+        self.buffer.clear()
+        self._space.set()
+        return dropped
+
+    def take_dropped(self) -> int:
+        """
+        Возвращает и обнуляет счетчик вытесненных элементов.
+        """
+        dropped = self.dropped
+        self.dropped = 0
+        return dropped
+
+    def close(self) -> None:
+        """
+        Закрывает подписку и освобождает ожидающий источник.
+        """
+        self.closed = True
+        self._space.set()
+
+    async def get(self) -> Any:
+        """
+        Возвращает следующий элемент, ожидая его появления.
+        """
+        while not self.buffer:
+            self._event.clear()
+            await self._event.wait()
+        item = self.buffer.popleft()
+        self._space.set()
+        return item
+
+    async def _wait_for_space(self) -> None:
+        while len(self.buffer) >= self.maxsize and not self.closed:
+            self._space.clear()
+            await self._space.wait()
+
+
+class ActivityHub:  # noqa: WPS214
+    """
+    Общий для процесса источник активностей с рассылкой подписчикам.
+
+    Один набор ModelPoller опрашивает MongoDB независимо от числа
+    подключенных потребителей и публикует активности в хаб, а хаб
+    копирует их в буфер каждой подписки, которой они нужны. Опрос
+    типа активности запускается с первой подпиской на этот тип и
+    останавливается после ухода последней, поэтому позиция чтения
+    не сдвигается, пока активности некому отдать.
+
+    При политике BLOCK медленный подписчик останавливает рассылку
+    всем подписчикам, а источник не читает новые пачки, поэтому
+    память процесса ограничена буферами подписок.
+
+    Attributes:
+        pollers (Mapping[Any, ActivitySource]): Источники активностей
+            по типу активности.
+        buffer_size (int): Размер буфера одной подписки.
+        policy (SlowConsumerPolicy): Политика подписок по умолчанию.
+        metrics_interval (float): Период записи метрик подписок
+            в лог (0 - не записывать).
+    """
+
+    def __init__(
+        self,
+        pollers: Mapping[Any, ActivitySource],
+        buffer_size: int = 10000,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.CATCH_UP,
+        metrics_interval: float = 0,
+    ) -> None:
+        self.pollers = pollers
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self.metrics_interval = metrics_interval
+        self.subscribers: set[Subscription] = set()
+        self._tasks: dict[Any, asyncio.Task] = {}
+        self._report_task: Optional[asyncio.Task] = None
+
+    def subscribe(
+        self,
+        name: str = "",
+        policy: Optional[SlowConsumerPolicy] = None,
+        activity_types: Optional[Iterable[Any]] = None,
+        predicate: Optional[Callable[[Any], bool]] = None,
+    ) -> Subscription:
+        """
+        Подписывает на активности activity_types (по умолчанию на все),
+        отобранные predicate, и запускает опрос этих типов.
+        """
+        if activity_types is None:
+            activity_types = self.pollers
+        subscription = Subscription(
+            self.buffer_size,
+            policy or self.policy,
+            name,
+            [key for key in activity_types if key in self.pollers],
+            predicate,
+        )
+        self.subscribers.add(subscription)
+        self._start(subscription.activity_types)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        self.subscribers.discard(subscription)
+        if subscription.dropped_total:
+            logger.warning(
+                "Activity subscriber %r dropped %s items",
+                subscription.name,
+                subscription.dropped_total,
+            )
+        if not self.subscribers:
+            await self.stop()
+            return
+        wanted = frozenset().union(
+            *(other.activity_types for other in self.subscribers)
+        )
+        await self._stop([key for key in self._tasks if key not in wanted])
+
+    async def put(self, item: Any) -> None:
+        """
+        Рассылает элемент подписчикам (приемник для ModelPoller).
+        """
+        for subscription in list(self.subscribers):
+            if subscription.accepts(item):
+                await subscription.put(item)
+
+    def lag(self, subscription: Subscription) -> int:
+        """
+        Отставание подписчика от источников в номерах последовательности.
+        """
+        return sum(
+            max(poller.position - subscription.delivered[key], 0)
+            for key, poller in self.pollers.items()
+            if key in subscription.delivered
+        )
+
+    async def stop(self) -> None:
+        """
+        Останавливает опрос источников.
+        """
+        await self._stop(list(self._tasks))
+        report = self._report_task
+        self._report_task = None
+        if report is not None:
+            report.cancel()
+            await asyncio.gather(report, return_exceptions=True)
+
+    def _start(self, activity_types: Iterable[Any]) -> None:
+        # упавший опрос заменяется новым, а не остается висеть в _tasks
+        started = [
+            key for key in activity_types
+            if key not in self._tasks or self._tasks[key].done()
+        ]
+        for activity_type in started:
+            self._tasks[activity_type] = asyncio.create_task(
+                self.pollers[activity_type].run(self)
+            )
+        if started:
+            logger.info("Activity pollers started: %s", started)
+        if self.metrics_interval > 0 and self._report_task is None:
+            self._report_task = asyncio.create_task(self._report())
+
+    async def _stop(self, activity_types: list[Any]) -> None:
+        tasks = [self._tasks.pop(key) for key in activity_types]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            logger.info("Activity pollers stopped: %s", activity_types)
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            for subscription in list(self.subscribers):
+                metrics = {
+                    "stream": subscription.name,
+                    "queue_depth": len(subscription),
+                    "lag": self.lag(subscription),
+                    "dropped": subscription.dropped_total,
+                }
+                logger.info(
+                    "Activity stream %(stream)r: queue_depth=%(queue_depth)s"
+                    " lag=%(lag)s dropped=%(dropped)s",
+                    metrics,
+                    extra=metrics,
+                )
+
+
+activity_hub: Optional[ActivityHub] = None
+
+
+async def get_activity_hub() -> ActivityHub | None:
+    return activity_hub
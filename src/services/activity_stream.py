@@ -0,0 +1,305 @@
+import logging
+import time
+from contextlib import aclosing
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Mapping,
+    Optional,
+)
+
+from core.config import SlowConsumerPolicy
+from db.casher import AbstractCache
+from services.activity_filter import ActivityFilter
+from services.activity_hub import ActivityHub, Subscription
+from utils.batching import batched
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PREFIX = "UGC_service:src:services:model_poller:"
+
+# событие потока и позиция (тип активности, seq) после его доставки
+Event = tuple[Any, Optional[tuple[Any, int]]]
+
+
+def checkpoint_key(model_name: str, consumer_id: str = "") -> str:
+    """
+    Ключ позиции потребителя в потоке активностей модели.
+
+    Потребитель по умолчанию (пустой id) использует ключ прежних
+    версий, чтобы продолжить с уже сохраненной позиции. Прежние
+    версии писали его через pickle; в текущий формат кэша его
+    переводит миграция 0003_legacy_checkpoints (migrate.py).
+    """
+    if not consumer_id:
+        return f"{CHECKPOINT_PREFIX}{model_name}:last_monotonic_key"
+    return (
+        f"{CHECKPOINT_PREFIX}{model_name}:consumer:{consumer_id}"
+        ":last_monotonic_key"
+    )
+
+
+class SlowConsumerError(Exception):
+    """
+    Потребитель не успевает читать поток при политике DISCONNECT.
+
+    Attributes:
+        positions (dict): Позиции, с которых поток нужно возобновить.
+    """
+
+    def __init__(self, positions: Mapping[Any, int]) -> None:
+        super().__init__("Activity consumer is too slow")
+        self.positions = dict(positions)
+
+
+class ActivityStream:  # noqa: WPS214, WPS230
+    """
+    Поток активностей одного потребителя с возобновлением.
+
+    Сначала догружает из MongoDB все, что появилось после позиции
+    потребителя, до текущей позиции живого источника, затем отдает
+    события из хаба, отбрасывая попавшие в догрузку. Позиции
+    доставленных событий сохраняются в кэш пачками.
+
+    Если подписчик не успевает читать, поведение задает политика
+    хаба: CATCH_UP догружает вытесненное из MongoDB, DROP_OLDEST
+    пропускает его и отдает маркер пропуска из gap_factory, BLOCK
+    останавливает источник, DISCONNECT завершает поток с
+    SlowConsumerError.
+
+    activity_filter ограничивает типы активностей (опрос остальных
+    типов не запускается ради этого потребителя) и передается в
+    запросы догрузки. Живые события общего опроса отбираются тем же
+    условием через predicate, так как поток не знает устройства
+    элементов. Позиции сдвигаются только по отобранным событиям.
+
+    Элементы потока должны иметь поля activity_type и seq.
+
+    Attributes:
+        hub (ActivityHub): Общий источник живых событий.
+        cacher (AbstractCache): Хранилище позиций потребителей.
+        consumer_id (str): Идентификатор потребителя.
+        positions (dict): Последний доставленный seq по типу активности.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        hub: ActivityHub,
+        cacher: AbstractCache,
+        consumer_id: str = "",
+        resume_from: Optional[Mapping[Any, int]] = None,
+        commit_batch: int = 100,
+        commit_interval: float = 1.0,
+        gap_factory: Optional[Callable[[int], Any]] = None,
+        activity_filter: Optional[ActivityFilter] = None,
+        predicate: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        self.hub = hub
+        self.cacher = cacher
+        self.consumer_id = consumer_id
+        self.resume_from = dict(resume_from or {})
+        self.commit_batch = commit_batch
+        self.commit_interval = commit_interval
+        self.gap_factory = gap_factory
+        self.activity_filter = activity_filter or ActivityFilter()
+        self.predicate = predicate
+
+        self.positions: dict[Any, int] = {}
+        # граница догрузки: события хаба до нее уже отданы из MongoDB
+        self._caught_up: dict[Any, int] = {}
+        self._keys = {
+            activity_type: checkpoint_key(
+                poller.model_class.__name__, consumer_id
+            )
+            for activity_type, poller in hub.pollers.items()
+            if self.activity_filter.wants(activity_type)
+        }
+        self._committed: dict[Any, int] = {}
+        self._uncommitted = 0
+        self._committed_at = time.monotonic()
+        self._subscription: Optional[Subscription] = None
+
+    async def load_positions(self) -> None:
+        """
+        Загружает сохраненные позиции, явные позиции запроса важнее.
+        """
+        stored = await self.cacher.get_many(list(self._keys.values()))
+        for activity_type, seq in zip(self._keys, stored):
+            self.positions[activity_type] = int(seq or 0)
+        self._committed = dict(self.positions)
+        self.positions.update(
+            (key, position)
+            for key, position in self.resume_from.items()
+            if key in self._keys
+        )
+
+    async def items(self) -> AsyncGenerator[Any, None]:
+        """
+        Отдает события по одному.
+
+        Событие считается доставленным, когда запрошено следующее.
+        """
+        await self._open()
+        async with aclosing(self._events()) as events:
+            async for item, position in events:
+                if item is not None:
+                    yield item
+                if position is not None:
+                    await self._advance(*position)
+
+    async def batches(
+        self, max_size: int, linger: float
+    ) -> AsyncGenerator[list[Any], None]:
+        """
+        Отдает события пачками (см. utils.batching.batched).
+
+        События пачки считаются доставленными, когда запрошена
+        следующая пачка, поэтому набранная, но не отправленная пачка
+        не сдвигает сохраненную позицию.
+        """
+        await self._open()
+        async with (
+            aclosing(self._events()) as events,
+            aclosing(batched(events, max_size, linger)) as chunks,
+        ):
+            async for chunk in chunks:
+                batch = [item for item, _ in chunk if item is not None]
+                if batch:
+                    yield batch
+                await self._advance_all(chunk)
+
+    async def delivered(self, item: Any) -> None:
+        """
+        Отмечает событие доставленным и при необходимости фиксирует позиции.
+        """
+        await self._advance(item.activity_type, item.seq)
+
+    async def commit(self) -> None:
+        """
+        Сохраняет изменившиеся позиции одной пачкой.
+        """
+        changed = {
+            self._keys[activity_type]: seq
+            for activity_type, seq in self.positions.items()
+            if activity_type in self._keys
+            and seq != self._committed.get(activity_type)
+        }
+        self._uncommitted = 0
+        self._committed_at = time.monotonic()
+        if not changed:
+            return
+        await self.cacher.set_many(changed)
+        self._committed = dict(self.positions)
+
+    async def close(self) -> None:
+        """
+        Отписывается от хаба и фиксирует последние позиции.
+        """
+        if self._subscription is not None:
+            await self.hub.unsubscribe(self._subscription)
+            self._subscription = None
+        await self.commit()
+
+    async def _open(self) -> None:
+        await self.load_positions()
+        subscription = self.hub.subscribe(
+            name=self.consumer_id,
+            activity_types=list(self._keys),
+            predicate=self.predicate,
+        )
+        subscription.delivered = self.positions
+        self._subscription = subscription
+
+    async def _events(self) -> AsyncGenerator[Event, None]:
+        """
+        Пары (событие, позиция): позиция сдвигается после доставки
+        события, событие None только сдвигает позицию, позиция None
+        у маркеров пропуска.
+        """
+        while True:
+            async for event in self._catch_up():
+                yield event
+            async for event in self._live():
+                yield event
+
+    async def _catch_up(self) -> AsyncIterator[Event]:
+        for activity_type in self._keys:
+            poller = self.hub.pollers[activity_type]
+            until = await poller.current_position()
+            after = self.positions[activity_type]
+            async for item in poller.backfill(
+                after, until, self.activity_filter
+            ):
+                yield item, (activity_type, item.seq)
+            self._caught_up[activity_type] = max(after, until)
+            # в догруженном диапазоне могут быть пропуски номеров
+            yield None, (activity_type, self._caught_up[activity_type])
+
+    async def _live(self) -> AsyncIterator[Event]:
+        subscription = self._opened()
+        while True:
+            item = await subscription.get()
+            if subscription.overflowed:
+                raise SlowConsumerError(self.positions)
+            if self._lagged(subscription):
+                # буфер переполнился: вытесненное догружается из MongoDB
+                return
+            for gap in self._gaps(subscription):
+                yield gap, None
+            if item.seq > self._caught_up.get(item.activity_type, 0):
+                yield item, (item.activity_type, item.seq)
+
+    def _opened(self) -> Subscription:
+        if self._subscription is None:
+            raise RuntimeError("Activity stream is not opened")
+        return self._subscription
+
+    def _lagged(self, subscription: Subscription) -> bool:
+        """
+        Сбрасывает буфер отставшего подписчика при политике CATCH_UP.
+        """
+        if not subscription.dropped:
+            return False
+        if subscription.policy != SlowConsumerPolicy.CATCH_UP:
+            return False
+        dropped = subscription.reset()
+        logger.warning(
+            "Activity consumer %r lagged by %s items, catching up",
+            self.consumer_id,
+            dropped,
+        )
+        return True
+
+    def _gaps(self, subscription: Subscription) -> list[Any]:
+        """
+        Маркеры пропуска вытесненных событий (пусто без gap_factory).
+        """
+        if not subscription.dropped:
+            return []
+        dropped = subscription.take_dropped()
+        logger.warning(
+            "Activity consumer %r skipped %s items",
+            self.consumer_id,
+            dropped,
+        )
+        if self.gap_factory is None:
+            return []
+        return [self.gap_factory(dropped)]
+
+    async def _advance_all(self, events: list[Event]) -> None:
+        for _, position in events:
+            if position is not None:
+                await self._advance(*position)
+
+    async def _advance(self, activity_type: Any, seq: int) -> None:
+        self.positions[activity_type] = max(
+            self.positions.get(activity_type, 0), seq
+        )
+        self._uncommitted += 1
+        if (
+            self._uncommitted >= self.commit_batch
+            or time.monotonic() - self._committed_at >= self.commit_interval
+        ):
+            await self.commit()
@@ -1,42 +1,96 @@
+import asyncio
 import logging
 import time
+from typing import Optional
 
 import aiohttp
 import jwt
 from fastapi import Depends
 
 from core.config import settings
-from db.casher import AbstractCache, get_cacher
-from exceptions.errors import UnauthorizedError
+from db.casher import AbstractCache, CacheLock, get_cacher
+from exceptions.errors import UnauthorizedError, UnauthorizedExc
+from services.http_client import get_http_session, retry_budget
+from services.jwks_service import JWKSKeyStore, get_jwks_store
+from utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# период опроса кэша, пока токен проверяет другой воркер
+VERIFY_LOCK_POLL_INTERVAL = 0.05
 
-async def verify_token(token: str) -> None:
+# общий для процесса реестр выполняющихся проверок токенов
+verify_flight = SingleFlight()
+
+
+async def verify_token(
+    token: str, session: Optional[aiohttp.ClientSession] = None
+) -> None:
     """
-    Функция отправляет запрос в сервис AUTH для верификации токена
+    Функция отправляет запрос в сервис AUTH для верификации токена.
+    Сетевые ошибки и ответы 5xx повторяются в пределах бюджета повторов,
+    после последней неудачной попытки токен считается недействительным.
     Args:
         token(str): JWT-токен доступа
+        session(ClientSession | None): Общая HTTP-сессия приложения,
+            без нее создается временная сессия
     Raises:
         HTTPStatus.UNAUTHORIZED: Если токен недействителен или
         сервис AUTH возвращает ошибку верификации.
     """
+    if session is None:
+        async with aiohttp.ClientSession() as temp_session:
+            return await verify_token(token, temp_session)
+
+    retry_budget.record_request()
+
+    error: Optional[Exception] = None
+    for attempt in range(settings.AUTH_HTTP_RETRIES + 1):
+        error = await request_verification(token, session)
+        if error is None:
+            return
+        is_last = attempt == settings.AUTH_HTTP_RETRIES
+        if is_last or not retry_budget.try_retry():
+            break
+        await asyncio.sleep(settings.AUTH_HTTP_RETRY_BACKOFF * 2**attempt)
+
+    # без ответа Auth сервиса токен не считается проверенным
+    raise UnauthorizedError from error
+
+
+async def request_verification(
+    token: str, session: aiohttp.ClientSession
+) -> Optional[Exception]:
+    """
+    Отправляет один запрос верификации токена в сервис AUTH.
+
+    Returns:
+        Exception | None: Временная ошибка (сеть, 5xx), после которой
+        запрос можно повторить, или None, если токен действителен.
+
+    Raises:
+        UnauthorizedError: Если сервис AUTH отклонил токен
+        или запрос завершился непредвиденной ошибкой.
+    """
+    headers = {"Content-Type": "application/json"}
+    json = {"access_token": token}
     try:
-        headers = {"Content-Type": "application/json"}
-        json = {"access_token": token}
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(
-                url=settings.AUTH_SERVICE_URL, headers=headers, json=json
-            )
-        response.raise_for_status()
+        async with session.post(
+            url=settings.AUTH_SERVICE_URL, headers=headers, json=json
+        ) as response:
+            response.raise_for_status()
     except aiohttp.ClientResponseError as ex:
         logger.error("ClientResponseError: %s", ex)
-        raise UnauthorizedError
-    except aiohttp.ClientError as ex:
+        if ex.status < 500:
+            raise UnauthorizedError
+        return ex
+    except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
         logger.error("ClientError: %s", ex)
-        raise UnauthorizedError
+        return ex
     except Exception as ex:
         logger.error("Unexpected error: %s", ex)
+        raise UnauthorizedError from ex
+    return None
 
 
 async def calc_diff(token: str) -> int:
@@ -64,13 +118,49 @@ class AuthService:
     Attributes:
         cacher (Cache): Объект кэша, используемый для
         хранения результатов проверки токенов.
+        jwks_store (JWKSKeyStore | None): Публичные ключи Auth сервиса
+        для локальной проверки токенов (None - только удаленная проверка).
+        http_session (ClientSession | None): Общая HTTP-сессия приложения
+        с пулом соединений к Auth сервису.
     """
 
     def __init__(
         self,
         cacher: AbstractCache,
+        jwks_store: Optional[JWKSKeyStore] = None,
+        http_session: Optional[aiohttp.ClientSession] = None,
     ) -> None:
         self.cacher = cacher
+        self.jwks_store = jwks_store
+        self.http_session = http_session
+
+    def verify_local(self, token: str) -> Optional[dict]:
+        """
+        Проверяет подпись и claims токена по закэшированным ключам
+        без обращения к Auth сервису и Redis.
+
+        Args:
+            token (str): Токен доступа, который необходимо проверить.
+
+        Returns:
+            dict | None: Payload токена или None, если локальная проверка
+            недоступна (выключена или нет подходящего ключа) и нужно
+            использовать удаленную проверку.
+
+        Raises:
+            UnauthorizedExc: Если токен недействителен или истек.
+        """
+        if self.jwks_store is None:
+            return None
+
+        try:
+            key = self.jwks_store.get_key(token)
+            if key is None:
+                return None
+            return self.jwks_store.decode(token, key)
+        except jwt.InvalidTokenError as ex:
+            logger.debug("Local token verification failed: %s", ex)
+            raise UnauthorizedExc("Token is invalid")
 
     async def verify(self, token: str) -> None:
         """
@@ -93,7 +183,30 @@ class AuthService:
         if is_valid is not None:
             return
 
-        await verify_token(token)
+        # параллельные проверки одного токена в процессе объединяются
+        # в один запрос к Auth сервису
+        await verify_flight.do(
+            token, lambda: self._verify_and_cache(token, cache_key)
+        )
+
+    async def _verify_and_cache(self, token: str, cache_key: str) -> None:
+        lock_timeout = settings.AUTH_VERIFY_LOCK_TIMEOUT
+        if lock_timeout <= 0:
+            await self._verify_remote(token, cache_key)
+            return
+
+        lock = CacheLock(self.cacher, cache_key, lock_timeout)
+        async with lock as lock_token:
+            if lock_token is not None:
+                await self._verify_remote(token, cache_key)
+                return
+
+        # токен уже проверяет другой воркер - ждем его результат
+        if not await self._wait_for_result(cache_key, lock_timeout):
+            await self._verify_remote(token, cache_key)
+
+    async def _verify_remote(self, token: str, cache_key: str) -> None:
+        await verify_token(token, session=self.http_session)
 
         diff = await calc_diff(token)
         if diff <= 0:
@@ -101,13 +214,27 @@ class AuthService:
 
         await self.cacher.set(cache_key, True, expire=diff)
 
+    async def _wait_for_result(self, cache_key: str, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(VERIFY_LOCK_POLL_INTERVAL)
+            if await self.cacher.get(cache_key) is not None:
+                return True
+        return False
+
 
 def get_auth_service(
     cacher: AbstractCache = Depends(get_cacher),
+    jwks_store: Optional[JWKSKeyStore] = Depends(get_jwks_store),
+    http_session: Optional[aiohttp.ClientSession] = Depends(
+        get_http_session
+    ),
 ) -> AuthService:
     """
     Функция для создания экземпляра класса AuthService
     """
     return AuthService(
         cacher=cacher,
+        jwks_store=jwks_store,
+        http_session=http_session,
     )
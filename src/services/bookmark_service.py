@@ -1,14 +1,23 @@
 from functools import lru_cache
+from typing import AsyncIterator, List, Optional
 from uuid import UUID
 
+from beanie.operators import In
 from fastapi import HTTPException, status
 from pymongo.errors import DuplicateKeyError
 
+from db import casher
+from db.cache_method import cache_method
+from db.outbox import publish_activities
 from models.mongo_models import FilmBookmarkModel
+from models.projections import BookmarkActivityView
 from schemas.bookmarks import FilmBookmarkGRPC
+from schemas.bulk import BulkItemResult
+from services.cache_tags import USER_BOOKMARKS_TAG
+from utils.bulk import insert_items, parse_uuid_items
 
 
-class BookmarksService:
+class BookmarksService:  # noqa: WPS214
     """
     Сервис для работы с закладками фильмов в MongoDB.
     """
@@ -19,6 +28,11 @@ class BookmarksService:
         """
         pass
 
+    @property
+    def cacher(self) -> Optional[casher.AbstractCache]:
+        return casher.cacher
+
+    @cache_method("cacher", expire=3600, tags=(USER_BOOKMARKS_TAG,))
     async def get_bookmark_films(self, user_id: str) -> list[UUID]:
         """
         Возвращает список id фильмов, добавленных пользователем в закладки.
@@ -53,6 +67,23 @@ class BookmarksService:
                 detail=f"error finding film bookmarks: {ex}",
             ) from ex
 
+    async def iter_users_bookmarks(
+        self, user_ids: List[UUID], batch_size: int, raw: bool = False
+    ) -> AsyncIterator[BookmarkActivityView | dict]:
+        """
+        Стримит закладки пользователей курсором MongoDB, читая
+        по batch_size документов, в порядке (user_id, created_at).
+        С raw=True отдает документы курсора Motor без валидации.
+        """
+        find = (
+            FilmBookmarkModel.find(In(FilmBookmarkModel.user_id, user_ids))
+            .sort(+FilmBookmarkModel.user_id, +FilmBookmarkModel.created_at)
+            .project(BookmarkActivityView)
+        )
+        cursor = find.motor_cursor.batch_size(batch_size)
+        async for doc in cursor:
+            yield doc if raw else BookmarkActivityView.model_validate(doc)
+
     async def add_film_to_bookmarks(self, film_id: str, user_id: str) -> None:
         """
         Добавляет фильм в закладки.
@@ -61,6 +92,9 @@ class BookmarksService:
             await FilmBookmarkModel(
                 film_id=UUID(film_id), user_id=UUID(user_id)
             ).insert()
+            await casher.invalidate_tags(
+                USER_BOOKMARKS_TAG.format(user_id=user_id)
+            )
         except DuplicateKeyError:
             pass
         except Exception as ex:
@@ -69,6 +103,39 @@ class BookmarksService:
                 detail=f"error while adding film bookmark: {ex}",
             ) from ex
 
+    async def add_films_to_bookmarks(
+        self, film_ids: List[str], user_id: str
+    ) -> List[BulkItemResult]:
+        """
+        Добавляет фильмы в закладки одним unordered insert_many.
+
+        Уже добавленные фильмы получают статус EXISTS.
+        """
+        results: dict[int, BulkItemResult] = {}
+        items = parse_uuid_items(film_ids, results)
+        user_uuid = UUID(user_id)
+        try:
+            inserted = await insert_items(
+                FilmBookmarkModel,
+                items,
+                lambda film_id, seq: FilmBookmarkModel(
+                    film_id=film_id, user_id=user_uuid, monotonic_seq=seq
+                ),
+                results,
+            )
+        except Exception as ex:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"error while adding film bookmarks: {ex}",
+            ) from ex
+
+        if inserted:
+            await publish_activities(inserted)
+            await casher.invalidate_tags(
+                USER_BOOKMARKS_TAG.format(user_id=user_id)
+            )
+        return [results[index] for index in range(len(film_ids))]
+
     async def delete_film_from_bookmarks(
         self, film_id: str, user_id: str
     ) -> None:
@@ -80,6 +147,9 @@ class BookmarksService:
                 FilmBookmarkModel.user_id == UUID(user_id),
                 FilmBookmarkModel.film_id == UUID(film_id),
             ).delete()
+            await casher.invalidate_tags(
+                USER_BOOKMARKS_TAG.format(user_id=user_id)
+            )
         except Exception as ex:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -0,0 +1,10 @@
+"""
+Теги записей кэша сервисов.
+
+Чтения помечают записи тегами через cache_method, а записи
+в MongoDB сбрасывают их через invalidate_tags.
+"""
+
+FILM_SCORES_TAG = "film:{film_id}:scores"
+FILM_REVIEWS_TAG = "film:{film_id}:reviews"
+USER_BOOKMARKS_TAG = "user:{user_id}:bookmarks"
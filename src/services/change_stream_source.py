@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from contextlib import ExitStack
+from typing import Any, AsyncIterator, Optional
+
+from pymongo.errors import OperationFailure
+
+from db.casher import AbstractCache
+from services.activity_filter import ActivityFilter
+from services.model_poller import ActivitySink, ModelPoller
+
+logger = logging.getLogger(__name__)
+
+# $changeStream недоступен: MongoDB запущена без replica set
+CHANGE_STREAM_UNSUPPORTED = 40573
+# сохраненный resume token больше не может быть использован
+RESUME_TOKEN_ERRORS = frozenset((260, 280, 286))
+
+# пауза перед повторным открытием потока изменений после ошибки
+RECONNECT_DELAY = 1
+
+
+class ChangeStreamSource:  # noqa: WPS214
+    """
+    Источник активностей на потоках изменений MongoDB (collection.watch).
+
+    Вставки приходят от сервера сразу после записи, без периодических
+    запросов по диапазону monotonic_seq. Resume token сохраняется в кэш,
+    поэтому после переподключения или перезапуска чтение продолжается
+    с места остановки. Если MongoDB запущена без replica set, источник
+    переключается на обычный опрос ModelPoller.
+
+    Attributes:
+        poller (ModelPoller): Опрос модели для догрузки и режима без
+            потоков изменений.
+        cacher (AbstractCache): Хранилище resume token.
+        token_save_interval (float): Как часто сохранять resume token.
+        position (int): monotonic_seq последнего опубликованного события.
+        ready (asyncio.Event): Установлено, пока позиция чтения известна.
+    """
+
+    def __init__(
+        self,
+        poller: ModelPoller,
+        cacher: AbstractCache,
+        token_save_interval: float = 1.0,
+    ) -> None:
+        self.poller = poller
+        self.cacher = cacher
+        self.token_save_interval = token_save_interval
+        model_name = poller.model_class.__name__
+        self.token_key = (
+            "UGC_service:src:services:change_stream_source:"
+            f"{model_name}:resume_token"
+        )
+
+        self.ready = asyncio.Event()
+        self._position = 0
+        self._token: Any = None
+        self._polling = False
+        self._token_saved_at: float = 0
+
+    @property
+    def model_class(self) -> Any:
+        return self.poller.model_class
+
+    @property
+    def position(self) -> int:
+        if self._polling:
+            return self.poller.position
+        return self._position
+
+    def backfill(
+        self,
+        after: int,
+        until: int,
+        activity_filter: Optional[ActivityFilter] = None,
+    ) -> AsyncIterator[Any]:
+        return self.poller.backfill(after, until, activity_filter)
+
+    async def current_position(self) -> int:
+        await self.ready.wait()
+        if self._polling:
+            return await self.poller.current_position()
+        return self._position
+
+    async def run(self, sink: ActivitySink, start: Optional[int] = None):
+        self._token = await self.cacher.get(self.token_key)
+        with ExitStack() as stack:
+            stack.callback(self._stop)
+            while not await self._follow(sink, start):
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _follow(self, sink: ActivitySink, start: Optional[int]) -> bool:
+        """
+        Читает поток изменений до ошибки.
+
+        Returns:
+            bool: True, если источник перешел на опрос и опрос завершен.
+        """
+        try:
+            await self._watch(sink, start)
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as ex:
+            return await self._handle_failure(ex, sink, start)
+        except Exception as ex:
+            logger.error("Change stream error: %s", ex)
+        return False
+
+    async def _handle_failure(
+        self, ex: OperationFailure, sink: ActivitySink, start: Optional[int]
+    ) -> bool:
+        if ex.code == CHANGE_STREAM_UNSUPPORTED:
+            logger.warning(
+                "Change streams are not supported, falling back to polling %s",
+                self.model_class.__name__,
+            )
+            await self._poll(sink, start)
+            return True
+        logger.error("Change stream error: %s", ex)
+        if ex.code in RESUME_TOKEN_ERRORS:
+            self._token = None
+            await self.cacher.delete_many([self.token_key])
+        return False
+
+    async def _watch(self, sink: ActivitySink, start: Optional[int]) -> None:
+        collection = self.model_class.get_motor_collection()
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        async with collection.watch(
+            pipeline, resume_after=self._token
+        ) as stream:
+            # позиция читается после открытия потока: вставка между
+            # ними придет дважды, но не потеряется
+            latest = await self.poller.latest_seq()
+            if not self.ready.is_set():
+                self._position = latest if start is None else start
+                self.ready.set()
+            if self._token is None:
+                await self._resync(sink, latest)
+
+            async for change in stream:
+                seq, item = self._transform(change["fullDocument"])
+                self._position = max(self._position, seq or 0)
+                await sink.put(item)
+                await self._save_token(stream.resume_token)
+
+    def _transform(self, doc: dict) -> tuple[Optional[int], Any]:
+        if self.poller.raw_transformer is not None:
+            return doc.get("monotonic_seq"), self.poller.raw_transformer(doc)
+        model = self.model_class.model_validate(doc)
+        return model.monotonic_seq, self.poller.transformer(model)
+
+    async def _resync(self, sink: ActivitySink, until: int) -> None:
+        """
+        Догружает из MongoDB вставки, сделанные без открытого потока.
+        """
+        after = self._position
+        self._position = max(after, until)
+        async for item in self.poller.backfill(after, until):
+            await sink.put(item)
+
+    async def _save_token(self, token: Any) -> None:
+        self._token = token
+        now = time.monotonic()
+        if now - self._token_saved_at < self.token_save_interval:
+            return
+        self._token_saved_at = now
+        await self.cacher.set(self.token_key, token)
+
+    async def _poll(self, sink: ActivitySink, start: Optional[int]) -> None:
+        self._polling = True
+        self.ready.set()
+        await self.poller.run(sink, start)
+
+    def _stop(self) -> None:
+        # после остановки позиция чтения снова неизвестна
+        self._polling = False
+        self.ready.clear()
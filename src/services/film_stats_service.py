@@ -0,0 +1,161 @@
+import logging
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Iterable, Optional
+from uuid import UUID
+
+from pymongo import UpdateOne
+
+from models.mongo_models import FilmScoreModel, FilmStatsModel
+
+logger = logging.getLogger(__name__)
+
+
+def score_inc(
+    new_score: Optional[int], old_score: Optional[int]
+) -> dict[str, int]:
+    """
+    Приращения агрегатов фильма при замене old_score на new_score.
+    """
+    inc: dict[str, int] = {}
+    if new_score is not None:
+        inc["score_sum"] = new_score
+        inc["score_count"] = 1
+        inc[f"score_hist.{new_score}"] = 1
+    if old_score is not None:
+        inc["score_sum"] = inc.get("score_sum", 0) - old_score
+        inc["score_count"] = inc.get("score_count", 0) - 1
+        hist_key = f"score_hist.{old_score}"
+        inc[hist_key] = inc.get(hist_key, 0) - 1
+
+    return {key: value for key, value in inc.items() if value}
+
+
+class FilmStatsService:
+    """
+    Сервис для работы с агрегатами оценок фильмов в MongoDB.
+
+    Хранит для каждого фильма сумму, количество оценок и гистограмму,
+    обновляя их атомарными $inc при каждом изменении оценки.
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализирует сервис агрегатов оценок.
+        """
+        pass
+
+    async def apply_score_change(
+        self,
+        film_id: UUID,
+        new_score: Optional[int] = None,
+        old_score: Optional[int] = None,
+    ) -> None:
+        """
+        Применяет изменение оценки фильма к агрегатам.
+
+        Args:
+            film_id (UUID): ID фильма.
+            new_score (int | None): Новая оценка (None - оценка удалена).
+            old_score (int | None): Прежняя оценка (None - оценки не было).
+        """
+        inc = score_inc(new_score, old_score)
+        if not inc:
+            return
+
+        await FilmStatsModel.get_motor_collection().update_one(
+            {"_id": film_id}, {"$inc": inc}, upsert=True
+        )
+
+    async def apply_score_changes(
+        self,
+        changes: Iterable[tuple[UUID, Optional[int], Optional[int]]],
+    ) -> None:
+        """
+        Применяет изменения оценок нескольких фильмов одним bulk_write.
+
+        Args:
+            changes (Iterable): Тройки (ID фильма, новая оценка,
+                прежняя оценка) в смысле apply_score_change.
+        """
+        incs: dict[UUID, Counter[str]] = defaultdict(Counter)
+        for film_id, new_score, old_score in changes:
+            incs[film_id].update(score_inc(new_score, old_score))
+
+        requests = []
+        for film_id, film_inc in incs.items():
+            inc = {key: value for key, value in film_inc.items() if value}
+            if inc:
+                requests.append(
+                    UpdateOne({"_id": film_id}, {"$inc": inc}, upsert=True)
+                )
+        if requests:
+            await FilmStatsModel.get_motor_collection().bulk_write(
+                requests, ordered=False
+            )
+
+    async def get_average_score(self, film_id: UUID) -> float | None:
+        """
+        Возвращает среднюю оценку фильма по агрегатам.
+        """
+        stats = await FilmStatsModel.get_motor_collection().find_one(
+            {"_id": film_id}, {"score_sum": 1, "score_count": 1}
+        )
+        if not stats or stats.get("score_count", 0) <= 0:
+            return None
+        return stats["score_sum"] / stats["score_count"]
+
+    async def rebuild(self) -> None:
+        """
+        Пересчитывает агрегаты по всем оценкам фильмов.
+
+        Используется для первичного заполнения коллекции film_stats
+        (миграция 0001_film_stats в migrate.py) и восстановления после
+        ручных правок данных. Агрегаты заменяются целиком, и $inc,
+        примененные во время пересчета, теряются, поэтому запись
+        оценок на это время останавливается.
+        """
+        await FilmScoreModel.aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": {
+                            "film_id": "$film_id",
+                            "score": "$film_score",
+                        },
+                        "count": {"$sum": 1},
+                    }
+                },
+                {
+                    "$group": {
+                        "_id": "$_id.film_id",
+                        "score_sum": {
+                            "$sum": {"$multiply": ["$_id.score", "$count"]}
+                        },
+                        "score_count": {"$sum": "$count"},
+                        "score_hist": {
+                            "$push": {
+                                "k": {"$toString": "$_id.score"},
+                                "v": "$count",
+                            }
+                        },
+                    }
+                },
+                {"$set": {"score_hist": {"$arrayToObject": "$score_hist"}}},
+                {
+                    "$merge": {
+                        "into": FilmStatsModel.get_settings().name,
+                        "whenMatched": "replace",
+                    }
+                },
+            ]
+        ).to_list()
+        logger.info("Film stats rebuilt")
+
+
+@lru_cache
+def get_film_stats_service() -> FilmStatsService:
+    """
+    Возвращает экземпляр сервиса агрегатов оценок фильмов.
+    """
+    return FilmStatsService()
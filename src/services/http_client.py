@@ -0,0 +1,83 @@
+import logging
+import time
+from typing import Optional
+
+import aiohttp
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RetryBudget:
+    """
+    Ограничивает долю повторных запросов относительно всех запросов
+    в скользящем окне, чтобы повторы не усиливали нагрузку на
+    деградировавший сервис.
+
+    Attributes:
+        ratio (float): Допустимая доля повторов от числа запросов.
+        min_retries (int): Число повторов, разрешенных в окне всегда.
+        window (float): Длина окна в секундах.
+    """
+
+    def __init__(
+        self, ratio: float, min_retries: int = 10, window: float = 10.0
+    ) -> None:
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.requests = 0
+        self.retries = 0
+        self.window_start = time.monotonic()
+
+    def record_request(self) -> None:
+        """
+        Учитывает первичный запрос.
+        """
+        self._roll_window()
+        self.requests += 1
+
+    def try_retry(self) -> bool:
+        """
+        Резервирует повтор, если бюджет не исчерпан.
+        """
+        self._roll_window()
+        if self.retries >= self.min_retries + self.ratio * self.requests:
+            return False
+        self.retries += 1
+        return True
+
+    def _roll_window(self) -> None:
+        now = time.monotonic()
+        if now - self.window_start >= self.window:
+            self.window_start = now
+            self.requests = 0
+            self.retries = 0
+
+
+http_session: Optional[aiohttp.ClientSession] = None
+
+retry_budget = RetryBudget(ratio=settings.AUTH_HTTP_RETRY_BUDGET_RATIO)
+
+
+async def get_http_session() -> aiohttp.ClientSession | None:
+    return http_session
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """
+    Создает долгоживущую HTTP-сессию с ограниченным пулом
+    keep-alive соединений и таймаутами из настроек.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=settings.AUTH_HTTP_POOL_SIZE,
+        limit_per_host=settings.AUTH_HTTP_POOL_SIZE_PER_HOST,
+        keepalive_timeout=settings.AUTH_HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=settings.AUTH_HTTP_TIMEOUT,
+        connect=settings.AUTH_HTTP_CONNECT_TIMEOUT,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
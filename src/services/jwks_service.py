@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import aiohttp
+import jwt
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# минимальный интервал между внеплановыми обновлениями ключей
+# при появлении токена с неизвестным kid (ротация ключей в Auth)
+MIN_FORCED_REFRESH_INTERVAL = 30
+
+
+class JWKSKeyStore:  # noqa: WPS214, WPS230
+    """
+    Кэш публичных ключей Auth сервиса (JWKS) с фоновым обновлением.
+
+    Позволяет проверять подпись и claims токена локально,
+    без запроса в Auth сервис и Redis на каждый запрос.
+
+    Attributes:
+        jwks_url (str): Адрес JWKS Auth сервиса.
+        refresh_interval (int): Период обновления ключей в секундах.
+        algorithms (list[str]): Допустимые алгоритмы подписи.
+        audience (str): Ожидаемое значение claim aud (пусто - не проверять).
+        issuer (str): Ожидаемое значение claim iss (пусто - не проверять).
+        session (ClientSession | None): Общая HTTP-сессия приложения.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        jwks_url: str,
+        refresh_interval: int = 300,
+        algorithms: Optional[list[str]] = None,
+        audience: str = "",
+        issuer: str = "",
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> None:
+        self.jwks_url = jwks_url
+        self.session = session
+        self.refresh_interval = refresh_interval
+        self.algorithms = algorithms or ["RS256"]
+        self.audience = audience
+        self.issuer = issuer
+
+        self.keys: dict[Optional[str], jwt.PyJWK] = {}
+        self.refreshed_at: float = 0
+        self.forced_refresh_at: float = 0
+        self._task: Optional[asyncio.Task] = None
+        self._forced_refresh: Optional[asyncio.Task] = None
+
+    def set_jwks(self, jwks: dict) -> None:
+        """
+        Заменяет набор ключей содержимым JWKS документа.
+        """
+        key_set = jwt.PyJWKSet.from_dict(jwks)
+        self.keys = {key.key_id: key for key in key_set.keys}
+        self.refreshed_at = time.monotonic()
+        logger.info("JWKS loaded: %s keys", len(self.keys))
+
+    async def refresh(self) -> None:
+        """
+        Загружает актуальный набор ключей из Auth сервиса.
+        """
+        if self.session is None:
+            timeout = aiohttp.ClientTimeout(total=10)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                jwks = await self._fetch(session)
+        else:
+            jwks = await self._fetch(self.session)
+        self.set_jwks(jwks)
+
+    async def run(self) -> None:
+        """
+        Периодически обновляет ключи, ошибки обновления логируются,
+        а ранее загруженные ключи продолжают использоваться.
+        """
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self._refresh_safely()
+
+    def start(self) -> None:
+        """
+        Запускает фоновое обновление ключей.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновое обновление ключей.
+        """
+        tasks = list(filter(None, (self._task, self._forced_refresh)))
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._forced_refresh = None
+
+    def get_key(self, token: str) -> Optional[jwt.PyJWK]:
+        """
+        Возвращает ключ для проверки подписи токена по его kid.
+
+        Если ключ не найден, планирует внеплановое обновление JWKS
+        и возвращает None.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.keys.get(kid)
+        if key is None and kid is None and len(self.keys) == 1:
+            key = next(iter(self.keys.values()))
+        if key is None:
+            self._schedule_refresh()
+        return key
+
+    def decode(self, token: str, key: jwt.PyJWK) -> dict:
+        """
+        Проверяет подпись, exp, aud и iss токена и возвращает payload.
+
+        Raises:
+            jwt.InvalidTokenError: Если токен недействителен.
+        """
+        required = ["exp"]
+        if self.audience:
+            required.append("aud")
+        if self.issuer:
+            required.append("iss")
+
+        return jwt.decode(
+            token,
+            key=key,
+            algorithms=self.algorithms,
+            audience=self.audience or None,
+            issuer=self.issuer or None,
+            options={
+                "require": required,
+                "verify_aud": bool(self.audience),
+            },
+        )
+
+    async def _fetch(self, session: aiohttp.ClientSession) -> dict:
+        async with session.get(self.jwks_url) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def _schedule_refresh(self) -> None:
+        if self._forced_refresh and not self._forced_refresh.done():
+            return
+        now = time.monotonic()
+        if now - self.forced_refresh_at < MIN_FORCED_REFRESH_INTERVAL:
+            return
+        self.forced_refresh_at = now
+        self._forced_refresh = asyncio.create_task(self._refresh_safely())
+
+    async def _refresh_safely(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as ex:
+            logger.error("Error refreshing JWKS: %s", ex)
+
+
+jwks_store: Optional[JWKSKeyStore] = None
+
+
+async def get_jwks_store() -> JWKSKeyStore | None:
+    return jwks_store
+
+
+def create_jwks_store(
+    session: Optional[aiohttp.ClientSession] = None,
+) -> JWKSKeyStore:
+    """
+    Создает хранилище ключей по настройкам приложения.
+    """
+    return JWKSKeyStore(
+        session=session,
+        jwks_url=settings.AUTH_JWKS_URL,
+        refresh_interval=settings.AUTH_JWKS_REFRESH_INTERVAL,
+        algorithms=settings.AUTH_JWT_ALGORITHMS,
+        audience=settings.AUTH_JWT_AUDIENCE,
+        issuer=settings.AUTH_JWT_ISSUER,
+    )
@@ -1,81 +1,257 @@
 import asyncio
 import logging
-from typing import Type, Callable
+from contextlib import ExitStack
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Optional,
+    Protocol,
+    Type,
+)
 
 from beanie import Document
-from beanie.odm.enums import SortDirection
-from beanie.odm.operators.find.comparison import GT
+from beanie.odm.operators.find import BaseFindOperator
+from beanie.odm.operators.find.comparison import GT, LTE
+from beanie.odm.queries.find import FindMany
+from pydantic import BaseModel
+from pymongo import DESCENDING
 
-from db.casher import get_cacher
+from services.activity_filter import ActivityFilter
 
 logger = logging.getLogger(__name__)
 
 
-class ModelPoller:
-    def __init__(
+class ActivitySink(Protocol):
+    """Приемник преобразованных документов (asyncio.Queue, ActivityHub)"""
+
+    async def put(self, item: Any) -> None:
+        pass
+
+
+class ActivitySource(Protocol):
+    """
+    Источник активностей хаба: ModelPoller или живой источник поверх
+    него (StreamSource, ChangeStreamSource)
+    """
+
+    @property
+    def model_class(self) -> Any:
+        pass
+
+    @property
+    def position(self) -> int:
+        pass
+
+    async def run(
+            self, sink: ActivitySink, start: Optional[int] = None
+    ) -> None:
+        pass
+
+    async def current_position(self) -> int:
+        pass
+
+    def backfill(
+            self,
+            after: int,
+            until: int,
+            activity_filter: Optional[ActivityFilter] = None,
+    ) -> AsyncIterator[Any]:
+        pass
+
+
+class ModelPoller:  # noqa: WPS214, WPS230
+    """
+    Источник новых документов модели по возрастанию monotonic_seq.
+
+    Живой опрос (run) хранит позицию в памяти и начинает с последнего
+    документа коллекции. Пропущенное потребителем догружается отдельно
+    через backfill от его собственной сохраненной позиции.
+
+    Документы читаются по индексу monotonic_seq в порядке этого индекса,
+    так что порядок чтения совпадает с позицией опроса. Если задана
+    projection_model, из MongoDB читаются только ее поля. Если задан
+    raw_transformer, прочитанные документы не валидируются моделью и
+    передаются ему как есть (dict курсора Motor).
+
+    Если номера выдаются блоками (db.sequence), документ с меньшим
+    номером может быть записан позже документа с большим. Тогда
+    задается watermark, и опрос продвигается только до номера,
+    ниже которого незавершенных вставок не осталось.
+
+    Attributes:
+        transformer (Callable): Преобразование экземпляра модели
+            (или projection_model) в активность.
+        projection_model (type[BaseModel] | None): Проекция документа
+            с полями, которые нужны transformer.
+        raw_transformer (Callable | None): Преобразование документа
+            MongoDB в активность в обход модели.
+        watermark (Callable | None): Граница записанных номеров.
+        position (int): monotonic_seq последнего опубликованного документа.
+        ready (asyncio.Event): Установлено, пока позиция опроса известна.
+    """
+
+    def __init__(  # noqa: WPS211
             self,
             model_class: Type[Document],
             transformer: Callable,
             interval: int = 5,
-            batch_size: int = 1000
+            batch_size: int = 1000,
+            projection_model: Optional[Type[BaseModel]] = None,
+            raw_transformer: Optional[Callable] = None,
+            watermark: Optional[Callable[[], Awaitable[int]]] = None,
     ):
         self.model_class = model_class
         self.transformer = transformer
         self.interval = interval
         self.batch_size = batch_size
+        self.projection_model = projection_model
+        self.raw_transformer = raw_transformer
+        self.watermark = watermark
+
+        self.position = 0
+        self.ready = asyncio.Event()
+
+    async def latest_seq(self) -> int:
+        doc = await self.model_class.get_motor_collection().find_one(
+            {},
+            projection={"_id": 0, "monotonic_seq": 1},
+            sort=[("monotonic_seq", DESCENDING)],
+        )
+        seq = (doc.get("monotonic_seq") or 0) if doc else 0
+        if self.watermark is not None:
+            seq = min(seq, await self.watermark())
+        return seq
+
+    async def committed_seq(self) -> Optional[int]:
+        """
+        Граница, до которой может продвинуться живой опрос
+        (None - без ограничения).
+        """
+        if self.watermark is None:
+            return None
+        try:
+            return await self.watermark()
+        except Exception as ex:
+            logger.error("Error reading sequence watermark: %s", ex)
+            return self.position
 
-        cacher_path = "UGC_service:src:services:model_poller:"
-        self.last_monotonic_key = (cacher_path
-                                   + f"{model_class.__name__}"
-                                     f":last_monotonic_key")
+    async def fetch(
+            self,
+            after: int,
+            until: Optional[int] = None,
+            activity_filter: Optional[ActivityFilter] = None,
+    ) -> list[Any]:
+        """
+        Возвращает очередную пачку документов с after < seq <= until,
+        удовлетворяющих activity_filter.
+        """
+        query: list[BaseFindOperator] = [
+            GT(self.model_class.monotonic_seq, after)
+        ]
+        if until is not None:
+            query.append(LTE(self.model_class.monotonic_seq, until))
+        if activity_filter is not None:
+            query.extend(activity_filter.query())
+
+        find: FindMany[Any] = self.model_class.find(*query)
+        if self.projection_model is not None:
+            find = find.project(self.projection_model)
 
-    async def run(self, queue: asyncio.Queue):
-        cacher = await get_cacher()
+        find = find.sort(+self.model_class.monotonic_seq).limit(
+            self.batch_size
+        )
+        if self.raw_transformer is not None:
+            return await find.motor_cursor.to_list(self.batch_size)
+        return await find.to_list(self.batch_size)
 
-        if cacher is None:
-            raise ValueError("Cacher not initialized")
+    def seq(self, doc: Any) -> int:
+        """
+        monotonic_seq документа, прочитанного fetch.
+        """
+        if self.raw_transformer is not None:
+            return doc["monotonic_seq"]
+        return doc.monotonic_seq
 
-        while True:
+    def transform(self, doc: Any) -> Any:
+        """
+        Активность из документа, прочитанного fetch.
+        """
+        if self.raw_transformer is not None:
+            return self.raw_transformer(doc)
+        return self.transformer(doc)
+
+    async def backfill(
+            self,
+            after: int,
+            until: int,
+            activity_filter: Optional[ActivityFilter] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Выдает преобразованные документы с after < seq <= until,
+        удовлетворяющие activity_filter.
+        """
+        while after < until:
+            docs = await self.fetch(after, until, activity_filter)
+            for doc in docs:
+                yield self.transform(doc)
+
+            if len(docs) < self.batch_size:
+                return
+            after = self.seq(docs[-1])
+
+    async def current_position(self) -> int:
+        """
+        Возвращает позицию живого опроса, дождавшись его запуска.
+        """
+        await self.ready.wait()
+        return self.position
+
+    async def run(self, sink: ActivitySink, start: Optional[int] = None):
+        """
+        Публикует новые документы в sink. Ошибка чтения не останавливает
+        опрос: она логируется, и чтение повторяется через interval.
+        """
+        while start is None:
+            start = await self._attempt(self.latest_seq)
+            if start is None:
+                await asyncio.sleep(self.interval)
+        self.position = start
+        self.ready.set()
+
+        with ExitStack() as stack:
+            stack.callback(self.ready.clear)
             while True:
-                last_monotonic = await cacher.get(self.last_monotonic_key)
-
-                if not last_monotonic:
-                    last_monotonic = 0
-
-                query = GT(self.model_class.monotonic_seq, last_monotonic)
-
-                docs = await (
-                    self.model_class.find(query).sort(
-                        [
-                            (
-                                self.model_class.created_at,
-                                SortDirection.ASCENDING
-                            ),
-                            (
-                                self.model_class.id,
-                                SortDirection.ASCENDING
-                            ),  # type: ignore[list-item]
-                        ]
-                    ).limit(self.batch_size).to_list(self.batch_size)
-                )
-
-                if not docs:
-                    break
-
-                last_doc = docs[-1]
-                last_monotonic = last_doc.monotonic_seq
-
-                await cacher.set(
-                    self.last_monotonic_key,
-                    last_monotonic,
-                    expire=None,
-                    raise_exc=True
-                )
-
-                for d in docs:
-                    await queue.put(self.transformer(d))
-
-                if len(docs) < self.batch_size:
-                    break
-
-            await asyncio.sleep(self.interval)
+                await self._attempt(self._publish_new, sink)
+                await asyncio.sleep(self.interval)
+
+    async def _attempt(
+            self, step: Callable[..., Awaitable[Any]], *args: Any
+    ) -> Any:
+        """
+        Выполняет шаг опроса; при ошибке логирует ее и возвращает None.
+        """
+        try:
+            return await step(*args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            logger.error(
+                "Error polling %s: %s", self.model_class.__name__, ex
+            )
+        return None
+
+    async def _publish_new(self, sink: ActivitySink) -> None:
+        until = await self.committed_seq()
+        while until is None or self.position < until:
+            docs = await self.fetch(self.position, until)
+            for doc in docs:
+                # позиция сдвигается до публикации, чтобы новый
+                # подписчик догрузил документ через backfill,
+                # если не получит его из хаба
+                self.position = max(self.position, self.seq(doc))
+                await sink.put(self.transform(doc))
+
+            if len(docs) < self.batch_size:
+                return
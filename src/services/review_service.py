@@ -1,22 +1,35 @@
 import logging
 from functools import lru_cache
-from typing import Any, List
+from types import MappingProxyType
+from typing import Any, AsyncIterator, List, Mapping, Optional
 from uuid import UUID
 
+from beanie.operators import In
 from fastapi import HTTPException, status
+from pymongo import UpdateOne
 from pymongo.errors import DuplicateKeyError
 
-from models.mongo_models import (
-    FilmReviewModel,
-    FilmScoreModel,
-    ReviewLikeModel,
-)
+from db import casher
+from db.cache_method import cache_method
+from models.mongo_models import FilmReviewModel, ReviewLikeModel
+from models.projections import ReviewActivityView
+from schemas.bulk import BulkItemResult
 from schemas.reviews import FilmReviewGRPC
+from services.cache_tags import FILM_REVIEWS_TAG, FILM_SCORES_TAG
+from services.film_stats_service import get_film_stats_service
+from services.score_service import get_film_score_service
+from utils.bulk import insert_items, parse_uuid_items
+from utils.paginator import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
+# соответствие полей сортировки API полям документа рецензии
+REVIEW_SORT_FIELDS: Mapping[str, str] = MappingProxyType(
+    {"likes": "likes_count"}
+)
+
 
-class ReviewsService:
+class ReviewsService:  # noqa: WPS214
     """
     Сервис для работы с отзывами фильмов в MongoDB.
     """
@@ -27,7 +40,11 @@ class ReviewsService:
         """
         Инициализирует сервис отзывов.
         """
-        pass
+        self.film_stats = get_film_stats_service()
+
+    @property
+    def cacher(self) -> Optional[casher.AbstractCache]:
+        return casher.cacher
 
     async def add_review(
         self,
@@ -60,22 +77,18 @@ class ReviewsService:
                 detail=f"error while adding film score: {ex}",
             ) from ex
 
-        # ищем, существует ли отдельная оценка фильма
-        existing_film_score = await FilmScoreModel.find_one(
-            FilmScoreModel.user_id == UUID(user_id),
-            FilmScoreModel.film_id == UUID(film_id),
+        # отдельная оценка фильма создается или обновляется одним upsert
+        film_uuid = UUID(film_id)
+        old_score = await get_film_score_service().upsert_score(
+            film_uuid, UUID(user_id), film_score
+        )
+        await self.film_stats.apply_score_change(
+            film_uuid, new_score=film_score, old_score=old_score
+        )
+        await casher.invalidate_tags(
+            FILM_SCORES_TAG.format(film_id=film_id),
+            FILM_REVIEWS_TAG.format(film_id=film_id),
         )
-        # если существует отдельная оценка - обновляем отдельную оценку
-        if existing_film_score:
-            existing_film_score.film_score = film_score
-            await existing_film_score.save()
-        # если нет отдельной оценки - добавляем
-        else:
-            await FilmScoreModel(
-                film_id=UUID(film_id),
-                user_id=UUID(user_id),
-                film_score=film_score,
-            ).insert()
 
         return None
 
@@ -84,10 +97,13 @@ class ReviewsService:
         Удаляет отзыв о фильме.
         """
         try:
-            await FilmReviewModel.find_one(
-                FilmScoreModel.id == UUID(review_id),
-                FilmScoreModel.user_id == UUID(user_id),
-            ).delete()
+            collection = FilmReviewModel.get_motor_collection()
+            deleted = await collection.find_one_and_delete(
+                {"_id": UUID(review_id), "user_id": UUID(user_id)},
+                projection={"film_id": 1},
+            )
+            if deleted:
+                await self._invalidate_film_reviews(deleted["film_id"])
         except Exception as ex:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -106,6 +122,8 @@ class ReviewsService:
                 user_id=UUID(user_id),
             ).insert()
 
+            await self._change_likes_count(UUID(review_id), 1)
+
         except DuplicateKeyError as ex:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -120,42 +138,117 @@ class ReviewsService:
 
         return None
 
+    async def like_reviews(
+        self, review_ids: List[str], user_id: str
+    ) -> List[BulkItemResult]:
+        """
+        Добавляет лайки к нескольким отзывам.
+
+        Лайки вставляются одним unordered insert_many, счетчики лайков
+        увеличиваются одним bulk_write. Уже лайкнутые отзывы получают
+        статус EXISTS.
+        """
+        results: dict[int, BulkItemResult] = {}
+        items = parse_uuid_items(review_ids, results)
+        user_uuid = UUID(user_id)
+        try:
+            liked = await insert_items(
+                ReviewLikeModel,
+                items,
+                lambda review_id, seq: ReviewLikeModel(
+                    review_id=review_id, user_id=user_uuid, monotonic_seq=seq
+                ),
+                results,
+            )
+        except Exception as ex:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"error while adding review likes: {ex}",
+            ) from ex
+
+        if liked:
+            await self._increment_likes_counts(
+                [like.review_id for like in liked]
+            )
+        return [results[index] for index in range(len(review_ids))]
+
+    async def unlike_review(self, review_id: str, user_id: str) -> None:
+        """
+        Удаляет лайк пользователя с отзыва о фильме.
+        """
+        try:
+            result = await ReviewLikeModel.get_motor_collection().delete_one(
+                {"review_id": UUID(review_id), "user_id": UUID(user_id)}
+            )
+
+            if result.deleted_count:
+                await self._change_likes_count(UUID(review_id), -1)
+
+        except Exception as ex:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"error while deleting review like: {ex}",
+            ) from ex
+
+        return None
+
+    @cache_method("cacher", expire=3600, tags=(FILM_REVIEWS_TAG,))
     async def get_reviews(
         self,
         film_id: str,
         sort_field: str = "likes",
         page_number: int = 1,
         page_size: int = 50,
+        after: Optional[str] = None,
     ) -> list[dict[str, Any]]:
         """
         Возвращает список отзывов о фильме.
+
+        Сортировка по лайкам обслуживается индексом film_likes_idx
+        по денормализованному полю likes_count, без $lookup.
+        Если передан курсор after, страница начинается сразу после
+        записи из курсора диапазонным условием по индексу, без $skip.
         """
+        sort_key = REVIEW_SORT_FIELDS.get(sort_field, sort_field)
+        match: dict[str, Any] = {"film_id": UUID(film_id)}
+        pipeline: list[dict[str, Any]] = [
+            {"$match": match},
+            {"$sort": {sort_key: -1, "_id": 1}},
+        ]
+
+        if after is None:
+            pipeline.append({"$skip": (page_number - 1) * page_size})
+        else:
+            try:
+                last_value, last_id = decode_cursor(after, int, str)
+                last_id = UUID(last_id)
+            except (ValueError, TypeError, AttributeError) as ex:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="invalid cursor",
+                ) from ex
+            match["$or"] = [
+                {sort_key: {"$lt": last_value}},
+                {sort_key: last_value, "_id": {"$gt": last_id}},
+            ]
+
         try:
             review_list = await FilmReviewModel.aggregate(
-                [
-                    {"$match": {"film_id": UUID(film_id)}},
-                    {
-                        "$lookup": {
-                            "from": "review_likes",
-                            "localField": "_id",
-                            "foreignField": "review_id",
-                            "as": "likes",
-                        }
-                    },
+                pipeline
+                + [
+                    {"$limit": page_size},
                     {
                         "$project": {
+                            "_id": 0,
                             "id": "$_id",
                             "film_id": "$film_id",
                             "user_id": "$user_id",
                             "review_text": "$review_text",
                             "film_score": "$film_score",
                             "created_at": "$created_at",
-                            "likes": {"$size": "$likes"},
+                            "likes": {"$ifNull": ["$likes_count", 0]},
                         }
                     },
-                    {"$sort": {sort_field: -1}},
-                    {"$skip": (page_number - 1) * page_size},
-                    {"$limit": page_size},
                 ]
             ).to_list()
 
@@ -167,6 +260,45 @@ class ReviewsService:
                 detail=f"error finding film bookmarks: {ex}",
             ) from ex
 
+    def next_reviews_cursor(
+        self, reviews: list[dict[str, Any]], page_size: int
+    ) -> Optional[str]:
+        """
+        Возвращает курсор следующей страницы отзывов, отсортированных
+        по лайкам, или None, если страница последняя.
+        """
+        if len(reviews) < page_size:
+            return None
+        last = reviews[-1]
+        return encode_cursor(last["likes"], str(last["id"]))
+
+    async def rebuild_likes_count(self) -> None:
+        """
+        Пересчитывает счетчики лайков рецензий по коллекции review_likes.
+
+        Используется для первичного заполнения поля likes_count
+        (миграция 0002_review_likes_count в migrate.py): без него
+        рецензия не попадает под условия курсора get_reviews.
+        Счетчики заменяются целиком, поэтому лайки на время
+        пересчета не принимаются.
+        """
+        await FilmReviewModel.get_motor_collection().update_many(
+            {"likes_count": {"$exists": False}}, {"$set": {"likes_count": 0}}
+        )
+        await ReviewLikeModel.aggregate(
+            [
+                {"$group": {"_id": "$review_id", "likes_count": {"$sum": 1}}},
+                {
+                    "$merge": {
+                        "into": FilmReviewModel.get_settings().name,
+                        "whenMatched": "merge",
+                        "whenNotMatched": "discard",
+                    }
+                },
+            ]
+        ).to_list()
+        logger.info("Review likes counters rebuilt")
+
     async def get_user_reviews(self, user_id: str) -> List[FilmReviewGRPC]:
         try:
             user_uuid = UUID(user_id)
@@ -188,6 +320,53 @@ class ReviewsService:
                 detail=f"Ошибка при получении отзывов пользователя: {ex}",
             ) from ex
 
+    async def iter_users_reviews(
+        self, user_ids: List[UUID], batch_size: int, raw: bool = False
+    ) -> AsyncIterator[ReviewActivityView | dict]:
+        """
+        Стримит отзывы пользователей курсором MongoDB, читая
+        по batch_size документов, в порядке (user_id, created_at).
+        С raw=True отдает документы курсора Motor без валидации.
+        """
+        find = (
+            FilmReviewModel.find(In(FilmReviewModel.user_id, user_ids))
+            .sort(+FilmReviewModel.user_id, +FilmReviewModel.created_at)
+            .project(ReviewActivityView)
+        )
+        cursor = find.motor_cursor.batch_size(batch_size)
+        async for doc in cursor:
+            yield doc if raw else ReviewActivityView.model_validate(doc)
+
+    async def _change_likes_count(self, review_id: UUID, delta: int) -> None:
+        collection = FilmReviewModel.get_motor_collection()
+        review = await collection.find_one_and_update(
+            {"_id": review_id},
+            {"$inc": {"likes_count": delta}},
+            projection={"film_id": 1},
+        )
+        if review:
+            await self._invalidate_film_reviews(review["film_id"])
+
+    async def _increment_likes_counts(self, review_ids: List[UUID]) -> None:
+        collection = FilmReviewModel.get_motor_collection()
+        await collection.bulk_write(
+            [
+                UpdateOne({"_id": review_id}, {"$inc": {"likes_count": 1}})
+                for review_id in review_ids
+            ],
+            ordered=False,
+        )
+        film_ids = await collection.distinct(
+            "film_id", {"_id": {"$in": review_ids}}
+        )
+        if film_ids:
+            await casher.invalidate_tags(
+                *(FILM_REVIEWS_TAG.format(film_id=fid) for fid in film_ids)
+            )
+
+    async def _invalidate_film_reviews(self, film_id: UUID) -> None:
+        await casher.invalidate_tags(FILM_REVIEWS_TAG.format(film_id=film_id))
+
 
 @lru_cache
 def get_review_service() -> ReviewsService:
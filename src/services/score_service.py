@@ -1,18 +1,34 @@
+import asyncio
 import logging
 from functools import lru_cache
-from typing import List
+from typing import AsyncIterator, List, Optional
 from uuid import UUID
 
+from beanie.operators import In
 from fastapi import HTTPException, status
+from pymongo import ReturnDocument, UpdateOne
 from pymongo.errors import DuplicateKeyError
 
+from db import casher
+from db.cache_method import cache_method
+from db.outbox import publish_activities, publish_activity
 from models.mongo_models import FilmReviewModel, FilmScoreModel
-from schemas.scores import ScoreGRPC
+from models.projections import ScoreActivityView
+from schemas.bulk import BulkItemResult, BulkItemStatus
+from schemas.scores import AddScore, ScoreGRPC
+from services.cache_tags import FILM_REVIEWS_TAG, FILM_SCORES_TAG
+from services.film_stats_service import get_film_stats_service
+from utils.bulk import (
+    DUPLICATE_KEY_ERROR,
+    bulk_write_unordered,
+    parse_uuid_items,
+    write_error_result,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class FilmScoreService:
+class FilmScoreService:  # noqa: WPS214
     """
     Сервис для работы с оценками фильмов в MongoDB.
     """
@@ -23,7 +39,34 @@ class FilmScoreService:
         """
         Инициализирует сервис оценок фильмов.
         """
-        pass
+        self.film_stats = get_film_stats_service()
+
+    @property
+    def cacher(self) -> Optional[casher.AbstractCache]:
+        return casher.cacher
+
+    async def upsert_score(
+        self, film_id: UUID, user_id: UUID, film_score: int
+    ) -> Optional[int]:
+        """
+        Атомарно добавляет или обновляет оценку фильма одним запросом.
+
+        Returns:
+            int | None: Прежняя оценка пользователя или None,
+            если оценка была создана.
+        """
+        async with FilmScoreModel.reserve_monotonic_seqs() as seqs:
+            score = FilmScoreModel(
+                film_id=film_id,
+                user_id=user_id,
+                film_score=film_score,
+                monotonic_seq=seqs[0],
+            )
+            created, old_score = await self._write_score(score)
+
+        if created:
+            await publish_activity(score)
+        return old_score
 
     async def add_score(
         self, film_id: str, user_id: str, film_score: int
@@ -32,19 +75,26 @@ class FilmScoreService:
         Добавляет или обновляет оценку фильма.
         """
         try:
+            film_uuid, user_uuid = UUID(film_id), UUID(user_id)
 
-            await FilmScoreModel(
-                film_id=film_id, user_id=user_id, film_score=film_score
-            ).insert()
+            old_score = await self.upsert_score(
+                film_uuid, user_uuid, film_score
+            )
 
-        except DuplicateKeyError:
-            existing_film_score = await FilmScoreModel.find_one(
-                FilmScoreModel.user_id == UUID(user_id),
-                FilmScoreModel.film_id == UUID(film_id),
+            # агрегаты и оценка в рецензии обновляются одним батчем
+            await asyncio.gather(
+                self.film_stats.apply_score_change(
+                    film_uuid, new_score=film_score, old_score=old_score
+                ),
+                FilmReviewModel.get_motor_collection().update_one(
+                    {"film_id": film_uuid, "user_id": user_uuid},
+                    {"$set": {"film_score": film_score}},
+                ),
+            )
+            await casher.invalidate_tags(
+                FILM_SCORES_TAG.format(film_id=film_id),
+                FILM_REVIEWS_TAG.format(film_id=film_id),
             )
-            if existing_film_score:
-                existing_film_score.film_score = film_score
-                await existing_film_score.save()
 
         except Exception as ex:
             raise HTTPException(
@@ -52,13 +102,46 @@ class FilmScoreService:
                 detail=f"error while adding film score: {ex}",
             ) from ex
 
-        existing_film_review = await FilmReviewModel.find_one(
-            FilmScoreModel.user_id == UUID(user_id),
-            FilmScoreModel.film_id == UUID(film_id),
-        )
-        if existing_film_review:
-            existing_film_review.film_score = film_score
-            await existing_film_review.save()
+    async def add_scores(
+        self, items: List[AddScore], user_id: str
+    ) -> List[BulkItemResult]:
+        """
+        Добавляет или обновляет несколько оценок пользователя.
+
+        Номера monotonic_seq выделяются одним диапазоном, оценки
+        пишутся одним неупорядоченным bulk_write (см. _upsert_scores).
+        Агрегаты и оценки в рецензиях обновляются двумя bulk_write.
+        Если фильм встречается в пакете несколько раз, записывается
+        последняя оценка, а предыдущие получают статус SUPERSEDED.
+        """
+        results: dict[int, BulkItemResult] = {}
+        parsed = parse_uuid_items([item.film_id for item in items], results)
+        latest = {film_uuid: position for position, film_uuid in parsed}
+        for index, film_id in parsed:
+            if latest[film_id] != index:
+                results[index] = BulkItemResult(
+                    index=index,
+                    status=BulkItemStatus.SUPERSEDED,
+                    detail=f"superseded by item {latest[film_id]}",
+                )
+
+        if latest:
+            try:
+                await self._upsert_scores(
+                    UUID(user_id),
+                    [
+                        (position, film_uuid, items[position].film_score)
+                        for film_uuid, position in latest.items()
+                    ],
+                    results,
+                )
+            except Exception as ex:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"error while adding film scores: {ex}",
+                ) from ex
+
+        return [results[position] for position in range(len(items))]
 
     async def delete_score(
         self,
@@ -69,16 +152,25 @@ class FilmScoreService:
         Удаляет оценку фильма.
         """
         try:
-            await FilmScoreModel.find_one(
-                FilmScoreModel.user_id == UUID(user_id),
-                FilmScoreModel.film_id == UUID(film_id),
-            ).delete()
+            collection = FilmScoreModel.get_motor_collection()
+            deleted = await collection.find_one_and_delete(
+                {"film_id": UUID(film_id), "user_id": UUID(user_id)},
+                projection={"film_score": 1},
+            )
+            if deleted:
+                await self.film_stats.apply_score_change(
+                    UUID(film_id), old_score=deleted["film_score"]
+                )
+                await casher.invalidate_tags(
+                    FILM_SCORES_TAG.format(film_id=film_id)
+                )
         except Exception as ex:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"error while deleting film score: {ex}",
             ) from ex
 
+    @cache_method("cacher", expire=3600, tags=(FILM_SCORES_TAG,))
     async def get_score(
         self,
         film_id: str,
@@ -87,9 +179,7 @@ class FilmScoreService:
         Возвращает среднюю оценку фильма.
         """
 
-        avg_score = await FilmScoreModel.find(
-            FilmScoreModel.film_id == UUID(film_id),
-        ).avg(FilmScoreModel.film_score)
+        avg_score = await self.film_stats.get_average_score(UUID(film_id))
         return avg_score
 
     async def get_user_scores(self, user_id: str) -> List[ScoreGRPC]:
@@ -110,6 +200,297 @@ class FilmScoreService:
                 detail=f"Ошибка при получении оценок пользователя: {ex}",
             ) from ex
 
+    async def iter_users_scores(
+        self, user_ids: List[UUID], batch_size: int, raw: bool = False
+    ) -> AsyncIterator[ScoreActivityView | dict]:
+        """
+        Стримит оценки пользователей курсором MongoDB, читая
+        по batch_size документов, в порядке (user_id, created_at).
+        С raw=True отдает документы курсора Motor без валидации.
+        """
+        find = (
+            FilmScoreModel.find(In(FilmScoreModel.user_id, user_ids))
+            .sort(+FilmScoreModel.user_id, +FilmScoreModel.created_at)
+            .project(ScoreActivityView)
+        )
+        cursor = find.motor_cursor.batch_size(batch_size)
+        async for doc in cursor:
+            yield doc if raw else ScoreActivityView.model_validate(doc)
+
+    async def _write_score(
+        self, score: FilmScoreModel
+    ) -> tuple[bool, Optional[int]]:
+        """
+        Upsert оценки, атомарно возвращающий прежнее значение.
+
+        Returns:
+            tuple: Создан ли документ и прежняя оценка пользователя.
+        """
+        collection = FilmScoreModel.get_motor_collection()
+        query = {"film_id": score.film_id, "user_id": score.user_id}
+        update = {"$set": {"film_score": score.film_score}}
+
+        try:
+            previous = await collection.find_one_and_update(
+                query,
+                {
+                    **update,
+                    "$setOnInsert": {
+                        "_id": score.id,
+                        "created_at": score.created_at,
+                        "monotonic_seq": score.monotonic_seq,
+                    },
+                },
+                projection={"film_score": 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            # параллельный upsert успел вставить документ - он уже есть,
+            # повторный запрос гарантированно станет обновлением
+            previous = await collection.find_one_and_update(
+                query,
+                update,
+                projection={"film_score": 1},
+                return_document=ReturnDocument.BEFORE,
+            )
+            return False, previous["film_score"] if previous else None
+
+        return previous is None, previous["film_score"] if previous else None
+
+    async def _upsert_scores(
+        self,
+        user_id: UUID,
+        film_scores: list[tuple[int, UUID, int]],
+        results: dict[int, BulkItemResult],
+    ) -> None:
+        """
+        Записывает оценки (индекс элемента, film_id, оценка)
+        и заполняет results по индексам элементов.
+
+        Прежние оценки читаются одним запросом, и оценка обновляется,
+        только если с тех пор не изменилась. Оценки, которые изменили
+        или вставили параллельно, пишутся по одной атомарным upsert,
+        как в upsert_score.
+        """
+        previous = await self._read_scores(
+            user_id, [film_id for _, film_id, _ in film_scores]
+        )
+        reservation = FilmScoreModel.reserve_monotonic_seqs(len(film_scores))
+        async with reservation as seqs:
+            scores = [
+                (
+                    index,
+                    self._build_score(
+                        user_id, film_id, film_score, seq, previous
+                    ),
+                )
+                for (index, film_id, film_score), seq in zip(
+                    film_scores, seqs
+                )
+            ]
+            written = await self._bulk_write_scores(scores, previous)
+
+        await self._apply_written_scores(user_id, written, results)
+
+    async def _apply_written_scores(
+        self,
+        user_id: UUID,
+        written: list[tuple[BulkItemResult, FilmScoreModel, Optional[int]]],
+        results: dict[int, BulkItemResult],
+    ) -> None:
+        """
+        Заполняет results и обновляет агрегаты, оценки в рецензиях
+        и поток активностей по записанным оценкам пакета.
+        """
+        created, changes = [], []
+        for result, score, old_score in written:
+            results[result.index] = result
+            if result.status == BulkItemStatus.CREATED:
+                created.append(score)
+            if result.status != BulkItemStatus.ERROR:
+                changes.append((score.film_id, score.film_score, old_score))
+
+        if not changes:
+            return
+        try:
+            await self._apply_score_changes(user_id, changes)
+        except Exception as ex:
+            # оценки уже записаны, и их результаты остаются верными;
+            # агрегаты восстанавливает FilmStatsService.rebuild
+            logger.exception(
+                "Error applying score changes of user %s: %s", user_id, ex
+            )
+        await publish_activities(created)
+
+    def _build_score(
+        self,
+        user_id: UUID,
+        film_id: UUID,
+        film_score: int,
+        seq: int,
+        previous: dict[UUID, dict],
+    ) -> FilmScoreModel:
+        """
+        Документ оценки пакета с выделенным номером monotonic_seq.
+        Существующая оценка сохраняет свой _id.
+        """
+        score = FilmScoreModel(
+            film_id=film_id,
+            user_id=user_id,
+            film_score=film_score,
+            monotonic_seq=seq,
+        )
+        existing = previous.get(film_id)
+        if existing is not None:
+            score.id = existing["_id"]
+        return score
+
+    async def _bulk_write_scores(
+        self,
+        scores: list[tuple[int, FilmScoreModel]],
+        previous: dict[UUID, dict],
+    ) -> list[tuple[BulkItemResult, FilmScoreModel, Optional[int]]]:
+        """
+        Пишет оценки (индекс элемента, оценка) одним неупорядоченным
+        bulk_write.
+
+        Returns:
+            list: Тройки (результат элемента, оценка, прежняя оценка).
+        """
+        errors, upserted = await bulk_write_unordered(
+            FilmScoreModel,
+            [
+                self._score_upsert(score, previous.get(score.film_id))
+                for _, score in scores
+            ],
+        )
+        return [
+            await self._written_score(
+                index,
+                score,
+                previous.get(score.film_id),
+                errors.get(position),
+                position in upserted,
+            )
+            for position, (index, score) in enumerate(scores)
+        ]
+
+    async def _read_scores(
+        self, user_id: UUID, film_ids: list[UUID]
+    ) -> dict[UUID, dict]:
+        """
+        Текущие оценки пользователя по фильмам: film_id -> документ
+        с _id и film_score.
+        """
+        docs = await FilmScoreModel.get_motor_collection().find(
+            {"user_id": user_id, "film_id": {"$in": film_ids}},
+            projection={"film_id": 1, "film_score": 1},
+        ).to_list(None)
+        return {doc["film_id"]: doc for doc in docs}
+
+    def _score_upsert(
+        self, score: FilmScoreModel, previous: Optional[dict]
+    ) -> UpdateOne:
+        """
+        Операция записи оценки пакета.
+
+        Условие по _id (и прежней оценке) не совпадает, если оценку
+        изменили или вставили параллельно: тогда upsert завершается
+        ошибкой дубликата ключа, и оценка пишется повторно по одной.
+        """
+        query: dict = {"_id": score.id}
+        if previous is not None:
+            query["film_score"] = previous["film_score"]
+        return UpdateOne(
+            query,
+            {
+                "$set": {"film_score": score.film_score},
+                "$setOnInsert": {
+                    "film_id": score.film_id,
+                    "user_id": score.user_id,
+                    "created_at": score.created_at,
+                    "monotonic_seq": score.monotonic_seq,
+                },
+            },
+            upsert=True,
+        )
+
+    async def _written_score(
+        self,
+        index: int,
+        score: FilmScoreModel,
+        previous: Optional[dict],
+        error: Optional[dict],
+        is_upserted: bool,
+    ) -> tuple[BulkItemResult, FilmScoreModel, Optional[int]]:
+        """
+        Результат элемента по итогу его операции в bulk_write.
+
+        Returns:
+            tuple: Результат элемента, оценка и прежняя оценка.
+        """
+        if error is not None and error.get("code") == DUPLICATE_KEY_ERROR:
+            return await self._write_batch_score(index, score)
+        if error is not None:
+            result = write_error_result(index, error)
+            return result, score, None
+        if is_upserted or previous is None:
+            result = BulkItemResult(index=index, status=BulkItemStatus.CREATED)
+            return result, score, None
+        result = BulkItemResult(index=index, status=BulkItemStatus.UPDATED)
+        return result, score, previous["film_score"]
+
+    async def _write_batch_score(
+        self, index: int, score: FilmScoreModel
+    ) -> tuple[BulkItemResult, FilmScoreModel, Optional[int]]:
+        """
+        Записывает оценку элемента пакета.
+
+        Returns:
+            tuple: Результат элемента, оценка и прежняя оценка.
+        """
+        try:
+            is_created, old_score = await self._write_score(score)
+        except Exception as ex:
+            result = BulkItemResult(
+                index=index, status=BulkItemStatus.ERROR, detail=str(ex)
+            )
+            return result, score, None
+
+        item_status = (
+            BulkItemStatus.CREATED if is_created else BulkItemStatus.UPDATED
+        )
+        result = BulkItemResult(index=index, status=item_status)
+        return result, score, old_score
+
+    async def _apply_score_changes(
+        self,
+        user_id: UUID,
+        changes: list[tuple[UUID, int, Optional[int]]],
+    ) -> None:
+        # агрегаты и оценки в рецензиях обновляются одним батчем
+        await asyncio.gather(
+            self.film_stats.apply_score_changes(changes),
+            FilmReviewModel.get_motor_collection().bulk_write(
+                [
+                    UpdateOne(
+                        {"film_id": film_id, "user_id": user_id},
+                        {"$set": {"film_score": film_score}},
+                    )
+                    for film_id, film_score, _ in changes
+                ],
+                ordered=False,
+            ),
+        )
+        await casher.invalidate_tags(
+            *(
+                tag.format(film_id=film_id)
+                for film_id, _, _ in changes
+                for tag in (FILM_SCORES_TAG, FILM_REVIEWS_TAG)
+            )
+        )
+
 
 @lru_cache
 def get_film_score_service() -> FilmScoreService:
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from contextlib import ExitStack
+from typing import Any, AsyncIterator, Optional
+
+from redis.asyncio import Redis
+
+from db.outbox import stream_key
+from services.activity_filter import ActivityFilter
+from services.model_poller import ActivitySink, ModelPoller
+
+logger = logging.getLogger(__name__)
+
+# пауза перед повторным подключением после ошибки Redis
+RECONNECT_DELAY = 1
+
+
+class StreamSource:  # noqa: WPS214, WPS230
+    """
+    Источник активностей, читающий журнал вставок из Redis Streams.
+
+    Новые события приходят через блокирующий XREAD сразу после
+    вставки, без периодических запросов в MongoDB. ModelPoller
+    используется только для догрузки: пропущенного потребителем
+    и событий, потерянных за время недоступности Redis.
+
+    Attributes:
+        poller (ModelPoller): Опрос модели для догрузки из MongoDB.
+        redis (Redis): Клиент Redis.
+        block_ms (int): Максимальное время ожидания XREAD.
+        count (int): Максимальное количество событий за одно чтение.
+        position (int): monotonic_seq последнего опубликованного события.
+        ready (asyncio.Event): Установлено, пока позиция чтения известна.
+    """
+
+    def __init__(
+        self,
+        poller: ModelPoller,
+        redis: Redis,
+        block_ms: int = 5000,
+        count: int = 1000,
+    ) -> None:
+        self.poller = poller
+        self.redis = redis
+        self.block_ms = block_ms
+        self.count = count
+        self.key = stream_key(poller.model_class.__name__)
+
+        self.position = 0
+        self.ready = asyncio.Event()
+
+    @property
+    def model_class(self) -> Any:
+        return self.poller.model_class
+
+    def backfill(
+        self,
+        after: int,
+        until: int,
+        activity_filter: Optional[ActivityFilter] = None,
+    ) -> AsyncIterator[Any]:
+        return self.poller.backfill(after, until, activity_filter)
+
+    async def current_position(self) -> int:
+        await self.ready.wait()
+        return self.position
+
+    async def run(self, sink: ActivitySink, start: Optional[int] = None):
+        if start is None:
+            start = await self.poller.latest_seq()
+        self.position = start
+        self.ready.set()
+
+        last_id: Optional[bytes] = None
+        with ExitStack() as stack:
+            stack.callback(self.ready.clear)
+            while True:
+                last_id = await self._follow(sink, last_id)
+
+    async def _follow(
+        self, sink: ActivitySink, last_id: Optional[bytes]
+    ) -> Optional[bytes]:
+        """
+        Читает очередные события потока. После ошибки Redis возвращает
+        None, и следующее чтение начинается с догрузки.
+        """
+        try:
+            if last_id is None:
+                last_id = await self._resync(sink)
+            return await self._read(sink, last_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            logger.error("Activity stream read error: %s", ex)
+        await asyncio.sleep(RECONNECT_DELAY)
+        return None
+
+    async def _stream_tail(self) -> bytes:
+        entries = await self.redis.xrevrange(self.key, count=1)
+        return entries[0][0] if entries else b"0-0"
+
+    async def _read(self, sink: ActivitySink, last_id: bytes) -> bytes:
+        response = await self.redis.xread(
+            {self.key: last_id}, count=self.count, block=self.block_ms
+        )
+        for _, entries in response:
+            for entry_id, fields in entries:
+                last_id = entry_id
+                seq = int(fields[b"seq"])
+                doc = self.model_class.model_validate_json(fields[b"doc"])
+                self.position = max(self.position, seq)
+                await sink.put(self.poller.transformer(doc))
+        return last_id
+
+    async def _resync(self, sink: ActivitySink) -> bytes:
+        """
+        Запоминает хвост потока и догружает из MongoDB события,
+        вставленные до него (при старте и после сбоя Redis).
+
+        Хвост читается раньше позиции в MongoDB: событие, записанное
+        между ними, придет дважды, но не потеряется.
+        """
+        last_id = await self._stream_tail()
+        after, until = self.position, await self.poller.latest_seq()
+        # позиция сдвигается до публикации, как и в ModelPoller
+        self.position = max(after, until)
+        async for item in self.poller.backfill(after, until):
+            await sink.put(item)
+        return last_id
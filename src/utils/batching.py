@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Generic,
+    Optional,
+    TypeVar,
+)
+
+ItemT = TypeVar("ItemT")
+
+
+class _NextItem(Generic[ItemT]):
+    """
+    Ожидание следующего элемента источника: не отменяется по таймауту,
+    отменяется при выходе из контекста.
+    """
+
+    def __init__(self, source: AsyncIterator[ItemT]) -> None:
+        self.iterator = aiter(source)
+        self.exhausted = False
+        self._pending: Optional[asyncio.Future] = None
+
+    async def __aenter__(self) -> "_NextItem[ItemT]":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._pending is not None:
+            self._pending.cancel()
+            await asyncio.gather(self._pending, return_exceptions=True)
+
+    async def get(self, deadline: Optional[float]) -> Optional[list[ItemT]]:
+        """
+        Следующий элемент списком: пустым, если источник закончился,
+        None, если элемент не появился до deadline (time.monotonic).
+        """
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(anext(self.iterator))
+        timeout = None if deadline is None else deadline - time.monotonic()
+        if timeout is None or timeout > 0:
+            await asyncio.wait((self._pending,), timeout=timeout)
+        if not self._pending.done():
+            return None
+
+        future = self._pending
+        self._pending = None
+        try:
+            return [future.result()]
+        except StopAsyncIteration:
+            self.exhausted = True
+            return []
+
+
+async def batched(
+    source: AsyncIterator[ItemT], max_size: int, linger: float
+) -> AsyncGenerator[list[ItemT], None]:
+    """
+    Группирует элементы асинхронного источника в пачки.
+
+    Пачка отдается, как только набрано max_size элементов или первый
+    элемент пачки прождал linger секунд. Пока источник отдает элементы
+    без ожидания (догрузка из БД), пачки получаются полными, а редкие
+    живые события задерживаются не больше чем на linger.
+
+    Ожидание следующего элемента не отменяется по таймауту, поэтому
+    источник-генератор не прерывается посреди работы.
+
+    Args:
+        source (AsyncIterator): Источник элементов.
+        max_size (int): Максимальный размер пачки.
+        linger (float): Максимальная задержка первого элемента пачки.
+    """
+    batch: list[ItemT] = []
+    deadline: float = 0
+    async with _NextItem(source) as next_item:
+        while not next_item.exhausted:
+            items = await next_item.get(deadline if batch else None)
+            if items is None:
+                # первый элемент пачки прождал linger
+                yield batch
+                batch = []
+                continue
+            if not batch:
+                deadline = time.monotonic() + linger
+            batch.extend(items)
+            if len(batch) >= max_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
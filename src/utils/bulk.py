@@ -0,0 +1,121 @@
+from typing import Any, Callable, Sequence
+from uuid import UUID
+
+from pymongo.errors import BulkWriteError
+
+from schemas.bulk import BulkItemResult, BulkItemStatus
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def parse_uuid_items(
+    values: Sequence[str], results: dict[int, BulkItemResult]
+) -> list[tuple[int, UUID]]:
+    """
+    Разбирает UUID элементов пакетного запроса.
+
+    Некорректные элементы получают в results статус ERROR,
+    остальные возвращаются парами (индекс элемента, UUID).
+    """
+    items = []
+    for index, value in enumerate(values):
+        try:
+            items.append((index, UUID(value)))
+        except (ValueError, TypeError):
+            results[index] = BulkItemResult(
+                index=index,
+                status=BulkItemStatus.ERROR,
+                detail=f"invalid UUID: {value}",
+            )
+    return items
+
+
+def write_error_result(index: int, error: dict) -> BulkItemResult:
+    """
+    Результат элемента, операция которого завершилась ошибкой записи.
+    """
+    if error.get("code") == DUPLICATE_KEY_ERROR:
+        return BulkItemResult(index=index, status=BulkItemStatus.EXISTS)
+    return BulkItemResult(
+        index=index, status=BulkItemStatus.ERROR, detail=error.get("errmsg")
+    )
+
+
+async def insert_many_unordered(
+    model_class: Any, documents: list
+) -> dict[int, dict]:
+    """
+    Вставляет документы одним insert_many с ordered=False: ошибка одного
+    документа не останавливает вставку остальных. Документы кодируются
+    Beanie так же, как при insert().
+
+    Returns:
+        dict[int, dict]: Ошибки записи по индексам документов.
+    """
+    try:
+        await model_class.insert_many(documents, ordered=False)
+    except BulkWriteError as ex:
+        write_errors = ex.details.get("writeErrors", [])
+        return {error["index"]: error for error in write_errors}
+    return {}
+
+
+async def bulk_write_unordered(
+    model_class: Any, requests: list
+) -> tuple[dict[int, dict], set[int]]:
+    """
+    Выполняет операции одним bulk_write с ordered=False: ошибка одной
+    операции не останавливает остальные.
+
+    Returns:
+        tuple: Ошибки записи по индексам операций и индексы операций,
+        вставивших документ (upsert).
+    """
+    collection = model_class.get_motor_collection()
+    try:
+        result = await collection.bulk_write(requests, ordered=False)
+    except BulkWriteError as ex:
+        write_errors = ex.details.get("writeErrors", [])
+        upserted = ex.details.get("upserted", [])
+        return (
+            {error["index"]: error for error in write_errors},
+            {upsert["index"] for upsert in upserted},
+        )
+    return {}, set(result.upserted_ids)
+
+
+async def insert_items(
+    model_class: Any,
+    items: list[tuple[int, Any]],
+    build: Callable[[Any, int], Any],
+    results: dict[int, BulkItemResult],
+) -> list:
+    """
+    Вставляет документы элементов пакетного запроса.
+
+    Номера monotonic_seq выделяются одним диапазоном, документ
+    строится вызовом build(значение элемента, номер). Элементы
+    получают в results статус CREATED, EXISTS (дубликат) или ERROR.
+
+    Returns:
+        list: Вставленные документы.
+    """
+    if not items:
+        return []
+    async with model_class.reserve_monotonic_seqs(len(items)) as seqs:
+        documents = [
+            build(item_value, seq) for (_, item_value), seq in zip(items, seqs)
+        ]
+        errors = await insert_many_unordered(model_class, documents)
+
+    inserted = []
+    for position, (index, _) in enumerate(items):
+        error = errors.get(position)
+        if error is None:
+            results[index] = BulkItemResult(
+                index=index, status=BulkItemStatus.CREATED
+            )
+            inserted.append(documents[position])
+        else:
+            results[index] = write_error_result(index, error)
+    return inserted
@@ -0,0 +1,44 @@
+import asyncio
+import heapq
+from contextlib import AsyncExitStack
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, TypeVar
+
+ItemT = TypeVar("ItemT")
+
+
+async def merge(
+    *sources: AsyncIterator[ItemT], key: Callable[[ItemT], Any]
+) -> AsyncGenerator[ItemT, None]:
+    """
+    Слияние асинхронных источников, каждый из которых упорядочен по key.
+
+    Аналог heapq.merge: в памяти держится по одному элементу на
+    источник, первые элементы запрашиваются параллельно. При равных
+    ключах раньше отдается элемент источника, переданного раньше.
+    Источники закрываются вместе с результатом.
+    """
+    iterators = [aiter(source) for source in sources]
+    async with AsyncExitStack() as stack:
+        for iterator in iterators:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                stack.push_async_callback(aclose)
+
+        firsts = await asyncio.gather(
+            *(anext(source, None) for source in iterators)
+        )
+        heap = [
+            (key(item), index, item)
+            for index, item in enumerate(firsts)
+            if item is not None
+        ]
+        heapq.heapify(heap)
+
+        while heap:
+            _, index, item = heap[0]
+            yield item
+            following = await anext(iterators[index], None)
+            if following is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (key(following), index, following))
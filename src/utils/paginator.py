@@ -1,3 +1,7 @@
+import base64
+from typing import Any, Optional
+
+import orjson
 from fastapi import Query
 
 
@@ -21,9 +25,57 @@ class PaginateQueryParams:
             ge=1,
             le=100,
         ),
+        after: Optional[str] = Query(
+            None,
+            title="Cursor.",
+            description=(
+                "Курсор следующей страницы из заголовка X-Next-Cursor. "
+                "Если передан, page_number игнорируется"
+            ),
+        ),
     ):
         """
         Инициализирует класс пагинации ответов.
         """
         self.page_number = page_number
         self.page_size = page_size
+        self.after = after
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Кодирует ключ сортировки последней записи в непрозрачный курсор.
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode()
+
+
+def decode_cursor(cursor: str, *types: type) -> list[Any]:
+    """
+    Декодирует курсор, созданный encode_cursor.
+
+    Курсор приходит от клиента, поэтому, если переданы types,
+    он должен содержать по одному значению каждого типа в том же
+    порядке.
+
+    Raises:
+        ValueError: Если курсор поврежден или значения не тех типов.
+    """
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as ex:
+        raise ValueError(f"invalid cursor: {cursor}") from ex
+
+    if not isinstance(values, list):
+        raise ValueError(f"invalid cursor: {cursor}")
+    if types and not _has_types(values, types):
+        raise ValueError(f"invalid cursor: {cursor}")
+
+    return values
+
+
+def _has_types(values: list[Any], types: tuple[type, ...]) -> bool:
+    # bool - подкласс int, но в курсоре это всегда подделка
+    return len(values) == len(types) and all(
+        isinstance(value, value_type) and not isinstance(value, bool)
+        for value, value_type in zip(values, types)
+    )
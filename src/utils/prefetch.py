@@ -0,0 +1,73 @@
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Callable, Generic, TypeVar
+
+ItemT = TypeVar("ItemT")
+
+
+class Prefetch(Generic[ItemT]):
+    """
+    Последовательное чтение count асинхронных потоков, из которых
+    window следующих открываются заранее: их первые элементы
+    запрашиваются, пока отдается текущий поток.
+
+    Открытые, но не прочитанные потоки закрываются при выходе
+    из контекста.
+
+    Attributes:
+        open_stream (Callable): Открывает поток по его номеру.
+        count (int): Количество потоков.
+        window (int): Сколько потоков открывается заранее.
+    """
+
+    def __init__(
+        self,
+        open_stream: Callable[[int], AsyncGenerator[ItemT, None]],
+        count: int,
+        window: int,
+    ) -> None:
+        self.open_stream = open_stream
+        self.count = count
+        self.window = window
+        # номер потока -> (поток, запрос его первого элемента)
+        self._opened: dict[
+            int, tuple[AsyncGenerator[ItemT, None], asyncio.Future]
+        ] = {}
+
+    async def __aenter__(self) -> "Prefetch[ItemT]":
+        for index in range(self.window):
+            self._open(index)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        streams = [stream for stream, _ in self._opened.values()]
+        firsts = [first for _, first in self._opened.values()]
+        self._opened.clear()
+        for first in firsts:
+            first.cancel()
+        await asyncio.gather(*firsts, return_exceptions=True)
+        for stream in streams:
+            await stream.aclose()
+
+    async def items(self) -> AsyncGenerator[ItemT, None]:
+        """
+        Отдает элементы всех потоков по порядку номеров.
+        """
+        index = 0
+        while index in self._opened:
+            stream, first = self._opened.pop(index)
+            self._open(index + self.window)
+            index += 1
+            async with aclosing(stream):
+                item = await first
+                if item is not None:
+                    yield item
+                async for following in stream:
+                    yield following
+
+    def _open(self, index: int) -> None:
+        if index < self.count:
+            stream = self.open_stream(index)
+            self._opened[index] = (
+                stream, asyncio.ensure_future(anext(stream, None))
+            )
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+ResultT = TypeVar("ResultT")
+
+
+class SingleFlight:
+    """
+    Объединяет параллельные вызовы с одинаковым ключом в один.
+
+    Первый вызов по ключу запускает корутину, остальные вызовы
+    до ее завершения ждут и получают тот же результат или исключение.
+    Отмена одного из ожидающих не отменяет общий вызов.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[ResultT]]
+    ) -> ResultT:
+        """
+        Выполняет func или присоединяется к уже выполняющемуся вызову.
+
+        Args:
+            key (Hashable): Ключ объединения вызовов.
+            func (Callable): Фабрика корутины, вызывается только
+                если по ключу нет выполняющегося вызова.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # помечаем исключение полученным, даже если все ждущие
+            # были отменены, чтобы не засорять лог asyncio
+            future.exception()
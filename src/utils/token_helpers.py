@@ -23,17 +23,21 @@ async def get_user_id_from_access_token(
 ) -> str:
     """
     Извлекает user_id из Access токена
-    и проверяет валидность токена через Auth Service
+    и проверяет валидность токена локально по ключам Auth Service,
+    либо, если локальная проверка недоступна, через Auth Service
     """
-    try:
-        payload: dict = jwt.decode(
-            access_token,
-            options={"verify_signature": False},
-        )
-    except jwt.InvalidTokenError:
-        raise UnauthorizedExc("Token is invalid")
-
-    await auth_service.verify(access_token)
+    payload = auth_service.verify_local(access_token)
+
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                access_token,
+                options={"verify_signature": False},
+            )
+        except jwt.InvalidTokenError:
+            raise UnauthorizedExc("Token is invalid")
+
+        await auth_service.verify(access_token)
 
     user_id = payload.get("user_id")
     if not user_id:
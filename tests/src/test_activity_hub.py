@@ -0,0 +1,137 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.config import SlowConsumerPolicy
+from services.activity_hub import ActivityHub, Subscription
+
+pytestmark = pytest.mark.asyncio
+
+
+def event(activity_type: str, seq: int) -> SimpleNamespace:
+    return SimpleNamespace(activity_type=activity_type, seq=seq)
+
+
+class FakePoller:
+    """Источник, публикующий заданные элементы один раз."""
+
+    def __init__(self, items: list) -> None:
+        self.items = items
+        self.runs = 0
+
+    async def run(self, sink) -> None:
+        self.runs += 1
+        for item in self.items:
+            await sink.put(item)
+        await asyncio.Event().wait()
+
+
+async def test_pollers_shared_by_subscribers():
+    """Все подписчики получают элементы от одного набора опросов."""
+    items = [event("type", 1), event("type", 2)]
+    poller = FakePoller(items)
+    hub = ActivityHub({"type": poller})
+
+    first = hub.subscribe()
+    second = hub.subscribe()
+    await asyncio.sleep(0)
+
+    assert [await first.get(), await first.get()] == items
+    assert [await second.get(), await second.get()] == items
+    assert poller.runs == 1
+
+    await hub.unsubscribe(first)
+    assert hub._tasks
+    await hub.unsubscribe(second)
+    assert not hub._tasks
+
+
+async def test_failed_poller_is_restarted():
+    """Завершившийся с ошибкой опрос перезапускается новым подписчиком."""
+
+    class FailingPoller(FakePoller):
+        async def run(self, sink) -> None:
+            self.runs += 1
+            raise ConnectionError("down")
+
+    poller = FailingPoller([])
+    hub = ActivityHub({"type": poller})
+
+    hub.subscribe()
+    await asyncio.sleep(0)
+    hub.subscribe()
+    await asyncio.sleep(0)
+
+    assert poller.runs == 2
+    await hub.stop()
+
+
+async def test_only_requested_types_are_polled():
+    """Опрашиваются только запрошенные типы, события отбираются."""
+    ratings = FakePoller([event("rating", 1), event("rating", 2)])
+    reviews = FakePoller([event("review", 1)])
+    hub = ActivityHub({"rating": ratings, "review": reviews})
+
+    subscription = hub.subscribe(
+        activity_types=["rating"], predicate=lambda item: item.seq > 1
+    )
+    await asyncio.sleep(0)
+
+    assert (ratings.runs, reviews.runs) == (1, 0)
+    assert [item.seq for item in subscription.buffer] == [2]
+
+    everything = hub.subscribe()
+    await asyncio.sleep(0)
+    assert reviews.runs == 1
+    assert [item.seq for item in everything.buffer] == [1]
+
+    await hub.unsubscribe(everything)
+    assert list(hub._tasks) == ["rating"]
+    await hub.unsubscribe(subscription)
+
+
+async def test_slow_subscriber_drops_oldest():
+    """Переполненный буфер вытесняет самые старые элементы."""
+    subscription = Subscription(maxsize=2)
+    for item in range(4):
+        await subscription.put(item)
+
+    assert list(subscription.buffer) == [2, 3]
+    assert subscription.dropped == 2
+
+
+async def test_block_policy_waits_for_reader():
+    """При политике BLOCK источник ждет, пока подписчик прочитает."""
+    subscription = Subscription(maxsize=1, policy=SlowConsumerPolicy.BLOCK)
+    await subscription.put(1)
+    blocked = asyncio.ensure_future(subscription.put(2))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+
+    assert await subscription.get() == 1
+    await blocked
+    assert list(subscription.buffer) == [2]
+
+
+async def test_disconnect_policy_marks_overflow():
+    """При политике DISCONNECT переполнение отмечается, а не вытесняет."""
+    subscription = Subscription(
+        maxsize=1, policy=SlowConsumerPolicy.DISCONNECT
+    )
+    await subscription.put(1)
+    await subscription.put(2)
+
+    assert subscription.overflowed
+    assert list(subscription.buffer) == [1]
+
+
+async def test_lag_against_source_positions():
+    """Отставание считается по доставленным позициям подписчика."""
+    poller = FakePoller([])
+    poller.position = 10
+    hub = ActivityHub({"type": poller})
+    subscription = Subscription(maxsize=1)
+    subscription.delivered = {"type": 7}
+
+    assert hub.lag(subscription) == 3
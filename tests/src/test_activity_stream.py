@@ -0,0 +1,239 @@
+import asyncio
+from typing import Any, Optional
+
+import pytest
+
+import grpc_server.generated.activities_pb2 as pb2
+from core.config import SlowConsumerPolicy
+from services.activity_filter import ActivityFilter
+from services.activity_hub import ActivityHub
+from services.activity_stream import (
+    ActivityStream,
+    SlowConsumerError,
+    checkpoint_key,
+)
+
+pytestmark = pytest.mark.asyncio
+
+RATING = pb2.ACTIVITY_TYPE_RATING
+REVIEW = pb2.ACTIVITY_TYPE_REVIEW
+
+
+def rating(seq: int) -> pb2.Activity:
+    return pb2.Activity(id=str(seq), activity_type=RATING, seq=seq)
+
+
+class Model:
+    """Модель-заглушка для имени ключа позиции."""
+
+
+class ReviewModel:
+    """Модель-заглушка рецензий."""
+
+
+class FakePoller:
+    """Опрос с документами seq 1..position в хранилище."""
+
+    model_class = Model
+
+    def __init__(self, position: int, factory=rating) -> None:
+        self.position = position
+        self.factory = factory
+        self.sink = None
+        self.filters: list[Optional[ActivityFilter]] = []
+
+    async def current_position(self) -> int:
+        return self.position
+
+    async def backfill(self, after: int, until: int, activity_filter=None):
+        self.filters.append(activity_filter)
+        for seq in range(after + 1, until + 1):
+            yield self.factory(seq)
+
+    async def run(self, sink) -> None:
+        self.sink = sink
+        await asyncio.Event().wait()
+
+
+class DictCache:
+    """Кэш в памяти с пакетными операциями."""
+
+    def __init__(self, data: Optional[dict] = None) -> None:
+        self.data: dict[str, Any] = dict(data or {})
+        self.set_many_calls = 0
+
+    async def get_many(self, keys, raise_exc=False):  # noqa: WPS615
+        return [self.data.get(key) for key in keys]
+
+    async def set_many(  # noqa: WPS615
+        self, mapping, expire=None, raise_exc=False
+    ):
+        self.set_many_calls += 1
+        self.data.update(mapping)
+
+
+async def take(items, count: int) -> list[int]:
+    return [(await items.__anext__()).seq for _ in range(count)]
+
+
+async def test_consumer_resumes_from_own_checkpoint():
+    """Потребитель догружает пропущенное и продолжает живыми событиями."""
+    poller = FakePoller(position=5)
+    hub = ActivityHub({RATING: poller})
+    key = checkpoint_key("Model", "profiles")
+    cache = DictCache({key: 3, checkpoint_key("Model"): 1})
+    stream = ActivityStream(hub, cache, "profiles", commit_batch=2)
+
+    items = stream.items()
+    assert await take(items, 2) == [4, 5]
+    await asyncio.sleep(0)
+
+    await poller.sink.put(rating(5))
+    await poller.sink.put(rating(6))
+    assert await take(items, 1) == [6]
+
+    await items.aclose()
+    await stream.close()
+    # последнее событие не подтверждено запросом следующего
+    assert cache.data[key] == 5
+    assert cache.data[checkpoint_key("Model")] == 1
+    assert not hub.subscribers
+
+
+async def test_resume_position_overrides_checkpoint():
+    """Явная позиция из запроса важнее сохраненной."""
+    poller = FakePoller(position=4)
+    hub = ActivityHub({RATING: poller})
+    cache = DictCache({checkpoint_key("Model"): 1})
+    stream = ActivityStream(hub, cache, resume_from={RATING: 3})
+
+    items = stream.items()
+    assert await take(items, 1) == [4]
+
+    await items.aclose()
+    await stream.close()
+    assert cache.data[checkpoint_key("Model")] == 3
+
+
+async def test_lagging_consumer_catches_up_from_store():
+    """После переполнения буфера вытесненное догружается из хранилища."""
+    poller = FakePoller(position=0)
+    hub = ActivityHub({RATING: poller}, buffer_size=2)
+    stream = ActivityStream(hub, DictCache())
+
+    items = stream.items()
+    first = asyncio.ensure_future(items.__anext__())
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    await poller.sink.put(rating(1))
+    assert (await first).seq == 1
+
+    poller.position = 5
+    for seq in range(2, 6):
+        await poller.sink.put(rating(seq))
+    assert await take(items, 4) == [2, 3, 4, 5]
+
+    await items.aclose()
+    await stream.close()
+
+
+async def test_filter_limits_types_and_live_events():
+    """Фильтр запускает опрос только нужных типов и отбирает события."""
+    ratings = FakePoller(position=5)
+    reviews = FakePoller(
+        position=1,
+        factory=lambda seq: pb2.Activity(activity_type=REVIEW, seq=seq),
+    )
+    reviews.model_class = ReviewModel
+    hub = ActivityHub({RATING: ratings, REVIEW: reviews})
+    activity_filter = ActivityFilter(activity_types={REVIEW})
+    cache = DictCache()
+    stream = ActivityStream(
+        hub,
+        cache,
+        activity_filter=activity_filter,
+        predicate=lambda item: item.seq % 2 == 0,
+        resume_from={RATING: 1},
+    )
+
+    items = stream.items()
+    assert await take(items, 1) == [1]
+    await asyncio.sleep(0)
+    assert ratings.sink is None
+    assert reviews.filters == [activity_filter]
+
+    for seq in range(2, 5):
+        await reviews.sink.put(pb2.Activity(activity_type=REVIEW, seq=seq))
+    assert await take(items, 2) == [2, 4]
+
+    await items.aclose()
+    await stream.close()
+    assert stream.positions == {REVIEW: 2}
+    assert list(cache.data) == [checkpoint_key("ReviewModel")]
+
+
+async def test_drop_oldest_yields_gap_marker():
+    """При DROP_OLDEST вместо вытесненного отдается маркер пропуска."""
+    poller = FakePoller(position=0)
+    hub = ActivityHub(
+        {RATING: poller}, buffer_size=2, policy=SlowConsumerPolicy.DROP_OLDEST
+    )
+    stream = ActivityStream(
+        hub,
+        DictCache(),
+        gap_factory=lambda dropped: pb2.Activity(seq=-dropped),
+    )
+
+    items = stream.items()
+    first = asyncio.ensure_future(items.__anext__())
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    for seq in range(1, 5):
+        await poller.sink.put(rating(seq))
+
+    # первые два события вытеснены до чтения
+    assert (await first).seq == -2
+    assert await take(items, 2) == [3, 4]
+
+    await items.aclose()
+    await stream.close()
+
+
+async def test_disconnect_reports_resume_positions():
+    """При DISCONNECT поток завершается с позициями для возобновления."""
+    poller = FakePoller(position=0)
+    hub = ActivityHub(
+        {RATING: poller}, buffer_size=1, policy=SlowConsumerPolicy.DISCONNECT
+    )
+    stream = ActivityStream(hub, DictCache())
+
+    items = stream.items()
+    first = asyncio.ensure_future(items.__anext__())
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    await poller.sink.put(rating(1))
+    assert (await first).seq == 1
+
+    await poller.sink.put(rating(2))
+    await poller.sink.put(rating(3))
+    with pytest.raises(SlowConsumerError) as exc_info:
+        await items.__anext__()
+
+    assert exc_info.value.positions == {RATING: 1}
+    await stream.close()
+
+
+async def test_batches_commit_after_batch_is_sent():
+    """Позиция сдвигается только после отправки пачки."""
+    poller = FakePoller(position=5)
+    hub = ActivityHub({RATING: poller})
+    cache = DictCache()
+    stream = ActivityStream(hub, cache, "profiles", commit_batch=1)
+
+    batches = stream.batches(max_size=2, linger=10)
+    assert [item.seq for item in await anext(batches)] == [1, 2]
+    assert [item.seq for item in await anext(batches)] == [3, 4]
+
+    await batches.aclose()
+    await stream.close()
+    assert cache.data[checkpoint_key("Model", "profiles")] == 2
@@ -1,6 +1,17 @@
-from unittest.mock import patch
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock, patch
 
+import aiohttp
+import jwt
 import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from exceptions.errors import UnauthorizedError, UnauthorizedExc
+from services.auth_service import AuthService, verify_token
+from services.jwks_service import JWKSKeyStore
 
 pytestmark = pytest.mark.asyncio
 
@@ -19,7 +30,184 @@ async def test_verify_token_success(
     await auth_service.verify(token)
 
     mock_cacher.get.assert_called_once_with("def verify: valid_token")
-    mock_verify_token.assert_called_once_with(token)
+    mock_verify_token.assert_called_once_with(token, session=None)
     mock_cacher.set.assert_called_once_with(
         "def verify: valid_token", True, expire=10
     )
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    """Создает локальную пару ключей RSA для подписи токенов."""
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def jwks_store(rsa_key):
+    """Создает хранилище JWKS с публичным ключом тестовой пары."""
+    jwk = json.loads(RSAAlgorithm.to_jwk(rsa_key.public_key()))
+    jwk.update({"kid": "test-key", "alg": "RS256", "use": "sig"})
+    store = JWKSKeyStore(jwks_url="", audience="ugc", issuer="auth")
+    store.set_jwks({"keys": [jwk]})
+    return store
+
+
+def make_token(rsa_key, kid: str = "test-key", **claims) -> str:
+    payload = {
+        "user_id": "80e6ffa2-8c3e-4d1a-8433-8cca669888a5",
+        "aud": "ugc",
+        "iss": "auth",
+        "exp": int(time.time()) + 60,
+    }
+    payload.update(claims)
+    return jwt.encode(
+        payload, rsa_key, algorithm="RS256", headers={"kid": kid}
+    )
+
+
+async def test_verify_local_success(rsa_key, jwks_store, mock_cacher):
+    """Тестирует локальную проверку подписи токена по JWKS."""
+    auth_service = AuthService(cacher=mock_cacher, jwks_store=jwks_store)
+
+    payload = auth_service.verify_local(make_token(rsa_key))
+
+    assert payload["user_id"] == "80e6ffa2-8c3e-4d1a-8433-8cca669888a5"
+    mock_cacher.get.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"exp": int(time.time()) - 10},
+        {"aud": "other"},
+        {"iss": "other"},
+    ],
+)
+async def test_verify_local_invalid_claims(
+    claims, rsa_key, jwks_store, mock_cacher
+):
+    """Тестирует отказ для истекшего токена и чужих aud/iss."""
+    auth_service = AuthService(cacher=mock_cacher, jwks_store=jwks_store)
+
+    with pytest.raises(UnauthorizedExc):
+        auth_service.verify_local(make_token(rsa_key, **claims))
+
+
+async def test_verify_local_bad_signature(jwks_store, mock_cacher):
+    """Тестирует отказ для токена, подписанного чужим ключом."""
+    auth_service = AuthService(cacher=mock_cacher, jwks_store=jwks_store)
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    with pytest.raises(UnauthorizedExc):
+        auth_service.verify_local(make_token(other_key))
+
+
+async def test_verify_local_unknown_kid_fallback(
+    rsa_key, jwks_store, mock_cacher
+):
+    """Тестирует переход к удаленной проверке при неизвестном ключе."""
+    auth_service = AuthService(cacher=mock_cacher, jwks_store=jwks_store)
+    jwks_store.forced_refresh_at = time.monotonic()
+
+    assert auth_service.verify_local(make_token(rsa_key, kid="new")) is None
+
+
+class FakeResponse:
+    """Ответ Auth сервиса с заданным HTTP статусом."""
+
+    def __init__(self, status: int) -> None:
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        return None
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(
+                MagicMock(), (), status=self.status
+            )
+
+
+@patch("services.auth_service.settings.AUTH_HTTP_RETRY_BACKOFF", 0)
+async def test_verify_token_retries_server_errors():
+    """Тестирует повтор запроса в Auth сервис после ответа 5xx."""
+    session = MagicMock()
+    session.post.side_effect = [FakeResponse(503), FakeResponse(200)]
+
+    await verify_token("token", session=session)
+
+    assert session.post.call_count == 2
+
+
+async def test_verify_token_does_not_retry_rejection():
+    """Тестирует отказ без повторов, если Auth сервис отклонил токен."""
+    session = MagicMock()
+    session.post.side_effect = [FakeResponse(401), FakeResponse(200)]
+
+    with pytest.raises(UnauthorizedError):
+        await verify_token("token", session=session)
+
+    assert session.post.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "responses",
+    [
+        [FakeResponse(503), FakeResponse(503)],
+        [RuntimeError("unexpected")],
+    ],
+)
+@patch("services.auth_service.settings.AUTH_HTTP_RETRIES", 1)
+@patch("services.auth_service.settings.AUTH_HTTP_RETRY_BACKOFF", 0)
+async def test_verify_token_fails_closed(responses):
+    """
+    Тестирует отказ, если Auth сервис так и не ответил после повторов
+    или запрос завершился непредвиденной ошибкой.
+    """
+    session = MagicMock()
+    session.post.side_effect = responses
+
+    with pytest.raises(UnauthorizedError):
+        await verify_token("token", session=session)
+
+    assert session.post.call_count == len(responses)
+
+
+@patch("services.auth_service.verify_token")
+@patch("services.auth_service.calc_diff")
+async def test_verify_token_single_flight(
+    mock_calc_diff, mock_verify_token, auth_service, mock_cacher
+):
+    """Тестирует объединение параллельных проверок одного токена."""
+    mock_cacher.get.return_value = None
+    mock_calc_diff.return_value = 10
+
+    async def slow_verify(*args, **kwargs):
+        await asyncio.sleep(0.01)
+
+    mock_verify_token.side_effect = slow_verify
+
+    await asyncio.gather(*(auth_service.verify("burst") for _ in range(10)))
+
+    assert mock_verify_token.call_count == 1
+    mock_cacher.set.assert_called_once_with(
+        "def verify: burst", True, expire=10
+    )
+
+
+@patch("services.auth_service.settings.AUTH_VERIFY_LOCK_TIMEOUT", 1)
+@patch("services.auth_service.verify_token")
+async def test_verify_token_waits_for_other_worker(
+    mock_verify_token, auth_service, mock_cacher
+):
+    """Тестирует ожидание результата проверки другим воркером."""
+    mock_cacher.acquire_lock.return_value = None
+    mock_cacher.get.side_effect = [None, None, True]
+
+    await auth_service.verify("locked")
+
+    mock_verify_token.assert_not_called()
+    mock_cacher.release_lock.assert_not_called()
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from utils.batching import batched
+
+pytestmark = pytest.mark.asyncio
+
+
+async def numbers(count: int):
+    for number in range(count):
+        yield number
+
+
+async def test_full_batches_from_ready_source():
+    """Готовый источник режется на полные пачки и остаток."""
+    batches = [batch async for batch in batched(numbers(5), 2, linger=10)]
+
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+async def test_linger_flushes_partial_batch():
+    """Неполная пачка отдается по истечении задержки."""
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def source():
+        while True:
+            yield await queue.get()
+
+    batches = batched(source(), 100, linger=0.01)
+    await queue.put(1)
+    await queue.put(2)
+
+    assert await asyncio.wait_for(anext(batches), 1) == [1, 2]
+    await batches.aclose()
+
+
+async def test_close_stops_source():
+    """Закрытие пачек прерывает ожидание и закрывает источник."""
+    closed = asyncio.Event()
+
+    async def source():
+        try:
+            yield 1
+            await asyncio.Event().wait()
+        except (GeneratorExit, asyncio.CancelledError):
+            closed.set()
+            raise
+
+    batches = batched(source(), 100, linger=0.01)
+    assert await anext(batches) == [1]
+
+    await batches.aclose()
+    assert closed.is_set()
@@ -1,6 +1,13 @@
-from unittest.mock import AsyncMock, patch
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
 
 import pytest
+from pymongo.errors import BulkWriteError
+
+from models.projections import BookmarkActivityView
+from schemas.bulk import BulkItemStatus
+from services.bookmark_service import BookmarksService
 
 pytestmark = pytest.mark.asyncio
 
@@ -61,3 +68,88 @@ async def test_del_bookmark(del_bookmark_films: AsyncMock, client):
 
     assert response.status_code == 204
     assert del_bookmark_films.call_count == 1
+
+
+@patch(
+    "services.bookmark_service.FilmBookmarkModel.insert_many",
+    new_callable=AsyncMock,
+)
+@patch(
+    "services.bookmark_service.FilmBookmarkModel.next_monotonic_seqs",
+    new_callable=AsyncMock,
+)
+@patch("services.bookmark_service.FilmBookmarkModel.get_motor_collection")
+async def test_add_bookmarks_batch(
+    get_collection: MagicMock, next_seqs: AsyncMock, insert_many: AsyncMock
+):
+    """
+    Пакет закладок вставляется одним unordered insert_many, дубликаты
+    не мешают вставке остальных и получают статус EXISTS.
+    """
+    next_seqs.return_value = range(1, 3)
+    insert_many.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 1, "code": 11000, "errmsg": "dup"}]}
+    )
+    film_ids = [str(uuid4()), "bad", str(uuid4())]
+
+    results = await BookmarksService().add_films_to_bookmarks(
+        film_ids, str(uuid4())
+    )
+
+    assert [result.status for result in results] == [
+        BulkItemStatus.CREATED,
+        BulkItemStatus.ERROR,
+        BulkItemStatus.EXISTS,
+    ]
+    assert insert_many.call_args.kwargs == {"ordered": False}
+    docs = insert_many.call_args.args[0]
+    assert [doc.monotonic_seq for doc in docs] == [1, 2]
+    assert [str(doc.film_id) for doc in docs] == [film_ids[0], film_ids[2]]
+
+
+class AsyncCursor:
+    """Курсор Motor из списка документов."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+@pytest.mark.parametrize("raw", [True, False])
+@patch("services.bookmark_service.In")
+@patch("services.bookmark_service.FilmBookmarkModel")
+async def test_iter_users_bookmarks(model: MagicMock, _, raw: bool):
+    """
+    Закладки читаются курсором с заданным batch_size; без raw
+    документы курсора валидируются в BookmarkActivityView.
+    """
+    user_id = uuid4()
+    doc = {
+        "_id": uuid4(),
+        "user_id": user_id,
+        "film_id": uuid4(),
+        "created_at": datetime.now(),
+        "monotonic_seq": 7,
+    }
+    find = model.find.return_value
+    query = find.sort.return_value.project.return_value
+    query.motor_cursor.batch_size.return_value = AsyncCursor([doc])
+
+    bookmarks = [
+        bookmark
+        async for bookmark in BookmarksService().iter_users_bookmarks(
+            [user_id], batch_size=50, raw=raw
+        )
+    ]
+
+    query.motor_cursor.batch_size.assert_called_once_with(50)
+    if raw:
+        assert bookmarks == [doc]
+    else:
+        assert bookmarks == [BookmarkActivityView.model_validate(doc)]
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+import pytest
+
+from db.cache_method import cache_method
+
+pytestmark = pytest.mark.asyncio
+
+
+class InMemoryCache:
+    """Кэш в памяти с блокировками для тестов декоратора."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+        self.locks: set[str] = set()
+        self.tags: dict[str, set[str]] = {}
+        self.versions: dict[str, int] = {}
+
+    async def get(self, key: str, raise_exc: bool = False) -> Optional[Any]:
+        return self.data.get(key)
+
+    async def set(  # noqa: WPS211
+        self,
+        key,
+        value,
+        expire=None,
+        raise_exc=False,
+        tags=(),
+        tag_versions=None,
+    ) -> None:
+        if tag_versions is not None:
+            if tag_versions != await self.tag_versions(*tags):
+                return
+        self.data[key] = value
+        for tag in tags:
+            self.tags.setdefault(tag, set()).add(key)
+
+    async def acquire_lock(self, key: str, expire: float) -> Optional[str]:
+        if key in self.locks:
+            return None
+        self.locks.add(key)
+        return key
+
+    async def release_lock(self, key: str, token: str) -> None:
+        self.locks.discard(key)
+
+    async def invalidate_tags(self, *tags: str) -> list[str]:
+        keys = set().union(*(self.tags.pop(tag, set()) for tag in tags))
+        for key in keys:
+            self.data.pop(key, None)
+        for tag in tags:
+            self.versions[tag] = self.versions.get(tag, 0) + 1
+        return list(keys)
+
+    async def tag_versions(self, *tags: str) -> list[int]:
+        return [self.versions.get(tag, 0) for tag in tags]
+
+
+class ScoreService:
+    """Сервис с дорогим кэшируемым вычислением."""
+
+    def __init__(self) -> None:
+        self.cacher = InMemoryCache()
+        self.calls = 0
+
+    @cache_method("cacher", expire=60, stale_ttl=30, beta=0)
+    async def get_score(self, film_id: str) -> int:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return 7 + self.calls
+
+
+async def test_concurrent_misses_compute_once():
+    """Параллельные промахи одного ключа вычисляются один раз."""
+    service = ScoreService()
+
+    results = await asyncio.gather(
+        *(service.get_score("film") for _ in range(10))
+    )
+
+    assert set(results) == {8}
+    assert service.calls == 1
+
+
+async def test_stale_value_served_while_refreshing():
+    """Истекшее значение отдается, пока оно обновляется в фоне."""
+    service = ScoreService()
+    await service.get_score("film")
+    key = next(iter(service.cacher.data))
+    value, delta, _ = service.cacher.data[key]
+    service.cacher.data[key] = [value, delta, time.time() - 1]
+
+    assert await service.get_score("film") == 8
+    await asyncio.sleep(0.05)
+
+    assert service.calls == 2
+    assert await service.get_score("film") == 9
+
+
+async def test_early_refresh_before_expiry():
+    """XFetch обновляет дорогое значение заранее, до истечения."""
+
+    class EagerService(ScoreService):
+        @cache_method("cacher", expire=60, beta=1e9)
+        async def get_score(self, film_id: str) -> int:
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            return self.calls
+
+    service = EagerService()
+    assert await service.get_score("film") == 1
+    assert await service.get_score("film") == 1
+    await asyncio.sleep(0.05)
+
+    assert service.calls == 2
+
+
+async def test_tags_formatted_from_arguments():
+    """Теги записи подставляют аргументы метода и сбрасываются вместе."""
+
+    class TaggedService(ScoreService):
+        @cache_method("cacher", expire=60, beta=0, tags=("film:{film_id}",))
+        async def get_score(self, film_id: str) -> int:
+            self.calls += 1
+            return self.calls
+
+    service = TaggedService()
+    assert await service.get_score("first") == 1
+    assert await service.get_score(film_id="second") == 2
+    assert set(service.cacher.tags) == {"film:first", "film:second"}
+
+    await service.cacher.invalidate_tags("film:first")
+
+    assert await service.get_score("first") == 3
+    assert await service.get_score(film_id="second") == 2
+
+
+async def test_stale_value_skipped_after_invalidation():
+    """Значение, прочитанное до сброса тега, не попадает в кэш."""
+
+    class RacingService(ScoreService):
+        @cache_method("cacher", expire=60, beta=0, tags=("film:{film_id}",))
+        async def get_score(self, film_id: str) -> int:
+            self.calls += 1
+            # запись и сброс тега между чтением и сохранением значения
+            await self.cacher.invalidate_tags(f"film:{film_id}")
+            return self.calls
+
+    service = RacingService()
+    assert await service.get_score("first") == 1
+    assert not service.cacher.data
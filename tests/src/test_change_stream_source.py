@@ -0,0 +1,138 @@
+import asyncio
+from typing import Any, ClassVar, Optional
+from unittest.mock import AsyncMock, call
+
+import pytest
+from pydantic import BaseModel
+from pymongo.errors import OperationFailure
+
+from services.change_stream_source import ChangeStreamSource
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeChangeStream:
+    """Коллекция с потоком изменений, отдающим заданные события."""
+
+    def __init__(
+        self, changes: list, error: Optional[Exception] = None
+    ) -> None:
+        self.changes = changes
+        self.error = error
+        self.resume_token: Any = None
+        self.resume_after: Any = "unset"
+
+    def watch(self, pipeline, resume_after=None) -> "FakeChangeStream":
+        self.resume_after = resume_after
+        return self
+
+    async def __aenter__(self) -> "FakeChangeStream":
+        if self.error is not None:
+            raise self.error
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def __aiter__(self) -> "FakeChangeStream":
+        return self
+
+    async def __anext__(self) -> dict:
+        if not self.changes:
+            raise asyncio.CancelledError()
+        change = self.changes.pop(0)
+        self.resume_token = change["_id"]
+        return change
+
+
+class Score(BaseModel):
+    """Документ оценки с коллекцией-заглушкой."""
+
+    collection: ClassVar[FakeChangeStream]
+    monotonic_seq: int
+
+    @classmethod
+    def get_motor_collection(cls) -> FakeChangeStream:
+        return cls.collection
+
+
+class FakePoller:
+    model_class = Score
+    raw_transformer = None
+
+    def __init__(self, latest: int) -> None:
+        self.latest = latest
+        self.position = 0
+        self.run_start: Any = "not run"
+
+    def transformer(self, doc: Score) -> int:
+        return doc.monotonic_seq
+
+    async def latest_seq(self) -> int:
+        return self.latest
+
+    async def backfill(self, after: int, until: int):
+        for seq in range(after + 1, until + 1):
+            yield seq
+
+    async def run(self, sink, start=None) -> None:
+        self.run_start = start
+
+
+class DictCache:
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+
+    async def get(self, key, raise_exc=False):
+        return self.data.get(key)
+
+    async def set(self, key, value, expire=None, raise_exc=False, tags=()):
+        self.data[key] = value
+
+
+async def test_inserts_read_from_change_stream():
+    """Вставки приходят из потока изменений, resume token сохраняется."""
+    changes = [
+        {"_id": {"_data": "a"}, "fullDocument": {"monotonic_seq": 3}},
+        {"_id": {"_data": "b"}, "fullDocument": {"monotonic_seq": 4}},
+    ]
+    Score.collection = FakeChangeStream(changes)
+    cache = DictCache()
+    source = ChangeStreamSource(FakePoller(latest=2), cache, 0)
+    sink = AsyncMock()
+
+    with pytest.raises(asyncio.CancelledError):
+        await source.run(sink, start=0)
+
+    assert sink.put.await_args_list == [call(seq) for seq in range(1, 5)]
+    assert source.position == 4
+    assert cache.data[source.token_key] == {"_data": "b"}
+    assert Score.collection.resume_after is None
+
+
+async def test_raw_documents_skip_model_validation():
+    """С raw_transformer документ потока не валидируется моделью."""
+    changes = [{"_id": {"_data": "a"}, "fullDocument": {"monotonic_seq": 3}}]
+    Score.collection = FakeChangeStream(changes)
+    poller = FakePoller(latest=3)
+    poller.raw_transformer = lambda doc: -doc["monotonic_seq"]
+    source = ChangeStreamSource(poller, DictCache(), 0)
+    sink = AsyncMock()
+
+    with pytest.raises(asyncio.CancelledError):
+        await source.run(sink, start=3)
+
+    assert sink.put.await_args_list == [call(-3)]
+    assert source.position == 3
+
+
+async def test_falls_back_to_polling():
+    """Без replica set источник переключается на опрос."""
+    error = OperationFailure("not a replica set", code=40573)
+    Score.collection = FakeChangeStream([], error)
+    poller = FakePoller(latest=0)
+    source = ChangeStreamSource(poller, DictCache())
+
+    await source.run(AsyncMock(), start=5)
+
+    assert poller.run_start == 5
@@ -0,0 +1,63 @@
+import pickle
+from datetime import datetime, timezone
+
+import pytest
+
+from db.codecs import (
+    MsgpackCodec,
+    OrjsonCodec,
+    PickleCodec,
+    VersionedSerializer,
+)
+from db.redis import form_key
+from schemas.reviews import FilmReviewGRPC
+
+pytestmark = pytest.mark.asyncio
+
+REVIEW = FilmReviewGRPC(
+    id="12385f64-5717-4562-b3fc-2c963f66a987",
+    film_id="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    review_text="test review text",
+    created_at=datetime(2025, 1, 30, 22, 22, 22, tzinfo=timezone.utc),
+)
+
+
+@pytest.mark.parametrize("codec", [OrjsonCodec(), MsgpackCodec()])
+async def test_roundtrip_pydantic_models(codec):
+    """Тестирует восстановление pydantic-моделей из кэша."""
+    serializer = VersionedSerializer(codec)
+    value = {"reviews": [REVIEW], "score": 7.5, "valid": True}
+
+    assert serializer.loads(serializer.dumps(value)) == value
+
+
+async def test_read_other_codec_during_rollout():
+    """Тестирует чтение записей, сохраненных другим кодеком."""
+    writer = VersionedSerializer(MsgpackCodec())
+    reader = VersionedSerializer(OrjsonCodec())
+
+    assert reader.loads(writer.dumps([1, "a", None])) == [1, "a", None]
+
+
+async def test_legacy_pickle_entries():
+    """Тестирует чтение старых записей pickle без заголовка."""
+    legacy = pickle.dumps({"score": 7.5})
+
+    legacy_reader = VersionedSerializer(
+        OrjsonCodec(), accept_legacy_pickle=True
+    )
+    assert legacy_reader.loads(legacy) == {"score": 7.5}
+
+    strict = VersionedSerializer(OrjsonCodec())
+    with pytest.raises(ValueError):
+        strict.loads(legacy)
+    with pytest.raises(ValueError):
+        strict.loads(VersionedSerializer(PickleCodec()).dumps(1))
+
+
+async def test_form_key_is_stable():
+    """Тестирует независимость ключа от порядка именованных аргументов."""
+    assert form_key("get", ("a",), {"x": 1, "y": 2}) == form_key(
+        "get", ("a",), {"y": 2, "x": 1}
+    )
+    assert form_key("get", ("a",), {}) != form_key("get", ("b",), {})
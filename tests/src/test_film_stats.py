@@ -0,0 +1,70 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import UUID
+
+import pytest
+
+from services.film_stats_service import FilmStatsService
+
+pytestmark = pytest.mark.asyncio
+
+FILM_ID = UUID("3fa85f64-5717-4562-b3fc-2c963f66afa6")
+
+
+@pytest.fixture
+def stats_collection():
+    """Создает мок коллекции film_stats."""
+    collection = MagicMock()
+    collection.update_one = AsyncMock()
+    collection.find_one = AsyncMock()
+    with patch(
+        "services.film_stats_service.FilmStatsModel.get_motor_collection",
+        return_value=collection,
+    ):
+        yield collection
+
+
+async def test_apply_new_score(stats_collection):
+    """Новая оценка увеличивает сумму, количество и гистограмму."""
+    await FilmStatsService().apply_score_change(FILM_ID, new_score=7)
+
+    stats_collection.update_one.assert_called_once_with(
+        {"_id": FILM_ID},
+        {"$inc": {"score_sum": 7, "score_count": 1, "score_hist.7": 1}},
+        upsert=True,
+    )
+
+
+async def test_apply_changed_score(stats_collection):
+    """Изменение оценки переносит ее между корзинами гистограммы."""
+    await FilmStatsService().apply_score_change(
+        FILM_ID, new_score=9, old_score=4
+    )
+
+    stats_collection.update_one.assert_called_once_with(
+        {"_id": FILM_ID},
+        {"$inc": {"score_sum": 5, "score_hist.9": 1, "score_hist.4": -1}},
+        upsert=True,
+    )
+
+
+async def test_apply_same_score(stats_collection):
+    """Повторная такая же оценка не обращается к MongoDB."""
+    await FilmStatsService().apply_score_change(
+        FILM_ID, new_score=5, old_score=5
+    )
+
+    stats_collection.update_one.assert_not_called()
+
+
+async def test_get_average_score(stats_collection):
+    """Средняя оценка считается по одному документу агрегатов."""
+    stats_collection.find_one.return_value = {
+        "score_sum": 15,
+        "score_count": 2,
+    }
+
+    average = await FilmStatsService().get_average_score(FILM_ID)
+    assert average == pytest.approx(7.5)
+
+    stats_collection.find_one.return_value = None
+    assert await FilmStatsService().get_average_score(FILM_ID) is None
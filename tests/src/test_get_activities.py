@@ -0,0 +1,101 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+import grpc_server.generated.activities_pb2 as pb2
+from grpc_server.server_aio import (
+    ActivitySender,
+    activity_predicate,
+    parse_activity_filter,
+)
+from models.projections import BookmarkActivityView, ScoreActivityView
+
+pytestmark = pytest.mark.asyncio
+
+START = datetime(2024, 1, 1)
+
+
+def fake_cursor(view, offsets, calls):
+    """Курсор $in: по документу на смещение, в порядке (user, created_at)."""
+
+    async def iterate(user_ids, batch_size, raw=False):
+        calls.append(list(user_ids))
+        for user_id in sorted(user_ids):
+            for offset in offsets:
+                doc = view(
+                    _id=uuid4(),
+                    user_id=user_id,
+                    film_id=uuid4(),
+                    created_at=START + timedelta(minutes=offset),
+                    monotonic_seq=offset,
+                    film_score=7,
+                )
+                yield doc.model_dump(by_alias=True) if raw else doc
+
+    return iterate
+
+
+@pytest.mark.parametrize("raw", [False, True])
+@patch("grpc_server.server_aio.settings.ACTIVITY_QUERY_CONCURRENCY", 2)
+@patch("grpc_server.server_aio.settings.ACTIVITY_USERS_CHUNK", 2)
+async def test_get_activities_merges_cursors_per_chunk(raw):
+    """Одна выборка на коллекцию и группу, активности по времени."""
+    calls = defaultdict(list)
+    bookmarks = fake_cursor(BookmarkActivityView, [1, 4], calls["bookmarks"])
+    scores = fake_cursor(ScoreActivityView, [2, 3], calls["scores"])
+    reviews = fake_cursor(None, [], calls["reviews"])
+
+    users = [str(uuid4()) for _ in range(5)]
+    with patch(
+        "grpc_server.server_aio.settings.ACTIVITY_RAW_DOCUMENTS", raw
+    ), patch(
+        "grpc_server.server_aio.get_bookmark_service",
+        return_value=MagicMock(iter_users_bookmarks=bookmarks),
+    ), patch(
+        "grpc_server.server_aio.get_review_service",
+        return_value=MagicMock(iter_users_reviews=reviews),
+    ), patch(
+        "grpc_server.server_aio.get_film_score_service",
+        return_value=MagicMock(iter_users_scores=scores),
+    ):
+        activities = [
+            activ
+            async for activ in ActivitySender().GetActivities(
+                pb2.UsersList(user_ids=users), MagicMock()
+            )
+        ]
+
+    ordered = sorted(users[:2]) + sorted(users[2:4]) + users[4:]
+    assert [activ.user_id for activ in activities] == [
+        user for user in ordered for _ in range(4)
+    ]
+    assert [activ.seq for activ in activities[:4]] == [1, 2, 3, 4]
+    for collection in ("bookmarks", "reviews", "scores"):
+        assert [len(chunk) for chunk in calls[collection]] == [2, 2, 1]
+
+
+async def test_activity_predicate_matches_filter():
+    """Живые активности отбираются по пользователю, фильму и времени."""
+    user_id, film_id = str(uuid4()), str(uuid4())
+    request = pb2.ActivityFilter(user_ids=[user_id], film_ids=[film_id])
+    request.since.FromDatetime(START)
+    matches = activity_predicate(parse_activity_filter(request))
+
+    activity = pb2.Activity(
+        user_id=user_id, review=pb2.Review(film_id=film_id)
+    )
+    activity.created_at.FromDatetime(START + timedelta(seconds=1))
+    assert matches(activity)
+
+    activity.created_at.FromDatetime(START - timedelta(seconds=1))
+    assert not matches(activity)
+
+    activity.created_at.FromDatetime(START)
+    activity.review.film_id = str(uuid4())
+    assert not matches(activity)
+
+    empty = parse_activity_filter(pb2.ActivityFilter())
+    assert activity_predicate(empty) is None
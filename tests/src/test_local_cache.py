@@ -0,0 +1,90 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from db.local_cache import MISSING, LRUTTLStore, TwoTierCache
+from db.redis import RedisCache
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def remote_cache():
+    """Создает мок общего кэша в Redis."""
+    return MagicMock(spec=RedisCache)
+
+
+async def test_lru_store_evicts_least_recent():
+    """Тестирует вытеснение давно не читанного ключа."""
+    store = LRUTTLStore(maxsize=2)
+    store.set("a", 1, ttl=10)
+    store.set("b", 2, ttl=10)
+    store.get("a")
+    store.set("c", 3, ttl=10)
+
+    assert store.get("a") == 1
+    assert store.get("b") is MISSING
+    assert store.get("c") == 3
+
+
+async def test_lru_store_expires_entries():
+    """Тестирует истечение времени жизни записи."""
+    store = LRUTTLStore(maxsize=2)
+    store.set("a", 1, ttl=-1)
+
+    assert store.get("a") is MISSING
+
+
+async def test_hot_key_served_from_memory(remote_cache):
+    """Тестирует чтение горячего ключа без обращения к Redis."""
+    remote_cache.get.return_value = True
+    cache = TwoTierCache(remote_cache)
+
+    assert await cache.get("key") is True
+    assert await cache.get("key") is True
+    assert remote_cache.get.call_count == 1
+
+
+async def test_negative_caching(remote_cache):
+    """Тестирует кэширование промаха и его сброс записью."""
+    remote_cache.get.return_value = None
+    cache = TwoTierCache(remote_cache, negative_ttl=10)
+
+    assert await cache.get("key") is None
+    assert await cache.get("key") is None
+    assert remote_cache.get.call_count == 1
+
+    await cache.set("key", 5, expire=60)
+    assert await cache.get("key") == 5
+    remote_cache.set.assert_called_once_with(
+        "key", 5, 60, False, tags=(), tag_versions=None
+    )
+
+
+async def test_invalidation_from_other_process(remote_cache):
+    """Тестирует инвалидацию по сообщению из канала pub/sub."""
+    redis = MagicMock()
+    redis.publish = AsyncMock()
+    cache = TwoTierCache(remote_cache, redis=redis, channel="invalidate")
+    await cache.set("key", 1)
+    redis.publish.assert_called_once_with(
+        "invalidate", f"{cache.instance_id}:key"
+    )
+
+    cache.handle_invalidation(f"{cache.instance_id}:key".encode())
+    assert cache.local.get("key") == 1
+
+    cache.handle_invalidation(b"other-process:key")
+    assert cache.local.get("key") is MISSING
+
+
+async def test_get_many_reads_only_local_misses(remote_cache):
+    """Тестирует пакетное чтение: в Redis идут только промахи процесса."""
+    remote_cache.get_many.return_value = [2, None]
+    cache = TwoTierCache(remote_cache)
+    cache.local.set("a", 1, ttl=10)
+
+    assert await cache.get_many(["a", "b", "c"]) == [1, 2, None]
+    remote_cache.get_many.assert_called_once_with(["b", "c"], False)
+    assert await cache.get_many(["a", "b"]) == [1, 2]
+    assert remote_cache.get_many.call_count == 1
@@ -0,0 +1,47 @@
+import pytest
+
+from utils.merge import merge
+
+pytestmark = pytest.mark.asyncio
+
+
+async def items(*values):
+    for value in values:
+        yield value
+
+
+async def test_merge_keeps_order_and_source_priority():
+    """Слияние упорядочено по ключу, при равенстве - по источнику."""
+    merged = merge(
+        items((1, "a"), (3, "a")),
+        items(),
+        items((1, "b"), (2, "b"), (5, "b")),
+        key=lambda item: item[0],
+    )
+
+    assert [item async for item in merged] == [
+        (1, "a"),
+        (1, "b"),
+        (2, "b"),
+        (3, "a"),
+        (5, "b"),
+    ]
+
+
+async def test_merge_closes_sources():
+    """Закрытие результата закрывает источники."""
+    closed = []
+
+    async def source(name):
+        try:
+            for number in (1, 2):
+                yield number
+        except GeneratorExit:
+            closed.append(name)
+            raise
+
+    merged = merge(source("a"), source("b"), key=int)
+    assert await anext(merged) == 1
+
+    await merged.aclose()
+    assert sorted(closed) == ["a", "b"]
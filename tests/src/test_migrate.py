@@ -0,0 +1,62 @@
+import pickle
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import migrate
+from services.activity_stream import checkpoint_key
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_only_pending_migrations_applied():
+    """Применяются и отмечаются только еще не примененные миграции."""
+    applied_step = AsyncMock()
+    pending_step = AsyncMock()
+    model = MagicMock()
+    model.get = AsyncMock(side_effect=[MagicMock(), None])
+    model.return_value.insert = AsyncMock()
+
+    with patch.object(
+        migrate,
+        "MIGRATIONS",
+        {"0001_applied": applied_step, "0002_pending": pending_step},
+    ), patch.object(migrate, "MigrationModel", model):
+        await migrate.migrate()
+
+    applied_step.assert_not_awaited()
+    pending_step.assert_awaited_once()
+    model.assert_called_once_with(id="0002_pending")
+    model.return_value.insert.assert_awaited_once()
+
+
+@patch("db.casher.cacher", new_callable=AsyncMock)
+async def test_legacy_checkpoints_converted(cacher: AsyncMock):
+    """Позиции, сохраненные через pickle, переписываются в формат кэша."""
+    score_key = checkpoint_key("FilmScoreModel")
+    # позиция закладок уже в текущем формате и не меняется
+    stored = {
+        score_key: pickle.dumps(42),
+        checkpoint_key("FilmBookmarkModel"): b"\x01\x0242",
+    }
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=stored.get)
+
+    with patch("db.redis.redis", client):
+        await migrate.convert_legacy_checkpoints()
+
+    cacher.set.assert_awaited_once_with(score_key, 42, raise_exc=True)
+
+
+@patch("db.casher.cacher", new_callable=AsyncMock)
+async def test_legacy_checkpoint_globals_rejected(cacher: AsyncMock):
+    """Значение pickle с глобальными именами не выполняется."""
+    client = MagicMock()
+    client.get = AsyncMock(return_value=pickle.dumps(MagicMock))
+
+    with patch("db.redis.redis", client), pytest.raises(
+        pickle.UnpicklingError
+    ):
+        await migrate.convert_legacy_checkpoints()
+
+    cacher.set.assert_not_awaited()
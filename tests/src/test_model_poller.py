@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from models.projections import ScoreActivityView
+from services.activity_filter import ActivityFilter
+from services.model_poller import ModelPoller
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def model_class():
+    """Создает мок модели с цепочкой find().project().sort().limit()."""
+    model = MagicMock()
+    model.__name__ = "Model"
+    find = model.find.return_value
+    find.project.return_value = find
+    find.sort.return_value = find
+    find.limit.return_value = find
+    find.to_list = AsyncMock(return_value=[])
+    return model
+
+
+async def test_fetch_pages_by_monotonic_seq(model_class):
+    """Пачка читается по индексу monotonic_seq с проекцией полей."""
+    poller = ModelPoller(
+        model_class,
+        transformer=str,
+        batch_size=10,
+        projection_model=ScoreActivityView,
+    )
+
+    await poller.fetch(5, until=9)
+
+    find = model_class.find.return_value
+    find.project.assert_called_once_with(ScoreActivityView)
+    find.sort.assert_called_once_with(+model_class.monotonic_seq)
+    find.limit.assert_called_once_with(10)
+    assert len(model_class.find.call_args.args) == 2
+
+
+async def test_latest_seq_reads_index_tail(model_class):
+    """Последний номер берется одним запросом по убыванию индекса."""
+    collection = model_class.get_motor_collection.return_value
+    collection.find_one = AsyncMock(return_value={"monotonic_seq": 42})
+
+    assert await ModelPoller(model_class, str).latest_seq() == 42
+    assert collection.find_one.call_args.kwargs["sort"] == [
+        ("monotonic_seq", -1)
+    ]
+
+
+async def test_raw_documents_bypass_model(model_class):
+    """С raw_transformer документы курсора не валидируются моделью."""
+    find = model_class.find.return_value
+    find.motor_cursor.to_list = AsyncMock(
+        return_value=[{"monotonic_seq": 3}, {"monotonic_seq": 4}]
+    )
+    poller = ModelPoller(
+        model_class,
+        transformer=str,
+        batch_size=2,
+        raw_transformer=lambda doc: -doc["monotonic_seq"],
+    )
+
+    assert [item async for item in poller.backfill(2, 4)] == [-3, -4]
+    find.to_list.assert_not_called()
+
+
+async def test_filter_pushed_down_into_query(model_class):
+    """Условия фильтра добавляются в запрос догрузки."""
+    activity_filter = ActivityFilter(
+        user_ids={uuid4()}, since=datetime(2024, 1, 1)
+    )
+    poller = ModelPoller(model_class, transformer=str)
+
+    await poller.fetch(5, 9, activity_filter)
+
+    query = model_class.find.call_args.args
+    assert list(query[2:]) == activity_filter.query()
+
+
+async def test_watermark_limits_live_poll(model_class):
+    """Живой опрос не продвигается дальше границы записанных номеров."""
+    collection = model_class.get_motor_collection.return_value
+    collection.find_one = AsyncMock(return_value={"monotonic_seq": 42})
+    poller = ModelPoller(
+        model_class, transformer=str, watermark=AsyncMock(return_value=40)
+    )
+
+    assert await poller.latest_seq() == 40
+
+    poller.position = 40
+    poller.fetch = AsyncMock()
+    poller.interval = 0
+    task = asyncio.create_task(poller.run(AsyncMock(), start=40))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    poller.fetch.assert_not_called()
+
+
+async def test_live_poll_survives_errors(model_class):
+    """Ошибка чтения логируется, опрос продолжается и позиция доступна."""
+    collection = model_class.get_motor_collection.return_value
+    collection.find_one = AsyncMock(
+        side_effect=[ConnectionError("down"), {"monotonic_seq": 3}]
+    )
+    poller = ModelPoller(model_class, transformer=str, interval=0)
+    failures = [ConnectionError("down")]
+
+    async def fetch(after, until):
+        if failures:
+            raise failures.pop()
+        return []
+
+    poller.fetch = AsyncMock(side_effect=fetch)
+
+    task = asyncio.create_task(poller.run(AsyncMock()))
+    assert await asyncio.wait_for(poller.current_position(), 1) == 3
+    await asyncio.sleep(0.01)
+
+    assert not task.done()
+    assert poller.fetch.await_count >= 2
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
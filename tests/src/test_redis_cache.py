@@ -0,0 +1,97 @@
+import pickle
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from db.redis import RedisCache, form_tag_key, form_tag_version_key
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def redis_client():
+    """Создает мок клиента Redis с конвейером команд."""
+    client = MagicMock()
+    client.mget = AsyncMock()
+    client.mset = AsyncMock()
+    client.delete = AsyncMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    client.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    client.pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+    client.pipe = pipe
+    return client
+
+
+async def test_get_many_single_round_trip(redis_client):
+    """Тестирует чтение нескольких ключей одним MGET."""
+    cache = RedisCache(redis_client)
+    redis_client.mget.return_value = [
+        cache.serializer.dumps({"score": 7}),
+        None,
+    ]
+
+    assert await cache.get_many(["a", "b"]) == [{"score": 7}, None]
+    redis_client.mget.assert_called_once_with(["a", "b"])
+
+
+async def test_get_many_swallows_errors(redis_client):
+    """Тестирует, что ошибка Redis превращается в промахи."""
+    redis_client.mget.side_effect = ConnectionError("down")
+    cache = RedisCache(redis_client)
+
+    assert await cache.get_many(["a", "b"]) == [None, None]
+    with pytest.raises(ConnectionError):
+        await cache.get_many(["a"], raise_exc=True)
+
+
+async def test_get_many_skips_undecodable_values(redis_client):
+    """Тестирует, что нечитаемое значение - промах только своего ключа."""
+    cache = RedisCache(redis_client)
+    redis_client.mget.return_value = [
+        pickle.dumps({"score": 1}),
+        cache.serializer.dumps({"score": 7}),
+        None,
+    ]
+
+    assert await cache.get_many(["a", "b", "c"]) == [None, {"score": 7}, None]
+
+
+async def test_set_many_with_expire_uses_pipeline(redis_client):
+    """Тестирует запись нескольких ключей с TTL через конвейер."""
+    cache = RedisCache(redis_client)
+
+    await cache.set_many({"a": 1, "b": 2}, expire=60)
+
+    assert redis_client.pipe.set.call_count == 2
+    redis_client.pipe.execute.assert_awaited_once()
+    redis_client.mset.assert_not_called()
+
+
+async def test_incr_many_returns_new_values(redis_client):
+    """Тестирует увеличение нескольких счетчиков за один проход."""
+    redis_client.pipe.execute.return_value = [3, 10]
+    cache = RedisCache(redis_client)
+
+    assert await cache.incr_many({"a": 1, "b": 5}) == [3, 10]
+    redis_client.pipe.incr.assert_any_call("b", 5)
+
+
+async def test_tagged_set_checks_tag_versions(redis_client):
+    """Тестирует запись с тегами при условии неизменных версий тегов."""
+    script = AsyncMock(return_value=1)
+    redis_client.register_script.return_value = script
+    redis_client.mget.return_value = [b"3"]
+    cache = RedisCache(redis_client)
+
+    versions = await cache.tag_versions("film:1")
+    await cache.set("key", 5, 60, tags=["film:1"], tag_versions=versions)
+
+    assert versions == [3]
+    call = script.call_args.kwargs
+    assert call["keys"] == [
+        "key",
+        form_tag_key("film:1"),
+        form_tag_version_key("film:1"),
+    ]
+    assert call["args"][1:] == [60, 3]
@@ -1,6 +1,11 @@
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
 
 import pytest
+from fastapi import HTTPException
+
+from services.review_service import ReviewsService
+from utils.paginator import decode_cursor, encode_cursor
 
 pytestmark = pytest.mark.asyncio
 
@@ -131,3 +136,117 @@ async def test_delete_review(delete_review: AsyncMock, client):
 
     assert response.status_code == 204
     assert delete_review.call_count == 1
+
+
+@patch(
+    "services.review_service.ReviewsService.unlike_review",
+    new_callable=AsyncMock,
+)
+async def test_unlike_review(unlike_review: AsyncMock, client):
+    """
+    Удаление лайка с рецензии.
+    """
+    unlike_review.return_value = None
+
+    response = client.delete(
+        "/api/v1/reviews/3fa85f64-5717-4562-b3fc-2c963f66afa6/like"
+    )
+
+    assert response.status_code == 204
+    assert unlike_review.call_count == 1
+
+
+@patch(
+    "services.review_service.ReviewsService.get_reviews",
+    new_callable=AsyncMock,
+)
+async def test_get_reviews_cursor(get_reviews: AsyncMock, client):
+    """
+    Получение страницы рецензий по курсору и курсора следующей страницы.
+    """
+    review = {
+        "id": "12385f64-5717-4562-b3fc-2c963f66a987",
+        "user_id": "abc85f64-5717-4562-b3fc-2c963f66adef",
+        "review_text": "test review text",
+        "film_score": 10,
+        "created_at": "2025-01-30T22:22:22",
+        "likes": 5,
+    }
+    get_reviews.return_value = [review]
+    cursor = encode_cursor(7, "23485f64-5717-4562-b3fc-2c963f66a989")
+
+    response = client.get(
+        "/api/v1/reviews/3fa85f64-5717-4562-b3fc-2c963f66afa6",
+        params={"page_size": 1, "after": cursor},
+    )
+
+    assert response.status_code == 200
+    assert get_reviews.call_args.kwargs["after"] == cursor
+    assert decode_cursor(response.headers["X-Next-Cursor"]) == [
+        5,
+        "12385f64-5717-4562-b3fc-2c963f66a987",
+    ]
+
+
+@patch("db.casher.cacher", new_callable=AsyncMock)
+async def test_get_reviews_invalid_cursor(cacher: AsyncMock):
+    """
+    Поврежденный курсор отклоняется до обращения к MongoDB.
+    """
+    cacher.get.return_value = None
+    with pytest.raises(HTTPException) as exc_info:
+        await ReviewsService().get_reviews(
+            "3fa85f64-5717-4562-b3fc-2c963f66afa6", after="not-a-cursor"
+        )
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ({"$ne": None}, "23485f64-5717-4562-b3fc-2c963f66a989"),
+        (True, "23485f64-5717-4562-b3fc-2c963f66a989"),
+        (7, {"$gt": ""}),
+        (7, "not-a-uuid"),
+        (7,),
+    ],
+)
+@patch("db.casher.cacher", new_callable=AsyncMock)
+async def test_get_reviews_rejects_forged_cursor(cacher: AsyncMock, values):
+    """
+    Курсор с операторами MongoDB или значениями не тех типов
+    отклоняется до обращения к MongoDB.
+    """
+    cacher.get.return_value = None
+    aggregate = MagicMock()
+    with patch(
+        "services.review_service.FilmReviewModel.aggregate", aggregate
+    ), pytest.raises(HTTPException) as exc_info:
+        await ReviewsService().get_reviews(
+            "3fa85f64-5717-4562-b3fc-2c963f66afa6",
+            after=encode_cursor(*values),
+        )
+
+    assert exc_info.value.status_code == 400
+    aggregate.assert_not_called()
+
+
+@patch("db.casher.invalidate_tags", new_callable=AsyncMock)
+async def test_like_review_invalidates_film_reviews(invalidate: AsyncMock):
+    """
+    Изменение счетчика лайков сбрасывает кэш рецензий фильма.
+    """
+    film_id = uuid4()
+    collection = MagicMock()
+    collection.find_one_and_update = AsyncMock(
+        return_value={"_id": uuid4(), "film_id": film_id}
+    )
+
+    with patch(
+        "services.review_service.FilmReviewModel.get_motor_collection",
+        return_value=collection,
+    ):
+        await ReviewsService()._change_likes_count(uuid4(), 1)
+
+    invalidate.assert_awaited_once_with(f"film:{film_id}:reviews")
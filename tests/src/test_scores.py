@@ -1,6 +1,13 @@
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
 
 import pytest
+from pymongo.errors import BulkWriteError
+
+from core.config import settings
+from schemas.bulk import BulkItemStatus
+from schemas.scores import AddScore
+from services.score_service import FilmScoreService
 
 pytestmark = pytest.mark.asyncio
 
@@ -62,3 +69,170 @@ async def test_del_score(delete_score: AsyncMock, client):
 
     assert response.status_code == 204
     assert delete_score.call_count == 1
+
+
+@patch(
+    "services.score_service.FilmScoreModel.next_monotonic_seqs",
+    new_callable=AsyncMock,
+)
+@patch("services.score_service.FilmScoreModel.get_motor_collection")
+async def test_upsert_score_single_round_trip(
+    get_collection: MagicMock, next_seq: AsyncMock
+):
+    """
+    Оценка добавляется или обновляется одним upsert-запросом.
+    """
+    next_seq.return_value = range(42, 43)
+    collection = get_collection.return_value
+    collection.find_one_and_update = AsyncMock(
+        return_value={"film_score": 3}
+    )
+    film_id, user_id = uuid4(), uuid4()
+
+    old_score = await FilmScoreService().upsert_score(film_id, user_id, 8)
+
+    assert old_score == 3
+    assert collection.find_one_and_update.call_count == 1
+    query, update = collection.find_one_and_update.call_args.args
+    assert query == {"film_id": film_id, "user_id": user_id}
+    assert update["$set"] == {"film_score": 8}
+    assert update["$setOnInsert"]["monotonic_seq"] == 42
+    assert collection.find_one_and_update.call_args.kwargs["upsert"]
+
+
+async def test_add_scores_batch_endpoint(client):
+    """
+    Пакет оценок проверяется целиком и ограничен BULK_MAX_ITEMS.
+    """
+    item = {"film_id": str(uuid4()), "film_score": 5}
+
+    with patch(
+        "services.score_service.FilmScoreService.add_scores",
+        new_callable=AsyncMock,
+        return_value=[{"index": 0, "status": "CREATED"}],
+    ) as add_scores:
+        response = client.post("/api/v1/scores/batch", json={"items": [item]})
+        too_many = client.post(
+            "/api/v1/scores/batch",
+            json={
+                "items": [item for _ in range(settings.BULK_MAX_ITEMS + 1)]
+            },
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [{"index": 0, "status": "CREATED", "detail": None}]
+    }
+    assert too_many.status_code == 422
+    assert add_scores.call_count == 1
+
+
+@patch("services.score_service.FilmReviewModel.get_motor_collection")
+@patch(
+    "services.score_service.FilmScoreModel.next_monotonic_seqs",
+    new_callable=AsyncMock,
+)
+@patch("services.score_service.FilmScoreModel.get_motor_collection")
+async def test_add_scores_bulk_write(
+    get_collection: MagicMock, next_seqs: AsyncMock, get_reviews: MagicMock
+):
+    """
+    Оценки пакета пишутся одним bulk_write по прочитанным заранее
+    прежним оценкам, а повторы фильма вытесняются последним элементом.
+    """
+    created, updated, updated_id = uuid4(), uuid4(), uuid4()
+    next_seqs.return_value = range(10, 12)
+    collection = get_collection.return_value
+    collection.find.return_value.to_list = AsyncMock(
+        return_value=[
+            {"_id": updated_id, "film_id": updated, "film_score": 4}
+        ]
+    )
+    collection.bulk_write = AsyncMock(
+        return_value=MagicMock(upserted_ids={0: uuid4()})
+    )
+    get_reviews.return_value.bulk_write = AsyncMock()
+    service = FilmScoreService()
+    service.film_stats = MagicMock(apply_score_changes=AsyncMock())
+    items = [
+        AddScore(film_id=str(created), film_score=1),
+        AddScore(film_id=str(updated), film_score=2),
+        AddScore(film_id="not-a-uuid", film_score=3),
+        AddScore(film_id=str(updated), film_score=9),
+    ]
+    publish = AsyncMock()
+
+    with patch("services.score_service.publish_activities", publish):
+        results = await service.add_scores(items, str(uuid4()))
+
+    assert [result.status for result in results] == [
+        BulkItemStatus.CREATED,
+        BulkItemStatus.SUPERSEDED,
+        BulkItemStatus.ERROR,
+        BulkItemStatus.UPDATED,
+    ]
+    assert results[1].detail == "superseded by item 3"
+    next_seqs.assert_awaited_once_with(2)
+    collection.find_one_and_update.assert_not_called()
+    requests = collection.bulk_write.call_args.args[0]
+    assert collection.bulk_write.call_args.kwargs == {"ordered": False}
+    created_score = publish.call_args.args[0][0]
+    assert [request._filter for request in requests] == [
+        {"_id": created_score.id},
+        {"_id": updated_id, "film_score": 4},
+    ]
+    assert [
+        request._doc["$setOnInsert"]["monotonic_seq"] for request in requests
+    ] == [10, 11]
+    service.film_stats.apply_score_changes.assert_awaited_once_with(
+        [(created, 1, None), (updated, 9, 4)]
+    )
+    assert created_score.film_id == created
+    assert publish.call_args.args[0] == [created_score]
+
+
+@patch("services.score_service.FilmReviewModel.get_motor_collection")
+@patch(
+    "services.score_service.FilmScoreModel.next_monotonic_seqs",
+    new_callable=AsyncMock,
+)
+@patch("services.score_service.FilmScoreModel.get_motor_collection")
+async def test_add_scores_conflict_and_stats_failure(
+    get_collection: MagicMock, next_seqs: AsyncMock, get_reviews: MagicMock
+):
+    """
+    Оценка, измененная параллельно, пишется повторно атомарным upsert,
+    а ошибка обновления агрегатов не отменяет результаты записи.
+    """
+    film_id = uuid4()
+    next_seqs.return_value = range(10, 11)
+    collection = get_collection.return_value
+    collection.find.return_value.to_list = AsyncMock(
+        return_value=[{"_id": uuid4(), "film_id": film_id, "film_score": 4}]
+    )
+    collection.bulk_write = AsyncMock(
+        side_effect=BulkWriteError(
+            {"writeErrors": [{"index": 0, "code": 11000}], "upserted": []}
+        )
+    )
+    collection.find_one_and_update = AsyncMock(
+        return_value={"film_score": 6}
+    )
+    get_reviews.return_value.bulk_write = AsyncMock()
+    service = FilmScoreService()
+    service.film_stats = MagicMock(
+        apply_score_changes=AsyncMock(side_effect=RuntimeError("down"))
+    )
+
+    with patch(
+        "services.score_service.publish_activities", new_callable=AsyncMock
+    ):
+        results = await service.add_scores(
+            [AddScore(film_id=str(film_id), film_score=7)], str(uuid4())
+        )
+
+    assert [result.status for result in results] == [BulkItemStatus.UPDATED]
+    collection.find_one_and_update.assert_awaited_once()
+    service.film_stats.apply_score_changes.assert_awaited_once_with(
+        [(film_id, 7, 6)]
+    )
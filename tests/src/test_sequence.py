@@ -0,0 +1,181 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from beanie import Document
+from pymongo.errors import DuplicateKeyError
+
+from core.config import ActivitySourceMode, settings
+from db.sequence import SequenceAllocator, leases_key, low_marks_key
+from init_services import sequence_blocks_enabled
+from models.mongo_models import FilmBookmarkModel
+
+pytestmark = pytest.mark.asyncio
+
+KEY = "counter"
+
+
+@pytest.fixture
+def redis_client():
+    """Создает мок Redis: скрипты резервирования и публикации границ."""
+    client = MagicMock()
+    counter = {"value": 0}
+
+    async def allocate(keys, args):
+        counter["value"] += args[0]
+        return counter["value"]
+
+    allocate_script = AsyncMock(side_effect=allocate)
+    report_script = AsyncMock()
+    client.register_script.side_effect = [allocate_script, report_script]
+    client.allocate_script = allocate_script
+    client.report_script = report_script
+    client.counter = counter
+
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    client.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    client.pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+    client.pipe = pipe
+    return client
+
+
+async def test_block_served_locally(redis_client):
+    """Номера блока выдаются без обращения к Redis."""
+    allocator = SequenceAllocator(redis_client, block_size=10)
+
+    seqs = [(await allocator.allocate(KEY))[0] for _ in range(12)]
+
+    assert seqs == list(range(1, 13))
+    assert redis_client.allocate_script.await_count == 2
+    keys = redis_client.allocate_script.call_args.kwargs["keys"]
+    assert keys == [KEY, low_marks_key(KEY), leases_key(KEY)]
+
+
+async def test_bulk_range_in_one_call(redis_client):
+    """Диапазон больше блока резервируется целиком одним вызовом."""
+    allocator = SequenceAllocator(redis_client, block_size=10)
+    await allocator.allocate(KEY)
+
+    seqs = await allocator.allocate(KEY, 25)
+
+    assert seqs == range(11, 36)
+    assert redis_client.allocate_script.await_count == 2
+    # незавершенная вставка первого блока удерживает нижнюю границу
+    reserved = redis_client.allocate_script.call_args.kwargs
+    assert reserved["args"][2] == 1
+
+
+async def test_low_mark_follows_pending_inserts(redis_client):
+    """Граница процесса - наименьший незавершенный номер."""
+    allocator = SequenceAllocator(
+        redis_client, block_size=10, report_interval=60
+    )
+    first = await allocator.allocate(KEY)
+    second = await allocator.allocate(KEY)
+
+    await allocator.report()
+    reported = redis_client.report_script.call_args.kwargs
+    assert reported["args"][1] == 1
+
+    allocator.release(KEY, first)
+    await allocator.report()
+    reported = redis_client.report_script.call_args.kwargs
+    assert reported["args"][1] == 2
+
+    allocator.release(KEY, second)
+    await allocator.report()
+    reported = redis_client.report_script.call_args.kwargs
+    assert reported["args"][1] == 3
+
+
+async def test_idle_block_released(redis_client):
+    """Простаивающий процесс снимает границу и бросает остаток блока."""
+    allocator = SequenceAllocator(
+        redis_client, block_size=10, report_interval=0
+    )
+    allocator.release(KEY, await allocator.allocate(KEY))
+
+    await allocator.report()
+
+    redis_client.pipe.zrem.assert_any_call(
+        low_marks_key(KEY), allocator.process_id
+    )
+    redis_client.report_script.assert_not_called()
+    assert await allocator.allocate(KEY) == range(11, 12)
+
+
+async def test_stale_pending_range_expires(redis_client):
+    """Незавершенный диапазон старше lease_ttl не держит границу."""
+    allocator = SequenceAllocator(
+        redis_client, block_size=10, report_interval=60, lease_ttl=0.01
+    )
+    await allocator.allocate(KEY)
+    await allocator.allocate(KEY)
+    await asyncio.sleep(0.02)
+
+    await allocator.report()
+
+    # оба диапазона просрочены, граница - следующий номер блока
+    reported = redis_client.report_script.call_args.kwargs
+    assert reported["args"][1] == 3
+
+
+async def test_report_tolerates_new_keys(redis_client):
+    """Новая последовательность во время публикации не ломает обход."""
+    allocator = SequenceAllocator(
+        redis_client, block_size=10, report_interval=60
+    )
+    await allocator.allocate(KEY)
+
+    async def allocate_other(keys, args):
+        await allocator.allocate("other")
+
+    redis_client.report_script.side_effect = allocate_other
+    await allocator.report()
+
+    assert redis_client.allocate_script.await_count == 2
+
+
+async def test_failed_insert_releases_seq(redis_client):
+    """Номер неудавшейся вставки не удерживает границу процесса."""
+    allocator = SequenceAllocator(
+        redis_client, block_size=10, report_interval=60
+    )
+
+    async def insert_duplicate(document, **kwargs):
+        await document.set_monotonic_seq()
+        raise DuplicateKeyError("duplicate")
+
+    with (
+        patch("db.sequence.allocator", allocator),
+        patch.object(Document, "insert", insert_duplicate),
+        patch.object(FilmBookmarkModel, "get_motor_collection"),
+    ):
+        bookmark = FilmBookmarkModel(film_id=uuid4(), user_id=uuid4())
+        with pytest.raises(DuplicateKeyError):
+            await bookmark.insert()
+
+    await allocator.report()
+
+    assert bookmark.monotonic_seq == 1
+    reported = redis_client.report_script.call_args.kwargs
+    assert reported["args"][1] == 2
+
+
+@pytest.mark.parametrize(
+    ("source", "enabled"),
+    [
+        (ActivitySourceMode.POLL, True),
+        (ActivitySourceMode.STREAM, False),
+        (ActivitySourceMode.CHANGE_STREAM, False),
+    ],
+)
+async def test_blocks_only_with_polling(source, enabled):
+    """Блоки выдаются только источнику, соблюдающему границу."""
+    with (
+        patch.object(settings, "SEQUENCE_BLOCK_SIZE", 100),
+        patch.object(settings, "ACTIVITY_SOURCE", source),
+    ):
+        assert sequence_blocks_enabled() is enabled
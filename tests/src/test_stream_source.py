@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from uuid import UUID, uuid4
+
+import pytest
+from pydantic import BaseModel
+
+from db.outbox import ActivityOutbox, stream_key
+from services.stream_source import StreamSource
+
+pytestmark = pytest.mark.asyncio
+
+
+class Bookmark(BaseModel):
+    """Документ закладки без привязки к коллекции MongoDB."""
+
+    film_id: UUID
+    created_at: datetime
+    monotonic_seq: int
+
+
+def bookmark(seq: int) -> Bookmark:
+    return Bookmark(
+        film_id=uuid4(),
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        monotonic_seq=seq,
+    )
+
+
+class FakePoller:
+    """Опрос MongoDB, в которой уже есть документы seq 1..latest."""
+
+    model_class = Bookmark
+
+    def __init__(self, latest: int) -> None:
+        self.latest = latest
+
+    def transformer(self, doc: Bookmark) -> int:
+        return doc.monotonic_seq
+
+    async def latest_seq(self) -> int:
+        return self.latest
+
+    async def backfill(self, after: int, until: int):
+        for seq in range(after + 1, until + 1):
+            yield seq
+
+
+class ListSink:
+    def __init__(self) -> None:
+        self.items: list = []
+
+    async def put(self, item) -> None:
+        self.items.append(item)
+
+
+async def test_outbox_appends_compact_event():
+    """Вставка пишется в поток модели с seq и JSON документа."""
+    redis = AsyncMock()
+    doc = bookmark(7)
+
+    await ActivityOutbox(redis, maxlen=10).publish(doc, 7)
+
+    key, fields = redis.xadd.call_args.args
+    assert key == stream_key("Bookmark")
+    assert fields["seq"] == 7
+    assert Bookmark.model_validate_json(fields["doc"]) == doc
+
+
+async def test_stream_tailed_after_backfill():
+    """Живые события читаются из потока, пропущенное - из MongoDB."""
+    poller = FakePoller(latest=2)
+    redis = AsyncMock()
+    redis.xrevrange.return_value = [(b"1-0", {})]
+    event = {b"seq": b"4", b"doc": bookmark(4).model_dump_json()}
+    redis.xread.side_effect = [
+        [(b"key", [(b"2-0", event)])],
+        asyncio.CancelledError(),
+    ]
+    source = StreamSource(poller, redis)
+    sink = ListSink()
+
+    with pytest.raises(asyncio.CancelledError):
+        await source.run(sink, start=0)
+
+    assert sink.items == [1, 2, 4]
+    assert source.position == 4
+    resumed = redis.xread.call_args_list[1]
+    assert resumed.args[0] == {source.key: b"2-0"}
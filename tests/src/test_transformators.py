@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from grpc_server.utils.transformators import (
+    transform_film_bookmark,
+    transform_film_review,
+    transform_film_score,
+    transform_raw_film_bookmark,
+    transform_raw_film_review,
+    transform_raw_film_score,
+)
+from models.projections import (
+    BookmarkActivityView,
+    ReviewActivityView,
+    ScoreActivityView,
+)
+
+
+def raw_document(created_at: datetime) -> dict:
+    return {
+        "_id": uuid4(),
+        "user_id": uuid4(),
+        "film_id": uuid4(),
+        "created_at": created_at,
+        "monotonic_seq": 42,
+        "film_score": 8,
+        "review_text": "review",
+    }
+
+
+@pytest.mark.parametrize(
+    "created_at",
+    [
+        datetime(2024, 5, 1, 12, 30, 15, 123456),
+        datetime(1969, 12, 31, 23, 59, 59, 500000),
+        datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    ],
+)
+@pytest.mark.parametrize(
+    "view, transformer, raw_transformer",
+    [
+        (ScoreActivityView, transform_film_score, transform_raw_film_score),
+        (
+            BookmarkActivityView,
+            transform_film_bookmark,
+            transform_raw_film_bookmark,
+        ),
+        (
+            ReviewActivityView,
+            transform_film_review,
+            transform_raw_film_review,
+        ),
+    ],
+)
+def test_raw_transformers_match_models(
+    view, transformer, raw_transformer, created_at
+):
+    """Быстрый путь строит ту же активность, что и путь через модель."""
+    doc = raw_document(created_at)
+
+    assert raw_transformer(doc) == transformer(view.model_validate(doc))